@@ -1,27 +1,71 @@
+from importlib import import_module
 from flask import Flask
-from flask import redirect, url_for
+from flask import current_app, redirect, url_for, abort
 from config import Config
-from dotenv import load_dotenv
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
-load_dotenv('.flaskenv')  # Load environment variables from .flaskenv
-import os
 
-from flask_sqlalchemy import SQLAlchemy 
-from flask_migrate import Migrate 
+from flask_sqlalchemy import SQLAlchemy
+from app.replica import RoutingSession
 
-app = Flask(__name__)
-app.config.from_object(Config) 
+# Environment variables (.flaskenv) are loaded once, by the flask CLI or run.py, before
+# Config is imported.
 
-csrf = CSRFProtect(app)
-
-db = SQLAlchemy(app) 
-migrate = Migrate(app, db) 
-login = LoginManager(app) 
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+login = LoginManager()
+csrf = CSRFProtect()
 
 
 @login.unauthorized_handler
 def unauthorized():
-   return redirect(url_for('login'))  # Redirect without flashing a message
+   if 'auth' not in current_app.blueprints:
+      abort(401)  # API-only worker: there is no login page to send the client to
+   return redirect(url_for('auth.login'))  # Redirect without flashing a message
+
+
+def init_migrate(app):
+    from flask_migrate import Migrate  # imports Alembic, which only the flask db commands need
+    Migrate(app, db)
+
+
+# Optional extensions a worker profile can ask for, by name
+EXTENSIONS = {'migrate': init_migrate}
+
+
+def create_app(config_class=Config):
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    profile = app.config['WORKER_PROFILES'][app.config['WORKER_PROFILE']]
+
+    from app import storage, replica
+    storage.configure(app)
+    csrf.init_app(app)
+    db.init_app(app)
+    storage.init_app(app)
+    replica.init_app(app)
+    login.init_app(app)
+    for name in profile['extensions']:
+        EXTENSIONS[name](app)
+
+    from app import models, identity, compression, writer, passwords, avatars
+    from app.routes.common import update_last_active
+    writer.init_app(app)
+    passwords.init_app(app)
+    app.before_request(update_last_active)
+    compression.init_app(app)
+    avatars.init_app(app)
+
+    # Route modules are only imported here, and only those the worker profile asks for
+    for name in profile['blueprints']:
+        app.register_blueprint(import_module(f'app.routes.{name}').bp)
+
+    return app
+
 
-from app import routes, models
\ No newline at end of file
+def __getattr__(name):
+    # `from app import app` keeps working for scripts and tests: a default app is built on first use
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,47 @@
+# Analysis types offered by the Insights view; their data is served by the insights blueprint.
+AVAILABLE_ANALYSES = {
+    "spending-by-category": {
+        "id": "spending-by-category",
+        "title": "💸 Spending by Category",
+        "description": "Total event costs grouped by the event's node (category). Filter by group and time period.", # MODIFIED description
+        "preview_title": "Spending Example",
+        "preview_image_filename": "img/placeholder-pie-icon.jpeg", # You'd need this image
+        "preview_description": "Shows total costs for events linked to different nodes. Helps track budget allocation.",
+        "placeholder_html": """
+            <div class='loading-placeholder' style='text-align: center; padding: 20px; color: #aaa;'>
+                <i class='fas fa-chart-pie fa-2x'></i>
+                <p style='margin-top: 10px;'>Loading spending data...</p>
+            </div>
+        """,
+        "default_config": {
+            "time_period": "all_time", 
+            "group_id": "all",
+            "startDate": None, 
+            "endDate": None    
+        }
+    },
+    "event-location-heatmap": {
+        "id": "event-location-heatmap",
+        "title": "📍 Event Location Heatmap",
+        "description": "Visualizes the geographic concentration of your attended events using a heatmap. Filters apply.",
+        "preview_title": "Location Heatmap",
+        "preview_image_filename": "img/placeholder-map-icon.jpeg", # Create a placeholder image
+        "preview_description": "Displays a heatmap of event locations you've attended. Useful for seeing event hotspots.",
+        "placeholder_html": """
+            <div class='loading-placeholder' style='text-align: center; padding: 20px; color: #aaa;'>
+                <i class='fas fa-map-marked-alt fa-2x'></i>
+                <p style='margin-top: 10px;'>Loading event locations...</p>
+            </div>
+        """,
+        "default_config": {
+            "time_period": "all_time",
+            "group_id": "all",
+            "startDate": None,
+            "endDate": None
+        }
+    }
+}
+
+# Helper to get details for an analysis type
+def get_analysis_details(analysis_type_id):
+    return AVAILABLE_ANALYSES.get(analysis_type_id)
@@ -0,0 +1,115 @@
+import colorsys
+import os
+import re
+import struct
+import tempfile
+import zlib
+from functools import lru_cache
+from hashlib import md5
+from flask import current_app, request, has_app_context, has_request_context, send_file, abort
+from config import Config
+
+# Identicon avatars served by the app itself (/avatar/<hash>/<size>), so pages do not fetch
+# images from a third party. <hash> is the MD5 of the avatar's key (a user's lowercased
+# email, a group's id), as Gravatar uses; the image is a symmetric 5x5 pattern whose cells
+# and colour come from the hash, so a URL always yields the same PNG. Generated images are
+# kept under AVATAR_CACHE_DIR and served with immutable cache headers.
+#
+# Templates ask for an avatar per friend, post, message and attendee, so the URL for a
+# (key, size) pair is memoized per process.
+GRID = 5
+URL_CACHE_SIZE = 4096
+_HASH = re.compile(r'[0-9a-f]{32}')
+
+
+def identicon_url(key, size):
+    """URL of the identicon for key (e.g. a lowercased email) at size px, clamped to AVATAR_*_SIZE."""
+    path = _identicon_path(key, clamp_size(size))
+    return request.script_root + path if has_request_context() else path
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _identicon_path(key, size):
+    return '/avatar/{}/{}'.format(md5(key.encode('utf-8')).hexdigest(), size)
+
+
+def clamp_size(size):
+    if has_app_context():
+        low, high = current_app.config['AVATAR_MIN_SIZE'], current_app.config['AVATAR_MAX_SIZE']
+    else:
+        low, high = Config.AVATAR_MIN_SIZE, Config.AVATAR_MAX_SIZE
+    return max(low, min(high, int(size)))
+
+
+def identicon_colour(digest):
+    """Foreground colour: hue from the last bytes of the hash, fixed saturation and lightness."""
+    hue = int(digest[-7:], 16) / 0xFFFFFFF
+    return tuple(round(channel * 255) for channel in colorsys.hls_to_rgb(hue, 0.55, 0.5))
+
+
+def identicon_cells(digest):
+    """The GRID x GRID cells that are filled, mirrored left to right."""
+    half = (GRID + 1) // 2
+    filled = [[False] * GRID for _ in range(GRID)]
+    for index in range(GRID * half):
+        column, row = divmod(index, GRID)
+        if int(digest[index], 16) % 2 == 0:
+            filled[row][column] = filled[row][GRID - 1 - column] = True
+    return filled
+
+
+def render_identicon(digest, size):
+    """A size x size PNG of the identicon for a 32-character hex digest."""
+    cell = max(1, (size * 5 // 6) // GRID)  # leaves a margin of about 1/12 on each side
+    offset = (size - cell * GRID) // 2
+    rows = []
+    for row in identicon_cells(digest):
+        line = bytearray(size)  # palette index 0 (background) everywhere
+        for column, filled in enumerate(row):
+            if filled:
+                start = offset + column * cell
+                line[start:start + cell] = b'\x01' * cell
+        rows.append(b'\x00' + bytes(line))  # filter type 0 per scanline
+    blank = b'\x00' + bytes(size)
+    scanlines = [blank] * offset
+    for line in rows:
+        scanlines += [line] * cell
+    scanlines += [blank] * (size - len(scanlines))
+    palette = bytes((240, 240, 240)) + bytes(identicon_colour(digest))
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        _chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 3, 0, 0, 0)),  # 8-bit palette
+        _chunk(b'PLTE', palette),
+        _chunk(b'IDAT', zlib.compress(b''.join(scanlines), 9)),
+        _chunk(b'IEND', b''),
+    ))
+
+
+def _chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def cache_dir():
+    return current_app.config['AVATAR_CACHE_DIR'] or os.path.join(current_app.instance_path, 'avatars')
+
+
+def identicon(digest, size):
+    """Serves /avatar/<digest>/<size> from the disk cache, generating the PNG on first request."""
+    if not _HASH.fullmatch(digest) or clamp_size(size) != size:
+        abort(404)
+    directory = os.path.join(cache_dir(), digest[:2])
+    path = os.path.join(directory, f'{digest}-{size}.png')
+    if not os.path.isfile(path):
+        os.makedirs(directory, exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(render_identicon(digest, size))
+        os.replace(partial, path)  # concurrent requests for the same image write identical bytes
+    response = send_file(path, mimetype='image/png', max_age=current_app.config['STATIC_IMMUTABLE_MAX_AGE'])
+    response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    # Registered on the app rather than a blueprint: every worker profile hands out avatar URLs
+    app.add_url_rule('/avatar/<digest>/<int:size>', 'avatar', identicon)
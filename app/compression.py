@@ -0,0 +1,196 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import zlib
+import click
+from flask import current_app, request, send_from_directory, abort
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is produced and negotiated
+    brotli = None
+
+# Response compression and precompressed, content-hashed static assets.
+#  * JSON/HTML responses above COMPRESS_MIN_SIZE are compressed on the fly according to
+#    Accept-Encoding; streamed responses are compressed chunk by chunk with a sync flush
+#    so every chunk still reaches the client as soon as it is produced.
+#  * `flask compress-static` writes .gz (and .br when brotli is installed) siblings next
+#    to static files; the static view serves them directly when the client accepts them.
+#  * url_for('static', ...) for scripts and stylesheets yields /static/_v/<hash>/<file>,
+#    where <hash> covers the content of every script and stylesheet, so relative ES module
+#    imports stay on one version and those URLs can be cached as immutable. Images keep
+#    plain URLs since some of them are stored in the database as defaults.
+
+VERSION_PREFIX = '_v/'
+PRECOMPRESSED_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+_static_version = None
+_static_version_lock = threading.Lock()
+
+
+def init_app(app):
+    app.after_request(compress_response)
+    app.url_defaults(add_static_version)
+    app.view_functions['static'] = send_static_file
+    app.cli.add_command(compress_static_command)
+
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding():
+    return request.accept_encodings.best_match(supported_encodings())
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=current_app.config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=current_app.config['COMPRESS_LEVEL'])
+
+
+def _compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=current_app.config['COMPRESS_BROTLI_QUALITY'])
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(current_app.config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)  # 31: gzip container
+        process, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            yield process(chunk) + flush()
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    if response.mimetype not in current_app.config['COMPRESS_MIMETYPES'] or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    if not 200 <= response.status_code < 300 or response.status_code == 204 or response.direct_passthrough:
+        return response
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)  # the bytes differ from the identity encoding
+    return response
+
+
+def static_version():
+    """Returns a short hash of the path and content of every versioned static file, computed once per process."""
+    global _static_version
+    if _static_version is None:
+        with _static_version_lock:
+            if _static_version is None:
+                digest = hashlib.sha1()
+                for path in _static_source_files(current_app.static_folder):
+                    if not path.endswith(current_app.config['STATIC_VERSIONED_EXTENSIONS']):
+                        continue
+                    digest.update(os.path.relpath(path, current_app.static_folder).encode('utf-8'))
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+                _static_version = digest.hexdigest()[:12]
+    return _static_version
+
+
+def _static_source_files(folder):
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(tuple(suffix for _, suffix in PRECOMPRESSED_SUFFIXES)):
+                yield os.path.join(root, name)
+
+
+def add_static_version(endpoint, values):
+    if endpoint == 'static' and current_app.config['STATIC_VERSIONED_URLS'] and not current_app.debug:
+        filename = values.get('filename')
+        if filename and filename.endswith(current_app.config['STATIC_VERSIONED_EXTENSIONS']) \
+                and not filename.startswith(VERSION_PREFIX):
+            values['filename'] = f"{VERSION_PREFIX}{static_version()}/{filename}"
+
+
+def send_static_file(filename):
+    """Static view: strips the version prefix and prefers a precompressed sibling."""
+    immutable = False
+    if filename.startswith(VERSION_PREFIX):
+        version, _, filename = filename[len(VERSION_PREFIX):].partition('/')
+        immutable = version == static_version()  # an old version still gets current content, just not cached
+
+    source_path = safe_join(current_app.static_folder, filename)
+    if source_path is None:
+        abort(404)
+    served_name, encoding = filename, None
+    accepted = [enc for enc, _ in PRECOMPRESSED_SUFFIXES if request.accept_encodings[enc]]
+    if os.path.isfile(source_path) and accepted:
+        for enc, suffix in PRECOMPRESSED_SUFFIXES:
+            sibling = source_path + suffix
+            if enc in accepted and os.path.isfile(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(source_path):
+                served_name, encoding = filename + suffix, enc
+                break
+
+    max_age = current_app.config['STATIC_IMMUTABLE_MAX_AGE'] if immutable else current_app.get_send_file_max_age(filename)
+    response = send_from_directory(current_app.static_folder, served_name, max_age=max_age,
+                                   mimetype=mimetypes.guess_type(filename)[0] if encoding else None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if any(os.path.isfile(source_path + suffix) for _, suffix in PRECOMPRESSED_SUFFIXES):
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
+
+
+def compress_static_files(folder, min_size):
+    """Writes .gz/.br siblings for compressible static files; returns the number of files written."""
+    written = 0
+    for path in _static_source_files(folder):
+        mimetype = mimetypes.guess_type(path)[0] or ''
+        if not (mimetype.startswith('text/') or mimetype in ('application/javascript', 'application/json', 'image/svg+xml')):
+            continue
+        if os.path.getsize(path) < min_size:
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        outputs = [('.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            outputs.append(('.br', lambda: brotli.compress(data, quality=11)))
+        for suffix, encode in outputs:
+            target = path + suffix
+            if os.path.isfile(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                continue
+            with open(target, 'wb') as f:
+                f.write(encode())
+            written += 1
+    return written
+
+
+@click.command('compress-static')
+@with_appcontext
+def compress_static_command():
+    """Precompress static assets (.gz, plus .br when brotli is installed)."""
+    written = compress_static_files(current_app.static_folder, current_app.config['COMPRESS_MIN_SIZE'])
+    click.echo(f"Wrote {written} precompressed file(s); static version {static_version()}.")
+    if brotli is None:
+        click.echo("brotli is not installed; only .gz files were written.")
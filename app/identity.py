@@ -0,0 +1,140 @@
+import threading
+import time
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db, login
+from app.models import User, Message
+
+# Process-local cache of the logged-in user's core columns, so loading current_user does
+# not query the database on every request. Entries expire after IDENTITY_CACHE_TTL seconds
+# and are dropped when a change to the user row commits: edits through the ORM (profile
+# edits, password changes), a message counted for them, or mark_messages_read(). Other
+# workers may serve the old values until the TTL runs out.
+IDENTITY_COLUMNS = ('id', 'username', 'email', 'about_me', 'last_active',
+                    'last_message_read_time', 'unread_message_count')
+
+_identity_cache = {}
+_cache_lock = threading.Lock()
+
+
+class Identity(UserMixin):
+    """The current user as plain column values; anything else loads the ORM User on first use.
+
+    Reading the cached columns, avatar() and new_messages() need no query. Relationships and
+    other User methods (friends, groups, is_friend, ...) are looked up on the ORM User, which
+    is fetched once per request. Assigning a column writes it to the ORM User as well, so it
+    is saved by the next commit.
+    """
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+        self.__dict__['_user'] = None
+
+    @property
+    def user(self):
+        if self._user is None:
+            self.__dict__['_user'] = db.session.get(User, self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __setattr__(self, name, value):
+        if name in IDENTITY_COLUMNS:
+            setattr(self.user, name, value)
+        self.__dict__[name] = value
+
+    def __repr__(self):
+        return f"<Identity {self.username}>"
+
+    avatar = User.avatar
+    new_messages = User.new_messages
+
+    def mark_messages_read(self):
+        if not self.unread_message_count:
+            return False  # nothing to reset, and no need to load the User
+        marked = self.user.mark_messages_read()
+        if marked:
+            identity_changed(object_session(self.user), self.id)
+            self.__dict__['unread_message_count'] = 0
+        return marked
+
+
+def load_identity(user_id):
+    """Returns an Identity for user_id from the cache or one query, or None if there is no such user."""
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _identity_cache.get(user_id)
+    if cached and cached[0] > now:
+        return Identity(cached[1])
+
+    row = db.session.execute(
+        db.select(*(getattr(User, column) for column in IDENTITY_COLUMNS)).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    values = row._asdict()
+    ttl = current_app.config['IDENTITY_CACHE_TTL']
+    if ttl:
+        with _cache_lock:
+            _identity_cache[user_id] = (now + ttl, values)
+    return Identity(values)
+
+
+def set_loaded_value(user, name, value):
+    """Records a column value that was just written with a bulk UPDATE, without marking it dirty."""
+    if isinstance(user, Identity):
+        user.__dict__[name] = value
+        user = user._user
+    if user is not None:
+        set_committed_value(user, name, value)
+
+
+def invalidate_identity(*user_ids):
+    """Drops cached identities; call after writes to the user table that bypass the ORM."""
+    with _cache_lock:
+        for user_id in user_ids:
+            _identity_cache.pop(user_id, None)
+
+
+@login.user_loader
+def load_user(id):
+    return load_identity(int(id))
+
+
+def identity_changed(session, *user_ids):
+    """Invalidates the users' identities once the session commits.
+
+    Not at flush: a request loading the user before the commit would cache the old values
+    again, and this session's reload would cache values a rollback may still undo.
+    """
+    session.info.setdefault('identity_changed', set()).update(user_ids)
+
+
+@event.listens_for(User, 'after_insert')  # ids can be reused once a database is recreated
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    identity_changed(object_session(target), target.id)
+
+
+@event.listens_for(Message, 'after_insert')
+def _message_counted(mapper, connection, target):
+    identity_changed(object_session(target), target.recipient_id)  # unread_message_count went up
+
+
+@event.listens_for(db.session, 'after_commit')
+def _identity_committed(session):
+    user_ids = session.info.pop('identity_changed', None)
+    if user_ids:
+        invalidate_identity(*user_ids)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _identity_rolled_back(session, previous_transaction):
+    session.info.pop('identity_changed', None)
@@ -0,0 +1,143 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from sqlalchemy import func
+from flask import current_app
+from app import db
+from app.models import Node, Event
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python solver gives the same layout, just slower
+    np = None
+
+# Server-side packed-circle layout for a group's nodes. Each node is a circle whose
+# area grows with its event count; circles start on a deterministic golden-angle
+# spiral (busiest nodes in the middle) and are relaxed until they no longer overlap.
+# Results are cached per group keyed by the node version, a digest of the group's
+# node ids and per-node event counts, so any added/removed node or event recomputes.
+
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+_layout_cache = OrderedDict()  # (group_id, version) -> layout dict, least recently used first
+_cache_lock = threading.Lock()
+
+
+def node_weights(group_id):
+    """Returns [(node_id, event_count)] for a group's nodes in id order, in one grouped query."""
+    return [tuple(row) for row in db.session.execute(
+        db.select(Node.id, func.count(Event.id))
+        .outerjoin(Event, Event.node_id == Node.id)
+        .where(Node.group_id == group_id)
+        .group_by(Node.id)
+        .order_by(Node.id)
+    )]
+
+
+def node_version(weights):
+    return hashlib.sha1(repr(weights).encode('utf-8')).hexdigest()[:16]
+
+
+def group_layout(group_id):
+    """Returns the cached layout for a group, computing it if the node version changed."""
+    weights = node_weights(group_id)
+    version = node_version(weights)
+    key = (group_id, version)
+    with _cache_lock:
+        if key in _layout_cache:
+            _layout_cache.move_to_end(key)
+            return _layout_cache[key]
+
+    layout = {"group_id": group_id, "version": version,
+              "engine": "numpy" if np is not None else "python",
+              "nodes": compute_layout(weights)}
+    with _cache_lock:
+        _layout_cache[key] = layout
+        while len(_layout_cache) > current_app.config['LAYOUT_CACHE_SIZE']:
+            _layout_cache.popitem(last=False)
+    return layout
+
+
+def compute_layout(weights):
+    """Packs one circle per (node_id, event_count) and returns [{id, x, y, radius}] in canvas pixels."""
+    if not weights:
+        return []
+    base_radius = current_app.config['LAYOUT_NODE_RADIUS']
+    padding = current_app.config['LAYOUT_PADDING']
+    iterations = current_app.config['LAYOUT_ITERATIONS']
+
+    # Busiest nodes first so they settle in the middle of the spiral
+    ordered = sorted(weights, key=lambda item: (-item[1], item[0]))
+    radii = [base_radius * math.sqrt(1 + count) for _, count in ordered]
+    step = 2 * base_radius + padding
+    start = [(step * math.sqrt(i) * math.cos(i * GOLDEN_ANGLE), step * math.sqrt(i) * math.sin(i * GOLDEN_ANGLE))
+             for i in range(len(ordered))]
+
+    relax = _relax_numpy if np is not None else _relax_python
+    positions = relax(start, radii, padding, iterations)
+
+    # Shift into positive canvas coordinates with the top-left circle touching the margin
+    min_x = min(x - r for (x, _), r in zip(positions, radii))
+    min_y = min(y - r for (_, y), r in zip(positions, radii))
+    return sorted(({"id": node_id, "x": round(x - min_x + padding, 1), "y": round(y - min_y + padding, 1),
+                    "radius": round(r, 1)}
+                   for (node_id, _), (x, y), r in zip(ordered, positions, radii)), key=lambda node: node["id"])
+
+
+def _apart(i, j):
+    """Unit vector along which circle i moves away from circle j (i < j) when both sit on one spot."""
+    angle = GOLDEN_ANGLE * (j * (j - 1) // 2 + i)  # distinct per pair
+    return math.cos(angle), math.sin(angle)
+
+
+def _relax_numpy(start, radii, padding, iterations):
+    pos = np.array(start, dtype=float)
+    r = np.array(radii, dtype=float)
+    min_dist = r[:, None] + r[None, :] + padding
+    np.fill_diagonal(min_dist, 0.0)
+    # _apart() for every pair, pointing away from the other circle in both rows
+    index = np.arange(len(pos))
+    low, high = np.minimum.outer(index, index), np.maximum.outer(index, index)
+    angle = GOLDEN_ANGLE * (high * (high - 1) // 2 + low)
+    apart = np.stack([np.cos(angle), np.sin(angle)], axis=2) * np.sign(index[None, :] - index[:, None])[:, :, None]
+    for _ in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        dist = np.sqrt((delta ** 2).sum(axis=2))
+        np.fill_diagonal(dist, 1.0)
+        overlap = np.clip(min_dist - dist, 0.0, None)
+        if not overlap.any():
+            break
+        direction = np.where((dist == 0)[:, :, None], apart, delta / np.maximum(dist, 1e-9)[:, :, None])
+        push = direction * (overlap / 2)[:, :, None]
+        pos += push.sum(axis=1)
+        pos -= pos.mean(axis=0) * 0.01  # gentle pull back towards the centre
+    return [tuple(p) for p in pos.tolist()]
+
+
+def _relax_python(start, radii, padding, iterations):
+    pos = [list(p) for p in start]
+    n = len(pos)
+    for _ in range(iterations):
+        moves = [[0.0, 0.0] for _ in range(n)]
+        overlapping = False
+        for i in range(n):
+            for j in range(i + 1, n):
+                dx, dy = pos[i][0] - pos[j][0], pos[i][1] - pos[j][1]
+                dist = math.hypot(dx, dy)
+                overlap = radii[i] + radii[j] + padding - dist
+                if overlap > 0:
+                    overlapping = True
+                    if not dist:  # same spot: no direction to push along, so use a fixed one
+                        (dx, dy), dist = _apart(i, j), 1.0
+                    ux, uy = dx / dist * overlap / 2, dy / dist * overlap / 2
+                    moves[i][0] += ux; moves[i][1] += uy
+                    moves[j][0] -= ux; moves[j][1] -= uy
+        if not overlapping:
+            break
+        for p, move in zip(pos, moves):
+            p[0] += move[0]; p[1] += move[1]
+        mean_x, mean_y = sum(p[0] for p in pos) / n, sum(p[1] for p in pos) / n
+        for p in pos:
+            p[0] -= mean_x * 0.01; p[1] -= mean_y * 0.01
+    return [tuple(p) for p in pos]
@@ -0,0 +1,126 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from flask import current_app, g, has_app_context
+from app import db
+from app.models import GroupMember, User
+
+# Per-user cache of the ids of the groups a user belongs to, behind the home feed and every
+# membership check (is_group_member, require_group_member, User.is_member). Each request
+# keeps the sets it has loaded on `g`, so repeated checks in one request cost one query per
+# user. Membership checks are authorization checks, so by default nothing outlives the
+# request; with MEMBERSHIP_CACHE_SCOPE = 'process' the sets are also kept per worker for
+# GROUP_IDS_CACHE_TTL seconds.
+#
+# Process entries are versioned: GroupMember writes bump the user's version when they are
+# flushed and again when they are committed, and an entry is only used while its version is
+# current. A reader that loaded the old rows just before a concurrent commit therefore never
+# leaves a stale set behind. Other workers can serve a stale set for up to the TTL.
+_group_ids_cache = {}
+_versions = {}
+_cache_lock = threading.Lock()
+
+
+def user_group_ids(user_id):
+    """Returns a frozenset of the ids of every group user_id is a member of."""
+    request_cache = g.setdefault('group_ids', {}) if has_app_context() else {}
+    if user_id in request_cache:
+        return request_cache[user_id]
+
+    process_scope = current_app.config['MEMBERSHIP_CACHE_SCOPE'] == 'process'
+    now = time.monotonic()
+    with _cache_lock:
+        version = _versions.get(user_id, 0)
+        cached = _group_ids_cache.get(user_id)
+    if process_scope and cached and cached[0] > now and cached[1] == version:
+        group_ids = cached[2]
+    else:
+        group_ids = frozenset(db.session.scalars(
+            db.select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        ).all())
+        if process_scope:
+            with _cache_lock:
+                _group_ids_cache[user_id] = (now + current_app.config['GROUP_IDS_CACHE_TTL'], version, group_ids)
+    request_cache[user_id] = group_ids
+    return group_ids
+
+
+def prefetch_user_groups(user_ids):
+    """Loads the group-id sets of several users into the request cache with one query."""
+    request_cache = g.setdefault('group_ids', {})
+    missing = set(user_ids) - request_cache.keys()
+    if not missing:
+        return
+    group_ids = {user_id: set() for user_id in missing}
+    for user_id, group_id in db.session.execute(
+        db.select(GroupMember.user_id, GroupMember.group_id).where(GroupMember.user_id.in_(missing))
+    ):
+        group_ids[user_id].add(group_id)
+    request_cache.update((user_id, frozenset(ids)) for user_id, ids in group_ids.items())
+
+
+def invalidate_user_groups(*user_ids):
+    """Drops cached group ids for the given users; call after membership writes that bypass the ORM."""
+    with _cache_lock:
+        for user_id in user_ids:
+            _versions[user_id] = _versions.get(user_id, 0) + 1
+            _group_ids_cache.pop(user_id, None)
+    if has_app_context():
+        request_cache = g.get('group_ids', {})
+        for user_id in user_ids:
+            request_cache.pop(user_id, None)
+
+
+def membership_changed(session, *user_ids):
+    """Invalidates now, for the rest of this request, and again once the session commits."""
+    invalidate_user_groups(*user_ids)
+    session.info.setdefault('membership_changed', set()).update(user_ids)
+
+
+def existing_member_ids(group_id, user_ids):
+    """Returns the subset of user_ids that are already members of group_id, in one query."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return set()
+    return set(db.session.scalars(
+        db.select(GroupMember.user_id).where(GroupMember.group_id == group_id, GroupMember.user_id.in_(user_ids))
+    ).all())
+
+
+def add_group_members(group_id, user_ids, exclude=()):
+    """Adds every existing, not-yet-member user in user_ids to group_id as a regular member.
+
+    Runs one IN query to drop unknown user ids, one to diff against current members and a
+    single executemany INSERT. Does not commit. Returns the sorted list of user ids added.
+    """
+    candidate_ids = set(user_ids) - set(exclude)
+    if not candidate_ids:
+        return []
+    valid_ids = set(db.session.scalars(db.select(User.id).where(User.id.in_(candidate_ids))).all())
+    new_ids = sorted(valid_ids - existing_member_ids(group_id, valid_ids))
+    if new_ids:
+        # Bulk inserts skip mapper events, so the cache is invalidated explicitly.
+        db.session.bulk_insert_mappings(GroupMember, [
+            {"group_id": group_id, "user_id": user_id, "is_owner": False} for user_id in new_ids
+        ])
+        membership_changed(db.session(), *new_ids)
+    return new_ids
+
+
+@event.listens_for(GroupMember, 'after_insert')
+@event.listens_for(GroupMember, 'after_delete')
+def _membership_changed(mapper, connection, target):
+    membership_changed(object_session(target), target.user_id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _membership_committed(session):
+    user_ids = session.info.pop('membership_changed', None)
+    if user_ids:
+        invalidate_user_groups(*user_ids)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _membership_rolled_back(session, previous_transaction):
+    session.info.pop('membership_changed', None)
@@ -1,16 +1,28 @@
 # --- START OF FILE app/models.py ---
 
-from app import db, login
+from app import db
+from config import Config
 from werkzeug.security import generate_password_hash, check_password_hash
+from app.passwords import hash_method
+from app.avatars import identicon_url
 from flask_login import UserMixin, current_user
-from hashlib import md5
 from datetime import datetime, timezone
 from sqlalchemy.types import JSON
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Float, text, Text # Added Text type
+from sqlalchemy.orm import Mapped, mapped_column, relationship, selectinload, joinedload
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Float, text, Text, event, update, func, or_, literal_column, inspect as sa_inspect # Added Text type
 from typing import Annotated, Optional, List
 from flask import url_for # +++ IMPORT url_for
 
+# Bind key of the high-churn Message table: 'activity' when ACTIVITY_DATABASE_URL gives it a
+# database of its own, otherwise None (app.db). Across databases there are no foreign keys
+# and no SQL joins, so relationships name their join columns and loaders use a second query.
+MESSAGE_BIND = 'activity' if Config.ACTIVITY_DATABASE_URL else None
+
+
+def user_fk(bind_key):
+    """ForeignKey to user.id for a model on bind_key, or nothing when user lives on another database."""
+    return (ForeignKey("user.id"),) if bind_key is None else ()
+
 friends = db.Table(
     'friends',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
@@ -38,9 +50,12 @@ class User(UserMixin, db.Model):
     rsvps: Mapped[list["EventRSVP"]] = relationship("EventRSVP", back_populates="user")
     posts: Mapped[list["Post"]] = relationship("Post", back_populates="author", lazy="dynamic")
 
-    messages_sent: Mapped[List["Message"]] = relationship("Message", foreign_keys="[Message.sender_id]", back_populates="sender")
-    messages_received: Mapped[List["Message"]] = relationship("Message", foreign_keys="[Message.recipient_id]", back_populates="recipient")
+    messages_sent: Mapped[List["Message"]] = relationship("Message", primaryjoin="User.id == foreign(Message.sender_id)", back_populates="sender")
+    messages_received: Mapped[List["Message"]] = relationship("Message", primaryjoin="User.id == foreign(Message.recipient_id)", back_populates="recipient")
     last_message_read_time: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    # Denormalized count of messages received since last_message_read_time, kept in SQL by
+    # Message inserts (see _count_unread_message) and reset by mark_messages_read()
+    unread_message_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0', nullable=False)
 
     insight_panels: Mapped[list["InsightPanel"]] = relationship("InsightPanel", back_populates="user", lazy="dynamic")
 
@@ -58,12 +73,10 @@ class User(UserMixin, db.Model):
         return f"<User {self.username}>"
 
     def avatar(self, size):
-        digest = md5(self.email.lower().encode('utf-8')).hexdigest()
-        return 'https://www.gravatar.com/avatar/{}?d=identicon&s={}'.format(
-            digest, size)
+        return identicon_url(self.email.lower(), size)
 
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        self.password_hash = generate_password_hash(password, method=hash_method())
 
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
@@ -86,9 +99,40 @@ class User(UserMixin, db.Model):
         ).order_by(Post.timestamp.desc())
 
     def new_messages(self):
-        last_read_time = self.last_message_read_time or datetime(1900, 1, 1)
-        return Message.query.filter_by(recipient=self).filter(
-        Message.timestamp > last_read_time).count()
+        return self.unread_message_count or 0
+
+    def mark_messages_read(self):
+        """Marks every message received so far as read.
+
+        A message is unread while its timestamp is after last_message_read_time; the counter and
+        the per-conversation counts of conversations_query() both follow that rule. Returns False
+        without writing when there was nothing unread, or when another request marked the
+        messages read first.
+        """
+        if not self.unread_message_count:
+            return False
+        read_before, read_at = self.last_message_read_time, datetime.now(timezone.utc)
+        # Subtract only the messages up to the new read time: one timestamped after it (sent
+        # while this runs) stays counted, and conversations_query() still shows it as unread.
+        now_read = db.select(func.count(Message.id)).where(
+            Message.recipient_id == self.id, Message.timestamp <= read_at,
+            *([] if read_before is None else [Message.timestamp > read_before]))
+        session = sa_inspect(self).session or db.session
+        if MESSAGE_BIND is None:
+            now_read = now_read.scalar_subquery()  # counted within the UPDATE itself
+        else:
+            now_read = session.scalar(now_read)  # messages are in another database
+        # Matching the loaded last_message_read_time keeps two concurrent resets from both
+        # subtracting the same messages.
+        result = session.execute(
+            update(User).where(User.id == self.id,
+                               User.last_message_read_time.is_(None) if read_before is None
+                               else User.last_message_read_time == read_before)
+            .values(unread_message_count=User.unread_message_count - now_read, last_message_read_time=read_at)
+            .execution_options(synchronize_session=False)
+        )
+        session.expire(self, ['unread_message_count', 'last_message_read_time'])
+        return result.rowcount == 1
 
     def search_users_by_username(search_term):
     # Case insensitive search for usernames that match the search_term
@@ -120,9 +164,9 @@ class User(UserMixin, db.Model):
         return user in self.friends.all()
     
     def is_member(self, group_id):
-        """Check if user is a member of the specified group"""
-        return db.session.scalar(db.select(GroupMember).filter_by(
-            user_id=self.id, group_id=group_id)) is not None
+        """Check if user is a member of the specified group (cached, see app/membership.py)"""
+        from app.membership import user_group_ids
+        return group_id in user_group_ids(self.id)
     
     
 
@@ -131,7 +175,7 @@ class Post(db.Model):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     body: Mapped[str] = mapped_column(String(140))
-    timestamp: Mapped[datetime] = mapped_column(DateTime, index=True, default=datetime.now(timezone.utc))
+    timestamp: Mapped[datetime] = mapped_column(DateTime, index=True, default=lambda: datetime.now(timezone.utc))
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('user.id'))
     group_id: Mapped[Optional[int]] = mapped_column(ForeignKey("groups.id"), nullable=True)
     group: Mapped[Optional["Group"]] = relationship(back_populates="posts")
@@ -140,13 +184,20 @@ class Post(db.Model):
     # Relationship to User
     author: Mapped["User"] = relationship("User", back_populates="posts")
 
+    # Back the (timestamp, id) keyset scans used by the group and user feeds
+    __table_args__ = (
+        db.Index('ix_post_group_timestamp_id', 'group_id', 'timestamp', 'id'),
+        db.Index('ix_post_user_timestamp_id', 'user_id', 'timestamp', 'id'),
+    )
+
+    @staticmethod
+    def author_loader():
+        """Joins in just the author columns _post.html needs (username, avatar) in the feed query."""
+        return joinedload(Post.author).load_only(User.id, User.username, User.email)
+
     def __repr__(self):
         return f"<Post {self.body}>"
 
-@login.user_loader
-def load_user(id: str) -> Optional[User]:
-    return db.session.get(User, int(id))
-
 class Group(db.Model):
     __tablename__ = "groups"
 
@@ -155,8 +206,11 @@ class Group(db.Model):
     avatar_url: Mapped[str] = mapped_column(String(255), nullable=True)
     about: Mapped[str] = mapped_column(String(255), nullable=True) # This is your description field
 
+    # Loading strategy comes from the GROUP_MEMBERS_LAZY environment variable (default "select",
+    # read at import like MESSAGE_BIND) so plain lookups don't drag in every membership row;
+    # use Group.members_loader() where members are rendered.
     members: Mapped[List["GroupMember"]] = relationship(
-        back_populates="group", cascade="all, delete-orphan", lazy="joined" # Added lazy="joined" for auto-load
+        back_populates="group", cascade="all, delete-orphan", lazy=Config.GROUP_MEMBERS_LAZY
     )
 
     posts: Mapped[List["Post"]] = relationship(
@@ -176,9 +230,14 @@ class Group(db.Model):
     allow_member_manage_members: Mapped[bool] = mapped_column(default=False, nullable=False)
     # --- END NEW PERMISSION FIELDS ---
 
+    @staticmethod
+    def members_loader():
+        """Loader option that fetches members and their users in one extra SELECT ... IN."""
+        return selectinload(Group.members).joinedload(GroupMember.user)
+
     @property
-    def avatar(self, size=128): # This property should likely just return self.avatar_url or default
-        return self.avatar_url if self.avatar_url else f'https://www.gravatar.com/avatar/{md5(str(self.id).lower().encode("utf-8")).hexdigest()}?d=identicon&s={size}'
+    def avatar(self):
+        return self.avatar_url or identicon_url(str(self.id), 128)
 
 
     def to_dict(self, include_nodes=True, include_members=False, current_user_id_param=None):
@@ -303,9 +362,12 @@ class Event(db.Model):
         }
 
         if current_user_id is not None:
-            my_rsvp = db.session.execute(
-                db.select(EventRSVP).filter_by(event_id=self.id, user_id=current_user_id)
-            ).scalar_one_or_none()
+            if 'attendees' not in sa_inspect(self).unloaded:  # already eager-loaded: no query per event
+                my_rsvp = next((rsvp for rsvp in self.attendees if rsvp.user_id == current_user_id), None)
+            else:
+                my_rsvp = db.session.execute(
+                    db.select(EventRSVP).filter_by(event_id=self.id, user_id=current_user_id)
+                ).scalar_one_or_none()
             if my_rsvp:
                 data['current_user_rsvp_status'] = my_rsvp.status
             if self.creator_id == current_user_id:
@@ -357,20 +419,52 @@ class InvitedGuest(db.Model):
 
 class Message(db.Model):
     __tablename__ = "message"
+    __bind_key__ = MESSAGE_BIND
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    sender_id: Mapped[int] = mapped_column(ForeignKey("user.id"),  nullable=False)
-    recipient_id: Mapped[int] = mapped_column(ForeignKey("user.id"),  nullable=False)
+    sender_id: Mapped[int] = mapped_column(*user_fk(MESSAGE_BIND),  nullable=False)
+    recipient_id: Mapped[int] = mapped_column(*user_fk(MESSAGE_BIND),  nullable=False)
     body: Mapped[str] = mapped_column(String(140),  nullable=False)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, index=True, default=datetime.now(timezone.utc))
+    timestamp: Mapped[datetime] = mapped_column(DateTime, index=True, default=lambda: datetime.now(timezone.utc))
 
-    sender: Mapped["User"] = relationship("User", foreign_keys=[sender_id], back_populates="messages_sent")
-    recipient: Mapped["User"] = relationship("User", foreign_keys=[recipient_id], back_populates="messages_received")
+    sender: Mapped["User"] = relationship("User", primaryjoin="User.id == foreign(Message.sender_id)", back_populates="messages_sent")
+    recipient: Mapped["User"] = relationship("User", primaryjoin="User.id == foreign(Message.recipient_id)", back_populates="messages_received")
+
+    # Backs the (timestamp, id) keyset scan of a user's inbox; the sender/recipient index serves
+    # the per-partner conversation query (sent side) and thread lookups
+    __table_args__ = (
+        db.Index('ix_message_recipient_timestamp_id', 'recipient_id', 'timestamp', 'id'),
+        db.Index('ix_message_sender_recipient_timestamp', 'sender_id', 'recipient_id', 'timestamp'),
+    )
+
+    @staticmethod
+    def sender_loader():
+        """Loads just the sender columns _message.html needs (username, avatar) with the inbox query.
+
+        Joined into the same statement, or one extra IN query when messages have their own database.
+        """
+        loader = joinedload if MESSAGE_BIND is None else selectinload
+        return loader(Message.sender).load_only(User.id, User.username, User.email)
 
     def __repr__(self):
         return f"<Message {self.body}>"
 
 
+@event.listens_for(Message, 'after_insert')
+def _count_unread_message(mapper, connection, target):
+    # Increment in SQL within the inserting transaction, so concurrent sends never overwrite each other.
+    # With a separate message database the user table is reached through the session's other connection.
+    if MESSAGE_BIND is not None:
+        connection = sa_inspect(target).session.connection(bind_arguments={"mapper": User.__mapper__})
+    # Only messages after the recipient's read time are unread, the rule mark_messages_read() uses.
+    users = User.__table__
+    connection.execute(
+        update(users).where(users.c.id == target.recipient_id,
+                            or_(users.c.last_message_read_time.is_(None), users.c.last_message_read_time < target.timestamp))
+        .values(unread_message_count=users.c.unread_message_count + 1)
+    )
+
+
 # --- NEW: InsightPanel Model ---
 class InsightPanel(db.Model):
     __tablename__ = "insight_panel"
@@ -385,6 +479,8 @@ class InsightPanel(db.Model):
     # For SQLite, Text is safer unless you configure JSON support explicitly.
     configuration: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True) # Example: {"time_period": "last_month"}
     # configuration: Mapped[Optional[str]] = mapped_column(Text, nullable=True) # Alternative using Text
+    # Bumped by every UPDATE, including bulk ones; feeds the ETag of the panel listing
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default='1', onupdate=literal_column('version + 1'))
 
     # Relationship back to User
     user: Mapped["User"] = relationship("User", back_populates="insight_panels")
@@ -419,6 +515,7 @@ class SharedInsightPanel(db.Model):
     # when the panel was shared in 'fixed' mode.
     # For 'dynamic' mode, this might store the initial group_id context from the sharer.
     shared_config: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default='1', onupdate=literal_column('version + 1'))
 
     original_panel: Mapped["InsightPanel"] = relationship("InsightPanel", back_populates="shares_received")
     sharer: Mapped["User"] = relationship("User", foreign_keys=[sharer_id], backref="panels_shared_by_me")
@@ -0,0 +1,95 @@
+import json
+import queue
+import threading
+from werkzeug.utils import import_string
+from flask import current_app
+from app import db
+from app.models import GroupMember
+
+# Live change notifications pushed to users over Server-Sent Events.
+# Handlers call notify()/notify_group() after committing; every open /api/me/stream
+# connection of the affected users receives a compact {"type": ..., ...} payload.
+# The default broker only reaches subscribers in this process. Multi-worker setups
+# point NOTIFICATION_BROKER at a class with the same publish/subscribe/unsubscribe
+# interface that fans out through a shared service.
+
+
+class InProcessBroker:
+    """Thread-safe fan-out of payloads to per-connection bounded queues."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}  # user_id -> set of queues
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            user_queues = self._subscribers.get(user_id)
+            if user_queues:
+                user_queues.discard(subscription)
+                if not user_queues:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_ids, payload):
+        with self._lock:
+            targets = [q for user_id in set(user_ids) for q in self._subscribers.get(user_id, ())]
+        for subscription in targets:
+            try:
+                subscription.put_nowait(payload)
+            except queue.Full:
+                pass  # slow client: drop rather than block the publishing request
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(user_queues) for user_queues in self._subscribers.values())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(current_app.config['NOTIFICATION_BROKER'])
+                _broker = broker_class(queue_size=current_app.config['NOTIFICATION_QUEUE_SIZE'])
+    return _broker
+
+
+def notify(user_ids, kind, **data):
+    """Publishes a change notification to the given users; call after the change is committed."""
+    if user_ids:
+        get_broker().publish(user_ids, {"type": kind, **data})
+
+
+def notify_group(group_id, kind, **data):
+    """Publishes a notification to every member of a group."""
+    member_ids = db.session.scalars(
+        db.select(GroupMember.user_id).where(GroupMember.group_id == group_id)
+    ).all()
+    notify(member_ids, kind, group_id=group_id, **data)
+
+
+def event_stream(user_id, heartbeat_seconds):
+    """Yields SSE frames for one connection until the client disconnects."""
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                payload = subscription.get(timeout=heartbeat_seconds)
+            except queue.Empty:
+                yield ": keep-alive\n\n"  # comment frame keeps proxies from closing idle streams
+                continue
+            yield f"event: {payload['type']}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+    finally:
+        broker.unsubscribe(user_id, subscription)
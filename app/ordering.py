@@ -0,0 +1,56 @@
+from sqlalchemy import case
+from app import db
+
+# Bulk per-row updates issued as a single UPDATE with CASE expressions keyed on the
+# primary key, for orderable or positioned rows (insight panels, canvas nodes, ...).
+
+
+def bulk_update(model, changes, *criteria, returning=False):
+    """Applies per-row column values in one UPDATE ... SET col = CASE id WHEN ... END statement.
+
+    `changes` maps a primary key to a {column_name: value} dict; only rows whose id is in
+    `changes` and that match `criteria` are touched. Returns the updated entities when
+    returning=True, otherwise the number of rows matched. Does not commit.
+    """
+    if not changes:
+        return [] if returning else 0
+    stmt = _case_update(model, changes).where(model.id.in_(list(changes)), *criteria)
+    return _execute(model, stmt, returning)
+
+
+def reorder(model, ordered_ids, *criteria, column='display_order'):
+    """Sets `column` to each id's position in ordered_ids for every row matching criteria.
+
+    Rows in scope but missing from ordered_ids keep their value. Returns all rows in scope
+    sorted by the new order, read back with UPDATE ... RETURNING where the database supports
+    it so no follow-up SELECT is needed. Does not commit.
+    """
+    positions = {}
+    for row_id in ordered_ids:
+        positions.setdefault(row_id, len(positions))  # first occurrence wins
+    if not positions:
+        return db.session.scalars(db.select(model).where(*criteria).order_by(getattr(model, column))).all()
+    stmt = _case_update(model, {row_id: {column: index} for row_id, index in positions.items()}).where(*criteria)
+    rows = _execute(model, stmt, returning=True)
+    return sorted(rows, key=lambda row: (getattr(row, column), row.id))
+
+
+def _case_update(model, changes):
+    values = {}
+    for name in {name for row_values in changes.values() for name in row_values}:
+        whens = {row_id: row_values[name] for row_id, row_values in changes.items() if name in row_values}
+        values[name] = case(whens, value=model.id, else_=getattr(model, name))
+    return db.update(model).values(values)
+
+
+def _execute(model, stmt, returning):
+    if not returning:
+        return db.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+    if db.engine.dialect.update_returning:
+        return db.session.scalars(stmt.returning(model), execution_options={"populate_existing": True}).all()
+    # No RETURNING support: fall back to reading the rows back
+    db.session.execute(stmt, execution_options={"synchronize_session": False})
+    read_back = db.select(model).execution_options(populate_existing=True)
+    if stmt.whereclause is not None:
+        read_back = read_back.where(stmt.whereclause)
+    return db.session.scalars(read_back).all()
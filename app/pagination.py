@@ -0,0 +1,92 @@
+import base64
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import tuple_, func
+from app import db
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Encodes a (timestamp, id) position as an opaque URL-safe token."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]):
+    """Returns (timestamp, id) for a cursor token, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        timestamp_str, row_id_str = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp_str), int(row_id_str)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """One page of a newest-first keyset listing. total is only set when a count was requested."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.next_cursor = next_cursor  # older rows
+        self.prev_cursor = prev_cursor  # newer rows
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def keyset_paginate(query, timestamp_col, id_col, per_page, after=None, before=None, with_total=False, scalars=True):
+    """Paginates `query` newest-first over (timestamp_col, id_col) without OFFSET or COUNT.
+
+    `after` continues towards older rows, `before` goes back towards newer rows. Both are cursor
+    tokens from encode_cursor(); an invalid cursor falls back to the first page. The query must
+    not carry its own ORDER BY or LIMIT. A COUNT(*) is only issued when with_total is True.
+    Pass scalars=False to page over plain rows (e.g. columns of a subquery) instead of entities.
+    """
+    key = tuple_(timestamp_col, id_col)
+    after_pos = decode_cursor(after)
+    before_pos = decode_cursor(before) if after_pos is None else None
+
+    total = None
+    if with_total:
+        total = db.session.scalar(db.select(func.count()).select_from(query.order_by(None).subquery()))
+
+    if before_pos is not None:
+        page_query = query.where(key > tuple_(*before_pos))\
+            .order_by(timestamp_col.asc(), id_col.asc()).limit(per_page + 1)
+        rows = _fetch(page_query, scalars)
+        more_newer = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        more_older = True
+    else:
+        page_query = query
+        if after_pos is not None:
+            page_query = page_query.where(key < tuple_(*after_pos))
+        page_query = page_query.order_by(timestamp_col.desc(), id_col.desc()).limit(per_page + 1)
+        rows = _fetch(page_query, scalars)
+        more_older = len(rows) > per_page
+        items = rows[:per_page]
+        more_newer = after_pos is not None
+
+    next_cursor = prev_cursor = None
+    if items:
+        if more_older:
+            next_cursor = encode_cursor(*_position(items[-1], timestamp_col, id_col))
+        if more_newer:
+            prev_cursor = encode_cursor(*_position(items[0], timestamp_col, id_col))
+    return KeysetPage(items, next_cursor=next_cursor, prev_cursor=prev_cursor, total=total)
+
+
+def _fetch(page_query, scalars):
+    result = db.session.scalars(page_query) if scalars else db.session.execute(page_query)
+    return result.unique().all()
+
+
+def _position(item, timestamp_col, id_col):
+    return getattr(item, timestamp_col.key), getattr(item, id_col.key)
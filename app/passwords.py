@@ -0,0 +1,141 @@
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import current_app, has_app_context, request, jsonify, abort
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from config import Config
+
+# Password hashing policy and pool (PASSWORD_HASH_* in config.py). PASSWORD_HASH_METHOD is a
+# Werkzeug method string with its cost, e.g. 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'.
+# Hashes made under another method are replaced on the next successful login.
+#
+# Hashing is CPU-bound, so a burst of logins would otherwise occupy every request thread.
+# Hashes are computed on a small executor instead (hashlib releases the GIL while it works):
+# at most PASSWORD_HASH_WORKERS run at once, at most PASSWORD_HASH_QUEUE_SIZE wait or run,
+# and requests beyond that are turned away with a 503 instead of queueing without bound.
+# Each worker's queue depth and wait times are served at /metrics/password-hashing to
+# requests bearing METRICS_TOKEN.
+
+
+class HashingPoolBusy(Exception):
+    """Too many password hashes are waiting, or one did not finish within PASSWORD_HASH_TIMEOUT."""
+
+
+class HashingPool:
+    def __init__(self, workers=2, max_pending=32):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.max_pending = max_pending
+        self.depth = 0  # hashes waiting or running
+        self.max_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds = 0.0  # total time hashes spent queued before a worker picked them up
+
+    def run(self, fn, *args, timeout=None):
+        """Runs fn(*args) on the pool and returns its result."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolBusy("Too many password hashes in progress")
+        with self._lock:
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+        future = self._executor.submit(self._timed, time.perf_counter(), fn, *args)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise HashingPoolBusy("Timed out waiting for a password hash") from None
+
+    def _timed(self, queued_at, fn, *args):
+        waited = time.perf_counter() - queued_at
+        with self._lock:
+            self.wait_seconds += waited
+        try:
+            return fn(*args)
+        finally:
+            # The slot is freed when the hash ends, not when a timed-out caller stops waiting
+            with self._lock:
+                self.depth -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def metrics(self):
+        with self._lock:
+            return {"workers": self.workers, "depth": self.depth, "max_depth": self.max_depth, "max_pending": self.max_pending,
+                    "completed": self.completed, "rejected": self.rejected, "timed_out": self.timed_out,
+                    "avg_wait_ms": round(1000 * self.wait_seconds / self.completed, 2) if self.completed else 0.0}
+
+
+def init_app(app):
+    if app.config['PASSWORD_HASH_WORKERS']:
+        app.extensions['hashing_pool'] = HashingPool(app.config['PASSWORD_HASH_WORKERS'],
+                                                     app.config['PASSWORD_HASH_QUEUE_SIZE'])
+    app.register_error_handler(HashingPoolBusy, hashing_pool_busy)
+    # Registered on the app rather than a blueprint: every worker profile hashes passwords
+    app.add_url_rule('/metrics/password-hashing', 'password_hashing_metrics', hashing_pool_metrics)
+
+
+def hashing_pool_metrics():
+    """This worker's pool metrics, for requests with 'Authorization: Bearer <METRICS_TOKEN>'."""
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(403)
+    pool = get_hashing_pool()
+    return jsonify({"pid": os.getpid(), **(pool.metrics() if pool else {"workers": 0})})
+
+
+def hashing_pool_busy(error):
+    current_app.logger.warning("Password hashing pool full: %s", get_hashing_pool().metrics())
+    return "Too many sign-ins at once, please try again in a moment.", 503, {'Retry-After': '1'}
+
+
+def get_hashing_pool():
+    return current_app.extensions.get('hashing_pool')
+
+
+def _run(fn, *args):
+    pool = get_hashing_pool() if has_app_context() else None
+    if pool is None:
+        return fn(*args)
+    return pool.run(fn, *args, timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+
+
+def hash_method():
+    return current_app.config['PASSWORD_HASH_METHOD'] if has_app_context() else Config.PASSWORD_HASH_METHOD
+
+
+def canonical_method(method):
+    """The method string Werkzeug stores in front of a hash made with `method`, defaults filled in."""
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    if name == 'scrypt':
+        n, r, p = args or (2**15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    return method
+
+
+def needs_rehash(password_hash):
+    return password_hash.split('$', 1)[0] != canonical_method(hash_method())
+
+
+def hash_password(password):
+    """Hashes password under the current policy, on the hashing pool when there is one."""
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(password_hash, password):
+    """Checks password against password_hash on the hashing pool when there is one."""
+    return _run(check_password_hash, password_hash, password)
@@ -0,0 +1,135 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+# Read-replica routing (REPLICA_DATABASE_URL / REPLICA_SNAPSHOT in config.py). GET and HEAD
+# requests read from the replica; writes, flushes and every other request use the
+# primary. Once a request writes, the rest of it reads from the primary too, and so do the
+# same client's requests for the next REPLICA_STICKY_SECONDS, so a redirect after a POST
+# shows what was just saved even if the replica lags behind.
+#
+# This module is imported before `db` exists (db is built with RoutingSession), so it only
+# reaches the engines through the session or current_app. Only the default bind is routed.
+
+SAFE_METHODS = {'GET', 'HEAD'}
+# GET endpoints that write and then read their own changes
+PRIMARY_ENDPOINTS = {'messages.messages'}
+
+
+class RoutingSession(Session):
+    """Session that sends reads from the default bind to the replica while the request allows it."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is None and not self._flushing and getattr(clause, 'is_select', False) and reads_from_replica():
+            if engine is self._db.engines[None]:
+                return current_app.extensions['replica_engine']
+        return engine
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    stick_to_primary()
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _executed(orm_execute_state):
+    # Bulk UPDATE/DELETE statements; a write nothing reads back (last_active) can opt out
+    # with the execution option stick_to_primary=False
+    if not orm_execute_state.is_select and orm_execute_state.execution_options.get('stick_to_primary', True):
+        stick_to_primary()
+
+
+def reads_from_replica():
+    return has_request_context() and g.get('read_replica', False)
+
+
+def stick_to_primary():
+    """Sends the rest of this request, and the client's next few requests, to the primary."""
+    if has_request_context():
+        g.read_replica = False
+        g.wrote_primary = True
+
+
+def route_request():
+    snapshot = current_app.extensions.get('replica_snapshot')
+    if snapshot is not None:
+        snapshot.ensure_started()
+    g.read_replica = (request.method in SAFE_METHODS and request.endpoint not in PRIMARY_ENDPOINTS
+                      and session.get('primary_until', 0) < time.time())
+
+
+def remember_write(response):
+    if g.get('wrote_primary') or (request.method not in SAFE_METHODS and response.status_code < 400):
+        session['primary_until'] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+
+class ReplicaSnapshot:
+    """Local stand-in for a replica: a copy of the SQLite primary, refreshed with the backup API."""
+
+    def __init__(self, source, target, interval):
+        self.source = source
+        self.target = target
+        self.interval = interval
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def refresh(self):
+        source = sqlite3.connect(self.source)
+        target = sqlite3.connect(self.target)
+        try:
+            source.backup(target)  # a consistent copy, even while the primary is being written
+        finally:
+            target.close()
+            source.close()
+
+    def ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='replica-snapshot', daemon=True)
+                    self._thread.start()
+                    atexit.register(self._stop.set)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except sqlite3.Error:
+                continue  # keep serving the previous copy; the next refresh tries again
+
+
+def snapshot_path(database):
+    root, ext = os.path.splitext(database)
+    return f'{root}.replica{ext or ".db"}'
+
+
+def init_app(app):
+    url = app.config['REPLICA_DATABASE_URL']
+    if not url and app.config['REPLICA_SNAPSHOT']:
+        from app.storage import is_sqlite_file
+        primary = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        if not is_sqlite_file(primary):
+            raise RuntimeError("REPLICA_SNAPSHOT needs a file-backed SQLite primary database")
+        snapshot = ReplicaSnapshot(primary.database, snapshot_path(primary.database), app.config['REPLICA_REFRESH_SECONDS'])
+        snapshot.refresh()  # the first requests read a current copy
+        app.extensions['replica_snapshot'] = snapshot
+        url = primary.set(database=snapshot.target)
+    if not url:
+        return
+    # A plain engine rather than an SQLALCHEMY_BINDS entry: no model belongs to the replica,
+    # and Flask-SQLAlchemy would create (and migrate) tables for every bind key
+    from app import storage
+    engine = create_engine(url, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    storage.init_engine(app, engine)
+    app.extensions['replica_engine'] = engine
+    app.before_request(route_request)
+    app.after_request(remember_write)
@@ -0,0 +1,4 @@
+# Route blueprints. Each module defines a `bp` blueprint; create_app() imports and
+# registers the modules listed by the configured worker profile, so importing the app
+# package does not pull in any of them. Server-rendered pages and their JSON
+# counterparts (/api/*) live in separate modules, e.g. groups and groups_api.
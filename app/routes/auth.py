@@ -0,0 +1,55 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, request
+from app import db
+from app.forms import LoginForm, RegistrationForm
+from flask_login import current_user, login_user, logout_user
+from app.models import User
+from app.passwords import hash_password, verify_password, needs_rehash
+from app.writer import run_write
+from urllib.parse import urlparse
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        flash("You are already logged in!", "info")
+        return redirect(url_for('main.index'))
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = db.session.scalar(db.select(User).filter_by(username=form.username.data))
+        if user is None or not verify_password(user.password_hash, form.password.data):
+            flash('Invalid username or password')
+            return redirect(url_for('auth.login'))
+        if needs_rehash(user.password_hash):  # PASSWORD_HASH_METHOD changed since this hash was made
+            run_write(save_password_hash, user.id, hash_password(form.password.data))
+        login_user(user, remember=form.remember_me.data)
+        next_page = request.args.get('next')
+        if not next_page or urlparse(next_page).netloc != '' or urlparse(next_page).scheme != '':
+             next_page = url_for('main.index')
+        return redirect(next_page)
+    return render_template('login.html', title='Sign In', form=form, hide_nav=True)
+
+def save_password_hash(user_id, password_hash):
+    """Write for run_write(): replaces a user's password hash."""
+    db.session.execute(db.update(User).where(User.id == user_id).values(password_hash=password_hash),
+                       execution_options={"synchronize_session": False})
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.index'))
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        user = User(username=form.username.data, email=form.email.data)
+        user.password_hash = hash_password(form.password.data)
+        db.session.add(user)
+        db.session.commit()
+        flash(f'Account created for {form.username.data}!', 'success')
+        return redirect(url_for('auth.login'))
+    return render_template('register.html', title='Register', form=form, hide_nav=True)
+
+@bp.route('/logout')
+def logout():
+    logout_user()
+    return redirect(url_for('main.index'))
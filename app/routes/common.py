@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, abort, current_app
+from flask_login import current_user
+from sqlalchemy import func, or_, and_, case
+from sqlalchemy.orm import joinedload, load_only
+from app import db
+from app.models import User, Group, Node, Post, Message, MESSAGE_BIND
+from app.pagination import keyset_paginate, KeysetPage
+from app.membership import user_group_ids
+from app.writer import submit_write
+from app.identity import set_loaded_value
+
+# Helpers shared by the route blueprints
+
+# Endpoints polled in the background; they must not count as user activity or write on every call
+PASSIVE_ENDPOINTS = {'messages_api.get_my_unread', 'messages_api.get_my_stream'}
+
+
+def touch_last_active(user_id, when):
+    # Nothing reads last_active back straight away, so it does not pin the request to the primary
+    db.session.execute(db.update(User).where(User.id == user_id).values(last_active=when),
+                       execution_options={"synchronize_session": False, "stick_to_primary": False})
+
+def update_last_active():
+    if current_user.is_authenticated and request.endpoint not in PASSIVE_ENDPOINTS:
+        now = datetime.now(timezone.utc)
+        # Best effort: with the write queue the request does not wait for this commit
+        if submit_write(touch_last_active, current_user.id, now):
+            set_loaded_value(current_user._get_current_object(), 'last_active', now)
+
+def is_group_member(user_id, group_id):
+    return group_id in user_group_ids(user_id)
+
+def node_belongs_to_group(node_id, group_id):
+    node = db.session.get(Node, node_id)
+    return node is not None and node.group_id == group_id
+
+def require_group_member(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        group_id = kwargs.get('group_id')
+        if group_id is None:
+            abort(400, description="Missing group_id in route.")
+        if not current_user.is_authenticated:
+             abort(401)
+        member_check = is_group_member(current_user.id, group_id)
+        if not member_check:
+             abort(403, description="You are not authorized for this group.")
+        return f(*args, **kwargs)
+    return decorated_function
+
+def keyset_args():
+    """Cursor arguments for keyset_paginate from the query string; ?count=1 opts into a total."""
+    return {
+        "after": request.args.get('after'),
+        "before": request.args.get('before'),
+        "with_total": request.args.get('count', 'false').lower() in ('1', 'true'),
+    }
+
+# Queries shared by a page and its JSON counterpart, which are served by different blueprints
+
+def home_feed_page():
+    """Newest-first posts from every group the current user belongs to, as one keyset-paginated query."""
+    group_ids = user_group_ids(current_user.id)
+    if not group_ids:
+        return KeysetPage([])
+    feed_query = db.select(Post).where(Post.group_id.in_(group_ids))\
+        .options(Post.author_loader(), joinedload(Post.group).load_only(Group.id, Group.name))
+    return keyset_paginate(feed_query, Post.timestamp, Post.id, current_app.config['POSTS_PER_PAGE'], **keyset_args())
+
+def thread_query(user_id, partner_id):
+    """Messages exchanged between two users in either direction (served by the sender/recipient index)."""
+    return db.select(Message).where(or_(
+        and_(Message.sender_id == user_id, Message.recipient_id == partner_id),
+        and_(Message.sender_id == partner_id, Message.recipient_id == user_id)
+    )).options(Message.sender_loader())
+
+def conversations_query(user):
+    """One row per conversation partner with the latest message either way and the partner's unread count.
+
+    Ranks the user's messages per partner with window functions in a single statement instead of
+    loading messages into Python. Returns (query, ranked subquery) for keyset pagination; pass
+    the page's rows to with_partners() for their partner users.
+    """
+    last_read = user.last_message_read_time or datetime(1900, 1, 1)
+    partner_id = case((Message.sender_id == user.id, Message.recipient_id), else_=Message.sender_id)
+    ranked = db.select(
+        Message.id, Message.body, Message.timestamp, Message.sender_id,
+        partner_id.label('partner_id'),
+        func.row_number().over(partition_by=partner_id,
+                               order_by=(Message.timestamp.desc(), Message.id.desc())).label('position'),
+        func.sum(case((and_(Message.recipient_id == user.id, Message.timestamp > last_read), 1), else_=0))
+            .over(partition_by=partner_id).label('unread_count')
+    ).where(or_(Message.sender_id == user.id, Message.recipient_id == user.id)).subquery()
+
+    if MESSAGE_BIND is not None:
+        # The user table is in another database; with_partners() loads the partners afterwards
+        return db.select(ranked).where(ranked.c.position == 1), ranked
+    query = db.select(ranked, User)\
+        .join(User, User.id == ranked.c.partner_id)\
+        .where(ranked.c.position == 1)\
+        .options(load_only(User.id, User.username, User.email))
+    return query, ranked
+
+def with_partners(rows):
+    """(row, partner user) pairs for conversations_query() rows, dropping partners that no longer exist."""
+    if MESSAGE_BIND is None:
+        return [(row, row.User) for row in rows]
+    partner_ids = {row.partner_id for row in rows}
+    partners = {user.id: user for user in db.session.scalars(
+        db.select(User).where(User.id.in_(partner_ids)).options(load_only(User.id, User.username, User.email)))
+    } if partner_ids else {}
+    return [(row, partners[row.partner_id]) for row in rows if row.partner_id in partners]
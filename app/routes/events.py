@@ -0,0 +1,445 @@
+from flask import Blueprint, url_for, request, jsonify, current_app
+from app import db
+from flask_login import current_user, login_required
+from app.models import User, Group, GroupMember, Event, EventRSVP, Node, InvitedGuest
+from app.notifications import notify, notify_group
+from app.writer import run_write
+from app.routes.common import is_group_member, require_group_member
+from datetime import datetime, timezone, timedelta
+from dateutil.parser import isoparse
+from sqlalchemy.orm import joinedload
+
+bp = Blueprint('events', __name__)
+
+
+@bp.route("/api/groups/<int:group_id>/events", methods=["GET"])
+@login_required
+@require_group_member
+def get_group_events_flat(group_id):
+    events_query = db.select(Event).join(Node).filter(Node.group_id == group_id)\
+        .options(
+            joinedload(Event.node).joinedload(Node.group), 
+            joinedload(Event.attendees).joinedload(EventRSVP.user) 
+        )\
+        .order_by(Event.date.desc())
+    events_list = db.session.scalars(events_query).unique().all()
+    events_data = [event.to_dict(current_user_id=current_user.id) for event in events_list]
+    return jsonify(events_data)
+
+
+@bp.route("/api/groups/<int:group_id>/events", methods=["POST"])
+@login_required
+@require_group_member
+def create_event_api(group_id):
+    data = request.get_json() or {}
+    title = data.get("title", "Untitled Event").strip()
+    location = data.get("location", "TBD").strip()
+    iso_str = data.get("date")
+    node_id = data.get("node_id") 
+
+    if not title:
+         return jsonify({"error": "Event title cannot be empty"}), 400
+    if not node_id: 
+        return jsonify({"error": "node_id is required to associate event with a category/node"}), 400
+
+    target_node = db.session.get(Node, node_id)
+    if not target_node or target_node.group_id != group_id:
+        return jsonify({"error": "Node does not belong to this group or does not exist."}), 400
+
+    try:
+        event_date = isoparse(iso_str) if iso_str else datetime.now(timezone.utc) + timedelta(hours=1) 
+        if event_date.tzinfo is None:
+            event_date = event_date.replace(tzinfo=timezone.utc)
+    except (ValueError, TypeError):
+        event_date = datetime.now(timezone.utc) + timedelta(hours=1)
+
+
+    cost_display = data.get("cost_display", "Free")
+    cost_value = data.get("cost_value") 
+    is_cost_split = data.get("is_cost_split", False)
+    
+    try:
+        if cost_value is not None: cost_value = float(cost_value)
+    except (ValueError, TypeError):
+        cost_value = None 
+
+    location_coordinates = data.get("location_coordinates")
+    description = data.get("description", "").strip()
+    image_url = data.get("image_url")
+    if not image_url:
+        image_url = url_for('static', filename='img/default-event-image.png')
+
+    allow_others_edit_title = data.get("allow_others_edit_title", False)
+    allow_others_edit_details = data.get("allow_others_edit_details", False)
+
+
+    event = Event(
+        title=title,
+        date=event_date,
+        location=location,
+        description=description,
+        image_url=image_url,
+        cost_display=cost_display,
+        cost_value=cost_value,
+        is_cost_split=is_cost_split,
+        node_id=node_id,
+        location_coordinates=location_coordinates,
+        creator_id=current_user.id, 
+        allow_others_edit_title=bool(allow_others_edit_title),
+        allow_others_edit_details=bool(allow_others_edit_details)
+    )
+    db.session.add(event)
+    db.session.commit() 
+    notify_group(group_id, 'event.created', event_id=event.id)
+    
+    event_for_response = db.session.query(Event).options(
+        joinedload(Event.node).joinedload(Node.group), 
+        joinedload(Event.creator) 
+    ).filter_by(id=event.id).one()
+
+
+    return jsonify(event_for_response.to_dict(current_user_id=current_user.id)), 201
+
+
+@bp.route("/api/events/<int:event_id>", methods=["GET", "PATCH", "DELETE"])
+@login_required
+def manage_event(event_id):
+    event_obj_loaded = db.session.query(Event).options(
+        joinedload(Event.node).joinedload(Node.group), 
+        joinedload(Event.creator), 
+        joinedload(Event.attendees).joinedload(EventRSVP.user) 
+    ).filter(Event.id == event_id).first() 
+    
+    if not event_obj_loaded:
+        return jsonify({"error": "Event not found"}), 404
+    event_obj = event_obj_loaded
+
+    is_group_member_of_event_group = False
+    is_group_owner_of_event_group = False
+    if event_obj.node and event_obj.node.group:
+        group_id_for_event = event_obj.node.group_id
+        if is_group_member(current_user.id, group_id_for_event):
+            is_group_member_of_event_group = True
+            if event_obj.node.group.owner_id == current_user.id:
+                is_group_owner_of_event_group = True
+    
+    is_event_creator = (event_obj.creator_id == current_user.id)
+
+    if request.method == "GET":
+        is_authorized_get, msg_get, status_get = _check_event_authorization(event_id, current_user.id) 
+        if not is_authorized_get:
+             return jsonify({"error": msg_get}), status_get
+        return jsonify(event_obj.to_dict(current_user_id=current_user.id))
+
+    can_modify_title = is_event_creator or is_group_owner_of_event_group or \
+                       (event_obj.allow_others_edit_title and is_group_member_of_event_group)
+    can_modify_details = is_event_creator or is_group_owner_of_event_group or \
+                         (event_obj.allow_others_edit_details and is_group_member_of_event_group)
+    
+    can_delete = is_event_creator or is_group_owner_of_event_group
+
+
+    if request.method == "PATCH":
+        data = request.get_json() or {}
+        updated_fields = [] 
+
+        if "title" in data:
+            if not can_modify_title: return jsonify({"error": "Not authorized to edit event title."}), 403
+            new_title = data["title"]
+            if isinstance(new_title, str): 
+                event_obj.title = new_title.strip(); updated_fields.append("title")
+
+        if "location" in data or "location_coordinates" in data or "location_key" in data:
+            if not can_modify_details: return jsonify({"error": "Not authorized to edit event location/details."}), 403
+            if "location" in data:
+                new_location = data["location"]
+                if isinstance(new_location, str): event_obj.location = new_location.strip()
+                elif new_location is None: event_obj.location = ""
+                updated_fields.append("location")
+            if "location_coordinates" in data: 
+                new_coords = data["location_coordinates"]
+                event_obj.location_coordinates = new_coords.strip() if isinstance(new_coords, str) and new_coords.strip() else None
+                updated_fields.append("location_coordinates")
+            if "location_key" in data: 
+                new_key = data["location_key"]
+                event_obj.location_key = new_key.strip() if isinstance(new_key, str) and new_key.strip() else None
+                updated_fields.append("location_key")
+        
+        if "description" in data:
+            if not can_modify_details: return jsonify({"error": "Not authorized to edit event description."}), 403
+            new_description = data["description"]
+            if isinstance(new_description, str): event_obj.description = new_description.strip() 
+            elif new_description is None: event_obj.description = None
+            updated_fields.append("description")
+
+        if "date" in data:
+            if not can_modify_details: return jsonify({"error": "Not authorized to edit event date."}), 403
+            new_date_str = data["date"]
+            if new_date_str is None: event_obj.date = None
+            elif isinstance(new_date_str, str):
+                try:
+                    parsed_date = isoparse(new_date_str)
+                    event_obj.date = parsed_date.replace(tzinfo=timezone.utc) if parsed_date.tzinfo is None else parsed_date
+                    updated_fields.append("date")
+                except (ValueError, TypeError): pass 
+            
+        if "cost_display" in data or "cost_value" in data or "is_cost_split" in data:
+            if not can_modify_details: return jsonify({"error": "Not authorized to edit event cost."}), 403
+            if "cost_display" in data:
+                event_obj.cost_display = str(data["cost_display"]) if data["cost_display"] is not None else None
+                updated_fields.append("cost_display")
+            if "cost_value" in data:
+                try: event_obj.cost_value = float(data["cost_value"]) if data["cost_value"] is not None else None
+                except (ValueError, TypeError): event_obj.cost_value = None
+                updated_fields.append("cost_value")
+            if "is_cost_split" in data:
+                event_obj.is_cost_split = bool(data["is_cost_split"])
+                updated_fields.append("is_cost_split")
+
+        if "node_id" in data and data["node_id"] != event_obj.node_id:
+            if not (is_event_creator or is_group_owner_of_event_group):
+                 return jsonify({"error": "Not authorized to change event node assignment."}), 403
+            new_node_id_val = data["node_id"]
+            if new_node_id_val is None: event_obj.node_id = None
+            else:
+                try:
+                    new_node_id_int = int(new_node_id_val)
+                    target_node = db.session.get(Node, new_node_id_int)
+                    if not target_node:
+                        return jsonify({"error": "Target node not found."}), 400
+                    
+                    if group_id_for_event and target_node.group_id != group_id_for_event:
+                        return jsonify({"error": "Cannot move event to a node in a different group."}), 400
+                    
+                    if not is_group_member(current_user.id, target_node.group_id): 
+                        return jsonify({"error": "Cannot assign event to a node in a group you are not a member of."}), 403
+
+                    event_obj.node_id = new_node_id_int
+                except (ValueError, TypeError): return jsonify({"error": "Invalid node_id format."}), 400
+            updated_fields.append("node_id")
+
+        if is_group_owner_of_event_group or is_event_creator:
+            if "allow_others_edit_title" in data:
+                event_obj.allow_others_edit_title = bool(data["allow_others_edit_title"])
+                updated_fields.append("allow_others_edit_title")
+            if "allow_others_edit_details" in data:
+                event_obj.allow_others_edit_details = bool(data["allow_others_edit_details"])
+                updated_fields.append("allow_others_edit_details")
+
+
+        if updated_fields:
+            try:
+                db.session.commit()
+                current_app.logger.info(f"Event {event_id} updated fields: {', '.join(updated_fields)}")
+                event_obj_refreshed = db.session.query(Event).options(
+                    joinedload(Event.node).joinedload(Node.group),
+                    joinedload(Event.creator),
+                    joinedload(Event.attendees).joinedload(EventRSVP.user)
+                ).filter(Event.id == event_id).first()
+                event_data = event_obj_refreshed.to_dict(current_user_id=current_user.id)
+                notify_event_change(event_id, 'event.updated', fields=updated_fields,
+                                    changes=event_changes(event_data, updated_fields))
+                return jsonify(event_data)
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Error committing updates for event {event_id}: {e}")
+                return jsonify({"error": "Could not save changes to the event."}), 500
+        
+        return jsonify(event_obj.to_dict(current_user_id=current_user.id)) 
+
+    if request.method == "DELETE":
+        if not can_delete:
+            return jsonify({"error": "Not authorized to delete this event."}), 403
+        event_group_id = event_obj.node.group_id if event_obj.node else None
+        db.session.delete(event_obj)
+        db.session.commit()
+        if event_group_id is not None:
+            notify_group(event_group_id, 'event.deleted', event_id=event_id)
+        return jsonify({"success": True, "message": "Event deleted successfully."})
+
+    return jsonify({"error": "Method not allowed"}), 405
+
+
+def event_changes(event_data, updated_fields):
+    """The new values of the updated fields, as in Event.to_dict(), for clients to apply in place."""
+    fields = [field for field in updated_fields if field in event_data]  # location_key is not sent to clients
+    if "node_id" in fields:
+        fields += ["group_id", "group_name"]
+    return {field: event_data[field] for field in fields}
+
+
+def rsvp_attendee(user, status):
+    """An entry of /api/events/<id>/attendees for user, which the RSVP response and notification carry."""
+    return {'user_id': user.id, 'username': user.username, 'avatar_url': user.avatar(40), 'status': status}
+
+
+def notify_event_change(event_id, kind, **data):
+    """Notifies the members of the event's group, or just the current user for events without a group."""
+    group_id = db.session.scalar(
+        db.select(Node.group_id).join(Event, Event.node_id == Node.id).where(Event.id == event_id)
+    )
+    if group_id is None:
+        notify([current_user.id], kind, event_id=event_id, **data)
+    else:
+        notify_group(group_id, kind, event_id=event_id, **data)
+
+def _check_event_authorization(event_id, user_id_to_check): 
+    event_to_check = db.session.query(Event).options(
+        joinedload(Event.node).joinedload(Node.group)
+    ).filter(Event.id == event_id).first()
+    
+    if not event_to_check:
+        return False, "Event not found", 404
+
+    user_checking = db.session.get(User, user_id_to_check) 
+    if not user_checking:
+        return False, "User performing check not found", 404 
+
+    if event_to_check.node_id and event_to_check.node and event_to_check.node.group_id:
+        if is_group_member(user_id_to_check, event_to_check.node.group_id):
+            return True, "Authorized as group member", 200
+
+    is_invited = db.session.scalar(
+        db.select(InvitedGuest.id).filter_by(event_id=event_to_check.id, email=user_checking.email)
+    )
+    if is_invited:
+        return True, "Authorized as invited guest", 200
+
+    return False, "Not authorized for this event (not group member or invited guest).", 403
+
+@bp.route('/api/events/<int:event_id>/attendees', methods=['GET'])
+@login_required
+def get_event_attendees(event_id):
+    authorized, message, status_code = _check_event_authorization(event_id, current_user.id)
+    if not authorized:
+        return jsonify({"error": message}), status_code
+
+    rsvps_query = db.select(EventRSVP).options(joinedload(EventRSVP.user))\
+                           .filter(EventRSVP.event_id == event_id)\
+                           .filter(EventRSVP.status.isnot(None))\
+                           .order_by(EventRSVP.timestamp.desc())
+
+    rsvps = db.session.scalars(rsvps_query).unique().all() 
+
+    attendees = []
+    for rsvp in rsvps:
+        if rsvp.user: 
+            attendees.append({
+                'user_id': rsvp.user.id,
+                'username': rsvp.user.username,
+                'avatar_url': rsvp.user.avatar(40),
+                'status': rsvp.status
+            })
+
+    return jsonify(attendees)
+
+@bp.route('/api/events/<int:event_id>/my-rsvp', methods=['GET'])
+@login_required
+def get_my_rsvp(event_id):
+    authorized, message, status_code = _check_event_authorization(event_id, current_user.id)
+    if not authorized:
+        return jsonify({"error": message}), status_code
+
+    rsvp = db.session.scalar(
+        db.select(EventRSVP).filter_by(event_id=event_id, user_id=current_user.id)
+    )
+    status = rsvp.status if rsvp else None
+    return jsonify({"status": status})
+
+
+@bp.route('/api/events/<int:event_id>/rsvp', methods=['POST'])
+@login_required
+def update_my_rsvp(event_id):
+    authorized, message, status_code = _check_event_authorization(event_id, current_user.id)
+    if not authorized:
+        return jsonify({"error": message}), status_code
+
+    data = request.get_json()
+    if not data or 'status' not in data:
+        return jsonify({"error": "Missing 'status' in request body"}), 400
+
+    new_status = data['status']
+    allowed_statuses = ['attending', 'maybe', 'declined', None] 
+    
+    if isinstance(new_status, str) and new_status.lower() == 'none':
+        new_status = None
+        
+    if new_status not in allowed_statuses:
+        return jsonify({"error": f"Invalid status: '{new_status}'. Allowed: {allowed_statuses}"}), 400
+
+    outcome = run_write(save_rsvp, event_id, current_user.id, new_status)
+    attendee = rsvp_attendee(current_user, new_status)
+    if outcome in ('cleared', 'updated', 'created'):
+        notify_event_change(event_id, 'rsvp.changed', **attendee)
+
+    if outcome == 'cleared':
+        return jsonify({"message": "RSVP cleared successfully.", "status": None, "attendee": attendee})
+    if outcome == 'updated':
+        return jsonify({"message": f"RSVP updated to '{new_status}'.", "status": new_status, "attendee": attendee})
+    if outcome == 'created':
+        return jsonify({"message": f"RSVP successfully set to '{new_status}'.", "status": new_status, "attendee": attendee}), 201
+    if new_status is None:
+        return jsonify({"message": "No existing RSVP to clear.", "status": None, "attendee": attendee})
+    return jsonify({"message": f"RSVP already set to '{new_status}'.", "status": new_status, "attendee": attendee})
+
+
+def save_rsvp(event_id, user_id, new_status):
+    """Write for run_write(): sets or clears a user's RSVP and returns what changed."""
+    rsvp = db.session.scalar(
+        db.select(EventRSVP).filter_by(event_id=event_id, user_id=user_id)
+    )
+    if new_status is None:
+        if rsvp is None:
+            return 'unchanged'
+        db.session.delete(rsvp)
+        return 'cleared'
+    if rsvp is None:
+        db.session.add(EventRSVP(event_id=event_id, user_id=user_id, status=new_status,
+                                 timestamp=datetime.now(timezone.utc)))
+        return 'created'
+    if rsvp.status == new_status:
+        return 'unchanged'
+    rsvp.status = new_status
+    rsvp.timestamp = datetime.now(timezone.utc)
+    return 'updated'
+
+
+# --- Endpoint for All User Events (Calendar/List View) ---
+@bp.route('/api/me/all_events', methods=['GET'])
+@login_required
+def get_all_my_events():
+    user_id = current_user.id
+    user_email = current_user.email
+
+    group_events_stmt = db.select(Event).distinct() \
+        .join(Node, Event.node_id == Node.id) \
+        .join(Group, Node.group_id == Group.id) \
+        .join(GroupMember, Group.id == GroupMember.group_id) \
+        .where(GroupMember.user_id == user_id) \
+        .options(
+            joinedload(Event.node).joinedload(Node.group), 
+            joinedload(Event.attendees).joinedload(EventRSVP.user),
+            joinedload(Event.creator) 
+        )
+    
+    invited_events_stmt = db.select(Event).distinct() \
+        .join(InvitedGuest, Event.id == InvitedGuest.event_id) \
+        .where(InvitedGuest.email == user_email) \
+        .options(
+            joinedload(Event.node).joinedload(Node.group),
+            joinedload(Event.attendees).joinedload(EventRSVP.user),
+            joinedload(Event.creator) 
+        )
+
+    group_events = db.session.scalars(group_events_stmt).unique().all()
+    invited_events = db.session.scalars(invited_events_stmt).unique().all()
+
+    all_user_events_map = {event.id: event for event in group_events}
+    for event in invited_events:
+        if event.id not in all_user_events_map:
+            all_user_events_map[event.id] = event
+    
+    sorted_events = sorted(list(all_user_events_map.values()), key=lambda e: (e.date is None, e.date), reverse=True)
+
+    events_data = [event.to_dict(current_user_id=user_id) for event in sorted_events]
+    return jsonify(events_data)
@@ -0,0 +1,203 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, request
+from app import db
+from app.forms import HandleFriendRequestForm, SendFriendRequestForm, RemoveFriendForm
+from flask_login import current_user, login_required
+from app.models import User, FriendRequest
+from sqlalchemy import or_
+
+bp = Blueprint('friends', __name__)
+
+
+@bp.route('/friends')
+@login_required
+def friends():
+    search_query = request.args.get('query')
+    search_results = None
+
+    if search_query:
+        search_results = User.query.filter(
+            User.username.ilike(f"%{search_query}%"),
+            User.id != current_user.id
+        ).all()
+
+    friend_requests = FriendRequest.query.filter_by(receiver_id=current_user.id).all()
+
+    # Create a unique form instance per request
+    friend_request_forms = {r.id: HandleFriendRequestForm(request_id=r.id) for r in friend_requests}
+    received_requests = {r.sender.id: r.id for r in friend_requests}
+
+    # Existing forms for sending requests
+    forms = {user.username: SendFriendRequestForm(receiver_username=user.username) for user in (search_results or [])}
+    friends = current_user.friends
+    sent_requests = {r.receiver.id for r in current_user.sent_requests}
+
+    remove_friend_forms = {}
+    for friend in current_user.friends:
+        form = RemoveFriendForm()
+        form.friend_id.data = friend.id
+        remove_friend_forms[friend.id] = form
+
+    return render_template(
+        'friends.html',
+        search_results=search_results,
+        friend_requests=friend_requests,
+        forms=forms,
+        friend_request_forms=friend_request_forms,
+        received_requests=received_requests,
+        friends=friends,
+        sent_requests=sent_requests,
+        remove_friend_forms=remove_friend_forms
+    )
+
+@bp.route('/search_friends', methods=['GET'])
+@login_required
+def search_friends():
+    query = request.args.get('query', '').strip()
+    search_results = []
+
+    if query:
+        # Perform a fuzzy search for usernames containing the query (case-insensitive)
+        search_results = User.query.filter(
+            or_(
+                User.username.ilike(f'%{query}%'),  # Case-insensitive partial match
+                User.email.ilike(f'%{query}%')     # Optionally allow searching by email
+            )
+        ).all()
+
+    # Exclude the current user from the search results
+    search_results = [user for user in search_results if user.id != current_user.id]
+    
+    # Exclude users who are already friends with the current user
+    search_results = [user for user in search_results if not current_user.is_friend(user)]
+
+    # Get a list of users to whom the current user has already sent friend requests
+    sent_requests_set = {req.receiver_id for req in FriendRequest.query.filter_by(sender_id=current_user.id).all()}
+
+    # Get users who have sent friend requests to the current user
+    received_requests_map = {req.sender_id: req.id for req in FriendRequest.query.filter_by(receiver_id=current_user.id).all()}
+
+    # Also get the pending friend requests
+    friend_requests_list = FriendRequest.query.filter_by(receiver_id=current_user.id).all()
+
+    forms = {user.username: HandleFriendRequestForm(receiver_username=user.username) for user in search_results}
+
+    # Render the friends page with search results, sent requests, and friend requests
+    friends_list = current_user.friends.all()
+    return render_template('friends.html', 
+                          friends=friends_list, 
+                          search_results=search_results, 
+                          sent_requests=sent_requests_set,
+                          received_requests=received_requests_map,
+                          friend_requests=friend_requests_list, forms=forms)
+
+@bp.route('/handle_friend_request', methods=['POST'])
+@login_required
+def handle_friend_request():
+    form = HandleFriendRequestForm()
+
+    if form.validate_on_submit():
+        request_id = form.request_id.data
+        friend_request_obj = FriendRequest.query.get(request_id)
+
+        if not friend_request_obj or friend_request_obj.receiver_id != current_user.id:
+            flash('Invalid friend request.', 'danger')
+            return redirect(url_for('friends.friends'))
+
+        if form.accept.data:
+            current_user.add_friend(friend_request_obj.sender)
+            db.session.delete(friend_request_obj)
+            db.session.commit()
+            flash(f'You are now friends with {friend_request_obj.sender.username}!', 'success')
+        elif form.reject.data:
+            db.session.delete(friend_request_obj)
+            db.session.commit()
+            flash('Friend request rejected.', 'info')
+
+        return redirect(url_for('friends.friends'))
+
+    flash('Invalid form submission.', 'danger')
+    return redirect(url_for('friends.friends'))
+
+@bp.route('/add_friend', methods=['POST'])
+@login_required
+def add_friend():
+    friend_id = request.form.get('friend_id')
+    if not friend_id:
+        flash('Invalid friend request.', 'danger')
+        return redirect(url_for('friends.friends'))
+
+    # Find the user by ID
+    friend_user = User.query.get(friend_id)
+    if not friend_user:
+        flash('User not found.', 'danger')
+        return redirect(url_for('friends.friends'))
+
+    # Add the friend
+    if current_user.is_friend(friend_user):
+        flash(f'{friend_user.username} is already your friend.', 'info')
+    else:
+        current_user.add_friend(friend_user)
+        db.session.commit()
+        flash(f'{friend_user.username} has been added to your friends list!', 'success')
+
+    return redirect(url_for('friends.friends'))
+
+@bp.route('/remove_friend', methods=['POST'])
+@login_required
+def remove_friend():
+    form = RemoveFriendForm()
+
+    if form.validate_on_submit():
+        friend_id = form.friend_id.data
+        friend_user = User.query.get(friend_id)
+
+        if not friend_user:
+            flash('User not found.', 'danger')
+            return redirect(url_for('friends.friends'))
+
+        if current_user.is_friend(friend_user):
+            current_user.remove_friend(friend_user)
+            db.session.commit()
+            flash(f'{friend_user.username} has been removed from your friends list.', 'success')
+        else:
+            flash(f'{friend_user.username} is not in your friends list.', 'info')
+    else:
+        flash('Invalid form submission.', 'danger')
+
+    return redirect(url_for('friends.friends'))
+
+@bp.route('/send_friend_request', methods=['POST'])
+@login_required
+def send_friend_request():
+    receiver_username = request.form.get('receiver_username')
+    if not receiver_username:
+        flash('Please provide a username.', 'danger')
+        return redirect(url_for('friends.friends'))
+
+    receiver_user = User.query.filter_by(username=receiver_username).first()
+    if not receiver_user:
+        flash('User not found.', 'danger')
+        return redirect(url_for('friends.friends'))
+
+    if current_user.is_friend(receiver_user):
+        flash(f'{receiver_user.username} is already your friend.', 'info')
+    elif FriendRequest.query.filter_by(sender_id=current_user.id, receiver_id=receiver_user.id).first():
+        flash(f'You have already sent a friend request to {receiver_user.username}.', 'info')
+    else:
+        friend_request_obj = FriendRequest(sender_id=current_user.id, receiver=receiver_user)
+        db.session.add(friend_request_obj)
+        db.session.commit()
+        flash(f'Friend request sent to {receiver_user.username}!', 'success')
+
+    return redirect(url_for('friends.friends'))
+
+@bp.route('/search', methods=['GET'])
+@login_required
+def search_users():
+    search_query = request.args.get('username', '').strip()
+    users_list = [] # Renamed to avoid conflict
+    if search_query:
+        users_list = db.session.scalars(
+            db.select(User).filter(User.username.ilike(f'%{search_query}%')).limit(20)
+        ).all()
+    return render_template('search_users.html', title='Search Users', users=users_list, query=search_query) # Use users_list
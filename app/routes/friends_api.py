@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify
+from app import db
+from flask_login import current_user, login_required
+from app.models import User
+
+bp = Blueprint('friends_api', __name__)
+
+
+# NEW API Endpoint for fetching current user's friends
+@bp.route("/api/me/friends", methods=["GET"])
+@login_required
+def get_my_friends():
+    friends_list = current_user.friends.all() # Assuming 'friends' is the relationship name
+    friends_data = [
+        {"id": friend.id, "username": friend.username, "avatar_url": friend.avatar(40)}
+        for friend in friends_list
+    ]
+    return jsonify(friends_data)
+
+@bp.route('/api/search/users', methods=['GET'])
+@login_required
+def api_search_users():
+    query_param = request.args.get('q', '').strip() 
+    limit = request.args.get('limit', 10, type=int)
+
+    if not query_param:
+        return jsonify([])
+
+    users_query = db.select(User).filter(
+            User.username.ilike(f'%{query_param}%'),
+            User.id != current_user.id 
+        ).limit(limit)
+
+    found_users = db.session.scalars(users_query).all() 
+
+    results = [{
+        'id': u.id, 
+        'username': u.username,
+        'avatar_url': u.avatar(40)
+    } for u in found_users]
+
+    return jsonify(results)
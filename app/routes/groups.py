@@ -0,0 +1,114 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app
+from app import db
+from app.forms import PostForm, CreateGroupForm, AddMemberForm
+from flask_login import current_user, login_required
+from app.models import User, Group, GroupMember, Post
+from app.pagination import keyset_paginate
+from app.membership import add_group_members, prefetch_user_groups
+from app.notifications import notify_group
+from app.routes.common import require_group_member, keyset_args, home_feed_page
+from datetime import datetime, timezone
+
+bp = Blueprint('groups', __name__)
+
+
+@bp.route("/create_group", methods=["GET", "POST"])
+@login_required
+def create_group():
+    form = CreateGroupForm()
+    if form.validate_on_submit():
+        group = Group(
+            name=form.name.data, 
+            about=form.about.data,
+            owner_id=current_user.id # Set owner on creation
+        )
+        db.session.add(group)
+        db.session.flush()
+        membership = GroupMember(
+            user_id=current_user.id, 
+            group_id=group.id,
+            is_owner=True # Mark creator as owner in GroupMember
+        )
+        db.session.add(membership)
+        db.session.commit()
+        flash("Group created successfully!", "success")
+        return redirect(url_for("groups.view_group", group_id=group.id))
+    return render_template("create_group.html", title="Create Group", form=form)
+
+@bp.route("/groups/<int:group_id>", methods=["GET", "POST"])
+@login_required
+@require_group_member
+def view_group(group_id):
+    group = db.session.get(Group, group_id, options=[Group.members_loader()])
+    if not group:
+        abort(404)
+
+    form = PostForm()
+    if form.validate_on_submit():
+        post = Post(
+            body=form.post.data,
+            user_id=current_user.id,
+            group_id=group_id,
+            timestamp=datetime.now(timezone.utc)
+        )
+        db.session.add(post)
+        db.session.commit()
+        flash("Post created!")
+        return redirect(url_for('groups.view_group', group_id=group_id))
+
+    posts_query = db.select(Post).where(Post.group_id == group_id).options(Post.author_loader())
+    posts_page = keyset_paginate(posts_query, Post.timestamp, Post.id, current_app.config['POSTS_PER_PAGE'], **keyset_args())
+
+    return render_template("view_group.html", group=group, posts=posts_page.items, form=form, total_posts=posts_page.total,
+                           next_url=url_for('groups.view_group', group_id=group.id, after=posts_page.next_cursor) if posts_page.has_next else None,
+                           prev_url=url_for('groups.view_group', group_id=group.id, before=posts_page.prev_cursor) if posts_page.has_prev else None)
+
+@bp.route("/feed")
+@login_required
+def feed():
+    feed_page = home_feed_page()
+    return render_template("feed.html", title="Feed", posts=feed_page.items, total_posts=feed_page.total,
+                           next_url=url_for('groups.feed', after=feed_page.next_cursor) if feed_page.has_next else None,
+                           prev_url=url_for('groups.feed', before=feed_page.prev_cursor) if feed_page.has_prev else None)
+
+@bp.route("/group/<int:group_id>/add_members", methods=["GET", "POST"])
+@login_required
+@require_group_member
+def add_members(group_id):
+    form = AddMemberForm()
+    group = db.session.get(Group, group_id, options=[Group.members_loader()])
+    if not group:
+        abort(404)
+    
+    friends_list = current_user.friends.all()
+    
+    if request.method == 'POST':
+        username_to_add = request.form.get('username')
+        if not username_to_add:
+            flash('Please enter a username.')
+            return redirect(url_for('groups.add_members', group_id=group_id))
+
+        user_to_add = db.session.scalar(db.select(User).filter_by(username=username_to_add))
+
+        if not user_to_add:
+            flash(f'User "{username_to_add}" not found.')
+            return redirect(url_for('groups.add_members', group_id=group_id))
+
+        if not add_group_members(group_id, [user_to_add.id]): # New members are not owners
+            flash(f'{user_to_add.username} is already a group member.')
+            return redirect(url_for('groups.add_members', group_id=group_id))
+        db.session.commit()
+        notify_group(group_id, 'membership.changed', added_user_ids=[user_to_add.id])
+
+        flash(f'{user_to_add.username} has been added to the group!')
+        return redirect(url_for('groups.view_group', group_id=group_id))
+
+    # One query for every friend's groups; add_members.html checks friend.is_member() per friend
+    prefetch_user_groups([friend_item.id for friend_item in friends_list])
+    eligible_friends = [friend_item for friend_item in friends_list if not friend_item.is_member(group_id)]
+
+    return render_template('add_members.html', 
+                          title='Add Members', 
+                          group=group, 
+                          friends=eligible_friends,
+                          form=form)
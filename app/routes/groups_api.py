@@ -0,0 +1,394 @@
+from flask import Blueprint, url_for, request, jsonify, abort, current_app
+from app import db
+from flask_login import current_user, login_required
+from app.models import Group, GroupMember, Event, EventRSVP, Node
+from app.membership import add_group_members
+from app.notifications import notify_group
+from app.ordering import bulk_update
+from app.layout import group_layout
+from app.writer import run_write
+from app.routes.common import is_group_member, require_group_member, home_feed_page
+from sqlalchemy.orm import joinedload
+
+bp = Blueprint('groups_api', __name__)
+
+
+@bp.route("/api/me/feed", methods=["GET"])
+@login_required
+def get_my_feed():
+    feed_page = home_feed_page()
+    posts_data = [{
+        "id": post.id,
+        "body": post.body,
+        "timestamp": post.timestamp.isoformat() if post.timestamp else None,
+        "group_id": post.group_id,
+        "group_name": post.group.name if post.group else None,
+        "author": {"id": post.author.id, "username": post.author.username, "avatar_url": post.author.avatar(36)}
+    } for post in feed_page.items]
+    return jsonify({
+        "posts": posts_data,
+        "next_cursor": feed_page.next_cursor,
+        "prev_cursor": feed_page.prev_cursor,
+        "total": feed_page.total
+    })
+
+@bp.route("/api/groups", methods=["GET"])
+@login_required
+def get_groups():
+    groups_query = db.select(Group).join(GroupMember).filter(GroupMember.user_id == current_user.id)\
+        .options(joinedload(Group.owner)) 
+    user_groups = db.session.scalars(groups_query).unique().all() 
+    group_data = [g.to_dict(include_nodes=False, include_members=False, current_user_id_param=current_user.id) for g in user_groups] 
+    return jsonify(group_data)
+
+@bp.route("/api/groups", methods=["POST"])
+@login_required
+def create_group_api():
+    data = request.get_json() or {}
+    name = data.get("name")
+    description = data.get("description", "")
+    avatar_url = data.get("avatar_url")
+    member_ids_to_add_str = data.get("member_ids", [])
+
+    if not name or not isinstance(name, str) or len(name.strip()) == 0:
+        return jsonify({"error": "Group name is required and cannot be empty"}), 400
+
+    final_avatar_url = avatar_url
+    if not final_avatar_url and name.strip():
+        final_avatar_url = url_for('static', filename='img/default-group-avatar.png')
+
+    group = Group(name=name.strip(),
+                  avatar_url=final_avatar_url,
+                  about=description.strip(),
+                  owner_id=current_user.id)
+    db.session.add(group)
+    db.session.flush()
+
+    current_user_membership = GroupMember(
+        group_id=group.id,
+        user_id=current_user.id,
+        is_owner=True
+    )
+    db.session.add(current_user_membership)
+
+    member_ids_to_add = set()
+    for member_id_str in member_ids_to_add_str or []:
+        try:
+            member_id_to_add = int(member_id_str)
+        except (TypeError, ValueError):
+            current_app.logger.warning(f"Invalid member_id '{member_id_str}' provided during group creation.")
+            continue
+        member_ids_to_add.add(member_id_to_add)
+    added_ids = add_group_members(group.id, member_ids_to_add, exclude={current_user.id})
+
+    db.session.commit()
+    notify_group(group.id, 'membership.changed', added_user_ids=added_ids)
+    
+    group_for_response = db.session.query(Group).options(
+        joinedload(Group.owner),
+        Group.members_loader()
+    ).filter_by(id=group.id).one_or_none()
+
+    if not group_for_response:
+         current_app.logger.error(f"Failed to re-fetch group {group.id} after creation.")
+         return jsonify({"error": "Group created but could not retrieve details for response."}), 500
+
+    return jsonify(group_for_response.to_dict(include_nodes=False, include_members=True, current_user_id_param=current_user.id)), 201
+
+@bp.route("/api/groups/<int:group_id>", methods=["GET"])
+@login_required
+@require_group_member 
+def get_group_detail(group_id):
+    include_members = request.args.get('include_members', 'false').lower() == 'true'
+
+    query_options = [joinedload(Group.owner)]
+    if include_members:
+        query_options.append(Group.members_loader())
+
+    group_query = db.select(Group).where(Group.id == group_id).options(*query_options)
+    group = db.session.scalar(group_query)
+
+    if not group:
+        return jsonify({"error": "Group not found"}), 404
+    return jsonify(group.to_dict(include_nodes=False, include_members=include_members, current_user_id_param=current_user.id))
+
+@bp.route("/api/groups/<int:group_id>", methods=["PATCH"])
+@login_required
+@require_group_member 
+def update_group_details(group_id):
+    group = db.session.get(Group, group_id)
+    if not group:
+        return jsonify({"error": "Group not found"}), 404
+
+    if group.owner_id != current_user.id:
+        return jsonify({"error": "Only the group owner can modify group settings."}), 403
+
+    data = request.get_json() or {}
+    updated_fields_count = 0
+    added_ids = []
+
+    if "name" in data:
+        new_name = data["name"].strip()
+        if not new_name:
+            return jsonify({"error": "Group name cannot be empty"}), 400
+        if new_name != group.name:
+            group.name = new_name
+            updated_fields_count += 1
+
+    if "description" in data:
+        new_description = data["description"].strip()
+        if new_description != group.about:
+            group.about = new_description
+            updated_fields_count += 1
+    
+    if "allow_member_edit_name" in data:
+        if group.allow_member_edit_name != bool(data["allow_member_edit_name"]):
+            group.allow_member_edit_name = bool(data["allow_member_edit_name"])
+            updated_fields_count += 1
+    if "allow_member_edit_description" in data:
+        if group.allow_member_edit_description != bool(data["allow_member_edit_description"]):
+            group.allow_member_edit_description = bool(data["allow_member_edit_description"])
+            updated_fields_count += 1
+    if "allow_member_manage_members" in data:
+        if group.allow_member_manage_members != bool(data["allow_member_manage_members"]):
+            group.allow_member_manage_members = bool(data["allow_member_manage_members"])
+            updated_fields_count += 1
+    
+    if "add_member_ids" in data and isinstance(data["add_member_ids"], list):
+        member_ids_to_add = {int(mid) for mid in data["add_member_ids"] if isinstance(mid, (int, str)) and str(mid).isdigit()}
+        added_ids = add_group_members(group.id, member_ids_to_add, exclude={current_user.id})
+        updated_fields_count += len(added_ids)
+        if added_ids:
+            current_app.logger.info(f"Users {added_ids} queued for addition to group {group_id} by {current_user.username}")
+
+
+    if updated_fields_count > 0:
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error updating group {group_id}: {e}")
+            return jsonify({"error": "Failed to save group changes."}), 500
+        if added_ids:
+            notify_group(group_id, 'membership.changed', added_user_ids=added_ids)
+        else:
+            notify_group(group_id, 'group.updated')
+    
+    group_for_response = db.session.query(Group).options(
+        joinedload(Group.owner),
+        Group.members_loader()
+    ).filter_by(id=group_id).one_or_none()
+
+    if not group_for_response:
+         current_app.logger.error(f"Failed to re-fetch group {group_id} after update.")
+         return jsonify({"error": "Group details could not be retrieved after update."}), 500
+         
+    return jsonify(group_for_response.to_dict(include_nodes=False, include_members=True, current_user_id_param=current_user.id))
+
+# Per-event fields of the compact node board payload; group-level fields are hoisted out
+COMPACT_EVENT_COLUMNS = ("id", "title", "date", "location", "location_coordinates", "description", "image_url",
+                         "cost_display", "cost_value", "is_cost_split", "creator_id", "allow_others_edit_title",
+                         "allow_others_edit_details", "current_user_rsvp_status", "is_current_user_creator")
+
+def columnar_nodes_payload(group, nodes, current_user_id):
+    """Encodes nodes and their events as parallel arrays per field.
+
+    Events point at their node through node_index (a position in the node arrays) instead
+    of repeating node and group fields, and group-wide values appear once under "group".
+    """
+    node_columns = {"id": [], "label": [], "x": [], "y": []}
+    event_columns = {"node_index": [], **{key: [] for key in COMPACT_EVENT_COLUMNS}}
+    for node_index, node_item in enumerate(nodes):
+        node_columns["id"].append(node_item.id)
+        node_columns["label"].append(node_item.label)
+        node_columns["x"].append(node_item.x)
+        node_columns["y"].append(node_item.y)
+        for event in node_item.events:
+            event_data = event.to_dict(current_user_id=current_user_id)
+            event_columns["node_index"].append(node_index)
+            for key in COMPACT_EVENT_COLUMNS:
+                event_columns[key].append(event_data[key])
+    return {
+        "format": "columnar",
+        "group": {"id": group.id, "name": group.name,
+                  "is_current_user_group_owner": group.owner_id == current_user_id},
+        "nodes": node_columns,
+        "events": event_columns,
+    }
+
+@bp.route("/api/groups/<int:group_id>/nodes", methods=["GET"])
+@login_required
+@require_group_member
+def get_group_nodes(group_id):
+    group = db.session.get(Group, group_id)
+    if not group:
+        abort(404, description="Group not found")
+
+    include_events_flag = request.args.get('include') == 'events'
+    query = db.select(Node).where(Node.group_id == group_id)
+
+    if include_events_flag:
+        query = query.options(
+            joinedload(Node.events)
+                .joinedload(Event.attendees)
+                .joinedload(EventRSVP.user),
+            joinedload(Node.group) 
+        )
+
+    nodes = db.session.scalars(query).unique().all() 
+
+    if include_events_flag and request.args.get('format') == 'compact':
+        return jsonify(columnar_nodes_payload(group, nodes, current_user.id))
+
+    nodes_data = []
+    for node_item in nodes: 
+        node_dict = {
+            "id": node_item.id,
+            "label": node_item.label,
+            "x": node_item.x,
+            "y": node_item.y,
+            "group_id": node_item.group_id,
+            "events": []
+        }
+        if include_events_flag and node_item.events: 
+            node_dict["events"] = [
+                event.to_dict(current_user_id=current_user.id) for event in node_item.events
+            ]
+        nodes_data.append(node_dict)
+
+    return jsonify(nodes_data)
+
+@bp.route("/api/groups/<int:group_id>/nodes", methods=["POST"])
+@login_required
+@require_group_member
+def create_node_api(group_id):
+    data = request.get_json() or {}
+    label = data.get("label", "").strip() 
+    if not label:
+        return jsonify({"error": "Node label cannot be empty"}), 400
+
+    existing_node = db.session.scalar(
+        db.select(Node).filter_by(group_id=group_id, label=label)
+    )
+    if existing_node:
+        return jsonify({"error": f"A node with the name '{label}' already exists in this group."}), 409 
+
+    try:
+        x_coord = float(data.get("x", 0)) 
+        y_coord = float(data.get("y", 0)) 
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid coordinates for node"}), 400
+
+    node_obj = Node( 
+        label=label,
+        x=x_coord,
+        y=y_coord,
+        group_id=group_id
+    )
+    db.session.add(node_obj)
+    db.session.commit()
+    return jsonify(node_obj.to_dict(include_events=False)), 201
+
+@bp.route("/api/groups/<int:group_id>/layout", methods=["GET"])
+@login_required
+@require_group_member
+def get_group_layout(group_id):
+    if not db.session.get(Group, group_id):
+        return jsonify({"error": "Group not found"}), 404
+    layout = group_layout(group_id)
+    response = jsonify(layout)
+    response.set_etag(layout["version"])
+    return response.make_conditional(request)
+
+@bp.route("/api/groups/<int:group_id>/nodes/positions", methods=["PATCH"])
+@login_required
+@require_group_member
+def update_node_positions(group_id):
+    data = request.get_json() or {}
+    positions = data.get("positions")
+    if not isinstance(positions, list) or not positions:
+        return jsonify({"error": "positions must be a non-empty list of {id, x, y} entries"}), 400
+
+    changes = {}
+    try:
+        for entry in positions:
+            if isinstance(entry, dict):
+                node_id, x_coord, y_coord = entry["id"], entry["x"], entry["y"]
+            else:
+                node_id, x_coord, y_coord = entry
+            changes[int(node_id)] = {"x": float(x_coord), "y": float(y_coord)}  # last write per node wins
+    except (KeyError, ValueError, TypeError):
+        return jsonify({"error": "Invalid node id or coordinates provided"}), 400
+
+    # Nodes outside this group match no row, so membership is the only check needed
+    updated_count = run_write(bulk_update, Node, changes, Node.group_id == group_id)
+    return jsonify({"updated": updated_count})
+
+@bp.route("/api/nodes/<int:node_id>", methods=["GET", "PATCH", "DELETE"])
+@login_required
+def manage_node(node_id):
+    node_obj = db.session.get(Node, node_id) 
+    if not node_obj:
+        return jsonify({"error": "Node not found"}), 404
+
+    if not is_group_member(current_user.id, node_obj.group_id):
+        return jsonify({"error": "Unauthorized. Must be a member of the node's group."}), 403
+
+    if request.method == "GET":
+        include_events = request.args.get('include') == 'events'
+        
+        if include_events:
+            node_obj_loaded = db.session.query(Node).options(
+                joinedload(Node.events) 
+                    .joinedload(Event.attendees) 
+                    .joinedload(EventRSVP.user), 
+                joinedload(Node.group) 
+            ).filter(Node.id == node_id).unique().first()
+            if node_obj_loaded: node_obj = node_obj_loaded 
+
+        return jsonify(node_obj.to_dict(include_events=include_events, current_user_id=current_user.id))
+
+
+    if request.method == "PATCH":
+        data = request.get_json() or {}
+        updated = False
+        if "label" in data:
+            new_label = data["label"].strip()
+            if not new_label: return jsonify({"error": "Node label cannot be empty"}), 400
+            
+            if new_label != node_obj.label:
+                existing_node = db.session.scalar(
+                    db.select(Node).filter_by(group_id=node_obj.group_id, label=new_label).where(Node.id != node_id)
+                )
+                if existing_node:
+                    return jsonify({"error": f"A node with the name '{new_label}' already exists in this group."}), 409
+                node_obj.label = new_label
+                updated = True
+
+        try:
+            if "x" in data:
+                node_obj.x = float(data["x"]); updated = True
+            if "y" in data:
+                node_obj.y = float(data["y"]); updated = True
+        except (ValueError, TypeError):
+             return jsonify({"error": "Invalid coordinates provided"}), 400
+
+        if updated:
+            db.session.commit()
+        return jsonify(node_obj.to_dict(include_events=False, current_user_id=current_user.id))
+
+    if request.method == "DELETE":
+        events_on_node = db.session.scalars(db.select(Event.id).filter_by(node_id=node_id).limit(1)).first()
+        if events_on_node:
+            db.session.execute(
+                db.update(Event).where(Event.node_id == node_id).values(node_id=None)
+            )
+            current_app.logger.info(f"Events previously on node {node_id} have been unassigned.")
+
+
+        db.session.delete(node_obj)
+        db.session.commit()
+        return jsonify({"success": True, "message": "Node deleted successfully. Associated events (if any) are now unassigned."})
+
+
+    return jsonify({"error": "Method not allowed"}), 405
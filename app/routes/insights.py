@@ -0,0 +1,512 @@
+from flask import Blueprint, request, jsonify, Response, current_app
+from app import db
+from flask_login import current_user, login_required
+from app.models import User, Group, GroupMember, Event, EventRSVP, Node, InvitedGuest, InsightPanel, SharedInsightPanel
+from app.ordering import reorder
+from app.analyses import get_analysis_details
+from app.routes.common import is_group_member
+import hashlib
+from datetime import datetime, timezone, timedelta
+from dateutil.parser import isoparse
+from sqlalchemy.orm import aliased, joinedload
+from sqlalchemy import func, or_, literal, null
+
+bp = Blueprint('insights', __name__)
+
+
+# --- Insights Panel API Routes ---
+
+def insight_panels_etag(user_id):
+    """Builds the ETag of a user's panel listing by hashing, in one query, the columns it shows.
+
+    Ids and versions alone are not enough: SQLite reuses the id of a deleted newest row, so a
+    new panel can arrive with the id and version of the one it replaced. The sharer's username
+    is included because shared entries show it.
+    """
+    original, sharer = aliased(InsightPanel), aliased(User)
+
+    def panel_columns(panel):
+        return (panel.id.label('panel_id'), panel.version.label('panel_version'), panel.analysis_type,
+                panel.title, panel.description, panel.display_order, panel.configuration)
+
+    own_panels = db.select(literal('own').label('kind'), null().label('share_id'), null().label('share_version'),
+                           *panel_columns(InsightPanel), null(), null(), null(), null())\
+        .where(InsightPanel.user_id == user_id)
+    shared_panels = db.select(literal('shared'), SharedInsightPanel.id, SharedInsightPanel.version,
+                              *panel_columns(original), SharedInsightPanel.access_mode,
+                              SharedInsightPanel.shared_at, SharedInsightPanel.shared_config, sharer.username)\
+        .join(original, SharedInsightPanel.original_panel)\
+        .join(sharer, SharedInsightPanel.sharer)\
+        .where(SharedInsightPanel.recipient_id == user_id)
+    listing = own_panels.union_all(shared_panels).order_by('kind', 'share_id', 'panel_id')
+    fingerprint = [tuple(row) for row in db.session.execute(listing)]
+    return hashlib.sha1(f"{user_id}:{fingerprint}".encode('utf-8')).hexdigest()
+
+
+@bp.route('/api/insights/panels', methods=['GET'])
+@login_required
+def get_insight_panels():
+    etag = insight_panels_etag(current_user.id)
+    if request.if_none_match.contains_weak(etag):  # compression turns the ETag weak
+        response = Response(status=304)
+    else:
+        own_panels_query = db.select(InsightPanel)\
+            .where(InsightPanel.user_id == current_user.id)\
+            .order_by(InsightPanel.display_order)
+        own_panels = db.session.scalars(own_panels_query).all()
+
+        panels_data = [panel.to_dict() for panel in own_panels]
+
+        shared_instances_query = db.select(SharedInsightPanel)\
+            .where(SharedInsightPanel.recipient_id == current_user.id)\
+            .options(
+                joinedload(SharedInsightPanel.original_panel),
+                joinedload(SharedInsightPanel.sharer).load_only(User.id, User.username)
+            )\
+            .order_by(SharedInsightPanel.shared_at.desc())
+
+        shared_instances = db.session.scalars(shared_instances_query).unique().all()
+
+        for shared_instance in shared_instances:
+            panels_data.append(shared_instance.to_dict_for_recipient())
+        response = jsonify(panels_data)
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'  # always revalidate against the ETag
+    return response
+
+
+def bulk_share_panel(panel, recipient_ids, access_mode, shared_config):
+    """Upserts SharedInsightPanel rows for every recipient in a constant number of statements.
+
+    One query finds the recipients that already have this panel, one UPDATE refreshes those
+    shares and one executemany INSERT creates the rest. Commits and returns the number of
+    recipients processed.
+    """
+    if not recipient_ids:
+        return 0
+    now = datetime.now(timezone.utc)
+    existing_ids = set(db.session.scalars(
+        db.select(SharedInsightPanel.recipient_id).where(
+            SharedInsightPanel.original_panel_id == panel.id,
+            SharedInsightPanel.recipient_id.in_(recipient_ids)
+        )
+    ).all())
+    if existing_ids:
+        db.session.execute(
+            db.update(SharedInsightPanel)
+            .where(SharedInsightPanel.original_panel_id == panel.id, SharedInsightPanel.recipient_id.in_(existing_ids))
+            .values(access_mode=access_mode, shared_config=shared_config, shared_at=now),
+            execution_options={"synchronize_session": False}
+        )
+    new_ids = set(recipient_ids) - existing_ids
+    if new_ids:
+        db.session.execute(db.insert(SharedInsightPanel), [
+            {"original_panel_id": panel.id, "sharer_id": panel.user_id, "recipient_id": recipient_id,
+             "access_mode": access_mode, "shared_config": shared_config, "shared_at": now}
+            for recipient_id in sorted(new_ids)
+        ])
+    db.session.commit()
+    return len(recipient_ids)
+
+
+@bp.route('/api/insights/panels/<int:panel_id>/share', methods=['POST'])
+@login_required
+def share_insight_panel(panel_id):
+    panel_to_share = db.session.get(InsightPanel, panel_id)
+    if not panel_to_share:
+        return jsonify({"error": "Panel not found"}), 404
+    if panel_to_share.user_id != current_user.id:
+        return jsonify({"error": "You can only share your own panels"}), 403
+
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "Invalid request body"}), 400
+
+    recipient_user_ids = data.get('recipient_user_ids') or []
+    share_with_group_id = data.get('share_with_group_id')
+    access_mode = data.get('access_mode') 
+    current_config_for_fixed_share = data.get('current_config_for_fixed_share') 
+
+    if not isinstance(recipient_user_ids, list) or (not recipient_user_ids and share_with_group_id is None):
+        return jsonify({"error": "recipient_user_ids must be a non-empty list, or share_with_group_id must be given"}), 400
+    if access_mode not in ['fixed', 'dynamic']:
+        return jsonify({"error": "Invalid access_mode. Must be 'fixed' or 'dynamic'"}), 400
+    if access_mode == 'fixed' and not isinstance(current_config_for_fixed_share, dict):
+        return jsonify({"error": "current_config_for_fixed_share is required for 'fixed' access_mode"}), 400
+
+    errors = []
+    requested_ids = set()
+    for recipient_id_str in recipient_user_ids:
+        try:
+            recipient_id = int(recipient_id_str)
+        except (TypeError, ValueError):
+            errors.append(f"Invalid recipient ID format: {recipient_id_str}.")
+            continue
+        if recipient_id == current_user.id:
+            errors.append(f"Cannot share panel with yourself (ID: {recipient_id}).")
+            continue
+        requested_ids.add(recipient_id)
+
+    group_member_ids = set()
+    if share_with_group_id is not None:
+        try:
+            share_with_group_id = int(share_with_group_id)
+        except (TypeError, ValueError):
+            return jsonify({"error": "share_with_group_id must be an integer"}), 400
+        if not is_group_member(current_user.id, share_with_group_id):
+            return jsonify({"error": "You can only share with groups you are a member of"}), 403
+        group_member_ids = set(db.session.scalars(
+            db.select(GroupMember.user_id).where(GroupMember.group_id == share_with_group_id)
+        ).all())
+        group_member_ids.discard(current_user.id)
+
+    # Explicit ids are validated with one query; group members already reference existing users.
+    recipient_names = {}
+    if requested_ids - group_member_ids:
+        recipient_names = dict(db.session.execute(
+            db.select(User.id, User.username).where(User.id.in_(requested_ids - group_member_ids))
+        ).all())
+    for missing_id in sorted(requested_ids - group_member_ids - recipient_names.keys()):
+        errors.append(f"Recipient user with ID {missing_id} not found.")
+    recipient_ids = group_member_ids | recipient_names.keys()
+
+    shared_config_payload = None
+    if access_mode == 'fixed':
+        shared_config_payload = {
+            "group_id": current_config_for_fixed_share.get("group_id", "all"),
+            "startDate": current_config_for_fixed_share.get("startDate"),
+            "endDate": current_config_for_fixed_share.get("endDate")
+        }
+    elif access_mode == 'dynamic':
+        group_id_for_dynamic = "all" 
+        if current_config_for_fixed_share and 'group_id' in current_config_for_fixed_share:
+            group_id_for_dynamic = current_config_for_fixed_share['group_id']
+        
+        shared_config_payload = { "group_id": group_id_for_dynamic }
+
+    shared_count = bulk_share_panel(panel_to_share, recipient_ids, access_mode, shared_config_payload)
+
+    response_message = f"Successfully processed {shared_count} shares."
+    if errors:
+        response_message += " Errors: " + "; ".join(errors)
+        return jsonify({"message": response_message, "errors": errors}), 207 
+    
+    return jsonify({"message": response_message, "shared_count": shared_count}), 200
+
+
+@bp.route('/api/analysis/data/<analysis_type>', methods=['GET'])
+@login_required
+def get_analysis_data(analysis_type):
+    panel_id_arg = request.args.get('panel_id', type=int)
+    shared_instance_id_arg = request.args.get('shared_instance_id', type=int)
+
+    user_for_data_context = current_user
+    base_config_from_db = {}
+
+    recipient_start_date_str = request.args.get('startDate')
+    recipient_end_date_str = request.args.get('endDate')
+
+    active_config_for_query = {}
+    # shared_instance_for_title = None # No longer needed for constructing the main title
+
+    # Determine analysis base title early
+    analysis_details = get_analysis_details(analysis_type)
+    if not analysis_details:
+        return jsonify({"error": f"Analysis type '{analysis_type}' not defined."}), 404
+    base_analysis_title = analysis_details['title'] # This is the "normal name"
+
+    if shared_instance_id_arg:
+        shared_instance = db.session.get(SharedInsightPanel, shared_instance_id_arg)
+        if not shared_instance or shared_instance.recipient_id != current_user.id:
+            return jsonify({"error": "Shared panel not found or not authorized"}), 404
+        if shared_instance.original_panel.analysis_type != analysis_type:
+            return jsonify({"error": "Analysis type mismatch for shared panel"}), 400
+
+        user_for_data_context = shared_instance.sharer
+        base_config_from_db = shared_instance.original_panel.configuration or {}
+        # shared_instance_for_title = shared_instance # Keep if FE needs to know it's shared
+
+        active_config_for_query = base_config_from_db.copy()
+
+        if shared_instance.access_mode == 'fixed':
+            if shared_instance.shared_config:
+                active_config_for_query.update(shared_instance.shared_config)
+        elif shared_instance.access_mode == 'dynamic':
+            if shared_instance.shared_config and 'group_id' in shared_instance.shared_config:
+                active_config_for_query['group_id'] = shared_instance.shared_config['group_id']
+
+            active_config_for_query['startDate'] = recipient_start_date_str
+            active_config_for_query['endDate'] = recipient_end_date_str
+            if not recipient_start_date_str and not recipient_end_date_str:
+                 active_config_for_query['time_period'] = 'all_time'
+                 active_config_for_query.pop('startDate', None)
+                 active_config_for_query.pop('endDate', None)
+            else:
+                 active_config_for_query['time_period'] = 'custom'
+
+    elif panel_id_arg:
+        panel = db.session.get(InsightPanel, panel_id_arg)
+        if not panel or panel.user_id != current_user.id:
+            return jsonify({"error": "Panel not found or not authorized"}), 404
+        if panel.analysis_type != analysis_type:
+             return jsonify({"error": "Analysis type mismatch for panel"}), 400
+
+        user_for_data_context = current_user
+        base_config_from_db = panel.configuration or {}
+        active_config_for_query = base_config_from_db.copy()
+
+    else: # This case is for palette items or temporary panels not yet saved
+        active_config_for_query = analysis_details.get('default_config', {}).copy()
+        user_for_data_context = current_user
+
+    # --- Common Filter Logic (remains largely the same for data querying) ---
+    time_period_str = active_config_for_query.get('time_period', 'all_time')
+    start_date_str = active_config_for_query.get('startDate')
+    end_date_str = active_config_for_query.get('endDate')
+    raw_group_id_filter = active_config_for_query.get('group_id', 'all')
+
+    group_id_to_filter = 'all'
+    # specific_group_name_for_title = None # Not directly used for the main title anymore
+
+    if raw_group_id_filter != 'all':
+        try:
+            gid_int = int(raw_group_id_filter)
+            group_for_filter = db.session.get(Group, gid_int)
+            if group_for_filter and is_group_member(user_for_data_context.id, gid_int):
+                group_id_to_filter = gid_int
+            else:
+                current_app.logger.warning(f"Data context user {user_for_data_context.id} tried to filter by group {gid_int} they are not a member of or doesn't exist for them. Defaulting to 'all'.")
+        except ValueError:
+            current_app.logger.warning(f"Invalid group_id '{raw_group_id_filter}' in config. Defaulting to 'all'.")
+
+    final_start_date = None
+    final_end_date = None
+
+    if start_date_str and end_date_str:
+        try:
+            final_start_date = isoparse(start_date_str).replace(tzinfo=timezone.utc)
+            final_end_date = (isoparse(end_date_str) + timedelta(days=1) - timedelta(microseconds=1)).replace(tzinfo=timezone.utc)
+        except (ValueError, TypeError) as e:
+            current_app.logger.warning(f"Invalid custom date range: {start_date_str} - {end_date_str}. Error: {e}. Falling back.")
+            final_start_date = None; final_end_date = None
+
+    if not final_start_date and time_period_str != 'custom':
+        if time_period_str == 'last_month':
+            final_start_date = datetime.now(timezone.utc) - timedelta(days=30)
+        elif time_period_str == 'last_year':
+            final_start_date = datetime.now(timezone.utc) - timedelta(days=365)
+
+    rsvpd_attending_event_ids_stmt = db.select(EventRSVP.event_id)\
+        .where(EventRSVP.user_id == user_for_data_context.id)\
+        .where(EventRSVP.status == 'attending')
+    rsvpd_attending_event_ids = db.session.scalars(rsvpd_attending_event_ids_stmt).all()
+
+    if not rsvpd_attending_event_ids:
+        return jsonify({
+            "analysis_type": analysis_type,
+            "title": base_analysis_title, # Use simple base title
+            "data": [],
+            "config_used": active_config_for_query
+        })
+
+    # SQL queries for group_accessible_event_ids_sq, invited_event_ids_sq,
+    # and final_event_ids_to_query_stmt remain the same as before.
+    # ...
+    group_accessible_stmt = db.select(Event.id).distinct()\
+        .join(Node, Event.node_id == Node.id)\
+        .join(Group, Node.group_id == Group.id)\
+        .join(GroupMember, Group.id == GroupMember.group_id)\
+        .where(GroupMember.user_id == user_for_data_context.id)\
+        .where(Event.id.in_(rsvpd_attending_event_ids))
+    
+    if group_id_to_filter != 'all': 
+        group_accessible_stmt = group_accessible_stmt.where(Group.id == group_id_to_filter)
+    
+    group_accessible_event_ids_sq = group_accessible_stmt.subquery()
+
+    invited_accessible_stmt = db.select(Event.id).distinct()\
+        .join(InvitedGuest, Event.id == InvitedGuest.event_id)\
+        .where(InvitedGuest.email == user_for_data_context.email)\
+        .where(Event.id.in_(rsvpd_attending_event_ids))
+
+    if group_id_to_filter != 'all': 
+        invited_accessible_stmt = invited_accessible_stmt\
+            .join(Node, Event.node_id == Node.id, isouter=True) \
+            .where( 
+                or_(Event.node_id.is_(None), Node.group_id == group_id_to_filter)
+            )
+            
+    invited_event_ids_sq = invited_accessible_stmt.subquery()
+
+    final_event_ids_to_query_stmt = db.select(Event.id).distinct()\
+        .where(
+            or_( 
+                Event.id.in_(db.select(group_accessible_event_ids_sq.c.id)),
+                Event.id.in_(db.select(invited_event_ids_sq.c.id))
+            )
+        )
+    
+    if final_start_date:
+        final_event_ids_to_query_stmt = final_event_ids_to_query_stmt.where(Event.date >= final_start_date)
+    if final_end_date:
+        final_event_ids_to_query_stmt = final_event_ids_to_query_stmt.where(Event.date <= final_end_date)
+
+    final_event_ids_list = db.session.scalars(final_event_ids_to_query_stmt).all()
+    # ...
+
+    if not final_event_ids_list:
+        return jsonify({
+            "analysis_type": analysis_type,
+            "title": base_analysis_title, # Use simple base title
+            "data": [],
+            "config_used": active_config_for_query
+        })
+
+    # --- Analysis Specific Logic ---
+    # The title sent back will be the base_analysis_title.
+    # The frontend can decide if it needs to add "(No Data)" based on the data array.
+
+    if analysis_type == 'spending-by-category':
+        stmt = db.select(
+                Node.label.label('category'),
+                func.sum(Event.cost_value).label('total_cost')
+            ).select_from(Event) \
+            .join(Node, Event.node_id == Node.id) \
+            .where(Event.id.in_(final_event_ids_list)) \
+            .where(Event.cost_value.isnot(None)) \
+            .where(Event.cost_value > 0) \
+            .group_by(Node.label).order_by(func.sum(Event.cost_value).desc())
+        
+        results = db.session.execute(stmt).all()
+        analysis_data = [{"category": row.category, "amount": round(row.total_cost or 0, 2)} for row in results]
+        
+        return jsonify({
+            "analysis_type": analysis_type,
+            "title": base_analysis_title, # Use simple base title
+            "data": analysis_data,
+            "config_used": active_config_for_query
+        })
+
+    elif analysis_type == 'event-location-heatmap':
+        events_with_coords_stmt = db.select(Event.location_coordinates)\
+            .where(Event.id.in_(final_event_ids_list))\
+            .where(Event.location_coordinates.isnot(None))
+        
+        coordinate_strings = db.session.scalars(events_with_coords_stmt).all()
+        
+        heatmap_points = []
+        for coord_str in coordinate_strings:
+            try:
+                lat_str, lng_str = coord_str.split(',')
+                lat = float(lat_str.strip())
+                lng = float(lng_str.strip())
+                heatmap_points.append([lat, lng]) 
+            except (ValueError, AttributeError) as e:
+                current_app.logger.warning(f"Could not parse coordinates: '{coord_str}'. Error: {e}")
+                continue
+        
+        return jsonify({
+            "analysis_type": analysis_type,
+            "title": base_analysis_title, # Use simple base title
+            "data": heatmap_points,
+            "config_used": active_config_for_query
+        })
+    else:
+        return jsonify({"error": f"Analysis type '{analysis_type}' not implemented or not configured correctly."}), 404
+
+@bp.route('/api/insights/panels', methods=['POST'])
+@login_required
+def add_insight_panel():
+    data = request.get_json()
+    if not data or 'analysis_type' not in data:
+        return jsonify({"error": "Missing 'analysis_type' in request body"}), 400
+
+    analysis_type = data['analysis_type']
+    details = get_analysis_details(analysis_type)
+
+    if not details:
+        return jsonify({"error": f"Invalid analysis type: {analysis_type}"}), 400
+
+    max_order_val = db.session.scalar( 
+        db.select(func.max(InsightPanel.display_order)).where(InsightPanel.user_id == current_user.id)
+    )
+    next_order = (max_order_val + 1) if max_order_val is not None else 0
+    
+    panel_config = details.get('default_config', {}).copy()
+    if 'configuration' in data and isinstance(data['configuration'], dict):
+        panel_config.update(data['configuration'])
+
+
+    new_panel = InsightPanel(
+        user_id=current_user.id,
+        analysis_type=analysis_type,
+        title=details['title'], 
+        description=details['description'],
+        display_order=next_order,
+        configuration=panel_config 
+    )
+    db.session.add(new_panel)
+    db.session.commit()
+    return jsonify(new_panel.to_dict()), 201
+
+
+@bp.route('/api/insights/panels/<int:panel_id>', methods=['PATCH']) 
+@login_required
+def update_insight_panel_config(panel_id):
+    panel = db.session.get(InsightPanel, panel_id)
+    if not panel:
+        return jsonify({"error": "Panel not found"}), 404
+    if panel.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json()
+    if 'configuration' not in data or not isinstance(data['configuration'], dict):
+        return jsonify({"error": "Missing or invalid 'configuration' in request body"}), 400
+
+    if panel.configuration is None:
+        panel.configuration = {}
+    
+    current_config = panel.configuration.copy() 
+    current_config.update(data['configuration'])
+    panel.configuration = current_config
+    
+    db.session.commit()
+    return jsonify(panel.to_dict())
+
+
+@bp.route('/api/insights/panels/order', methods=['PUT'])
+@login_required
+def update_panel_order():
+    data = request.get_json()
+    if not data or 'panel_ids' not in data or not isinstance(data['panel_ids'], list):
+        return jsonify({"error": "Missing or invalid 'panel_ids' list in request body"}), 400
+
+    panel_ids_ordered = []
+    for panel_id_str in data['panel_ids']:
+        try:
+            panel_ids_ordered.append(int(panel_id_str))
+        except (ValueError, TypeError):
+            current_app.logger.warning(f"User {current_user.id} sent invalid panel ID '{panel_id_str}' in reorder request.")
+
+    # Ids the user does not own simply match no row of the scoped UPDATE
+    updated_panels = reorder(InsightPanel, panel_ids_ordered, InsightPanel.user_id == current_user.id)
+    panels_data = [panel.to_dict() for panel in updated_panels]  # serialize before commit expires them
+    db.session.commit()
+    return jsonify(panels_data)
+
+
+@bp.route('/api/insights/panels/<int:panel_id>', methods=['DELETE'])
+@login_required
+def delete_insight_panel(panel_id):
+    panel = db.session.get(InsightPanel, panel_id)
+
+    if not panel:
+        return jsonify({"error": "Panel not found"}), 404
+
+    if panel.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized to delete this panel"}), 403
+
+    db.session.delete(panel)
+    db.session.commit()
+    return jsonify({"success": True, "message": "Panel deleted successfully."})
@@ -0,0 +1,105 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app
+from app import db
+from app.forms import EditProfileForm, HandleFriendRequestForm
+from flask_login import current_user, login_required
+from app.models import User, Group, GroupMember, Post, InsightPanel
+from app.pagination import keyset_paginate
+from app.analyses import AVAILABLE_ANALYSES
+from app.routes.common import keyset_args
+
+bp = Blueprint('main', __name__)
+
+
+@bp.route('/', methods=['GET', 'POST'])
+@bp.route('/index', methods=['GET', 'POST'])
+def index():
+    return render_template('index.html', title='Home')
+
+
+@bp.route('/profile')
+@login_required
+def profile():
+    return render_template('profile.html', user=current_user)
+
+@bp.route('/explore')
+@login_required
+def explore():
+    return render_template('explore.html', title='Explore')
+
+
+@bp.route('/planner')
+@login_required
+def planner():
+    """Renders the main planner interface, including the Insights view."""
+    user_panels_query = db.select(InsightPanel)\
+        .where(InsightPanel.user_id == current_user.id)\
+        .order_by(InsightPanel.display_order)
+    user_panels = db.session.scalars(user_panels_query).all()
+
+    user_groups = Group.query.join(GroupMember).filter(GroupMember.user_id == current_user.id).options(
+         # Add options like load_only or joinedload if fetching related data
+     ).order_by(Group.name).all()
+
+    available_analyses_list = list(AVAILABLE_ANALYSES.values())
+    is_mobile_on_load = 'Mobi' in request.headers.get('User-Agent', '')
+
+    return render_template(
+        'planner.html',
+        title='Planner',
+        groups=user_groups, 
+        is_mobile_on_load=is_mobile_on_load,
+        available_analyses=available_analyses_list,
+        user_panels=user_panels
+    )
+
+
+@bp.route('/edit_profile', methods=['GET', 'POST'])
+@login_required
+def edit_profile():
+    form = EditProfileForm(current_user.username)
+    if form.validate_on_submit():
+        current_user.username = form.username.data
+        current_user.about_me = form.about_me.data
+        db.session.commit()
+        flash('Your changes have been saved.', 'success')
+        return redirect(url_for('main.user', username=current_user.username)) 
+    elif request.method == 'GET':
+        form.username.data = current_user.username
+        form.about_me.data = current_user.about_me
+    return render_template('edit_profile.html', title='Edit Profile', form=form)
+
+
+@bp.route('/user/<username>')
+@login_required
+def user(username):
+    user_obj = db.session.scalar(db.select(User).filter_by(username=username)) # Renamed to user_obj to avoid conflict
+    if user_obj is None:
+        abort(404)
+
+    posts_query = db.select(Post).where(Post.user_id == user_obj.id).options(Post.author_loader())
+    posts_page = keyset_paginate(posts_query, Post.timestamp, Post.id, current_app.config['POSTS_PER_PAGE'], **keyset_args())
+
+    form = HandleFriendRequestForm()
+    form.receiver_username.data = user_obj.username
+
+    shared_groups = []
+    if user_obj != current_user:
+        current_user_group_ids = {gm.group_id for gm in current_user.groups}
+        target_user_group_ids = {gm.group_id for gm in user_obj.groups} # Use user_obj
+        shared_group_ids = current_user_group_ids.intersection(target_user_group_ids)
+        if shared_group_ids:
+            shared_groups = db.session.scalars(
+                db.select(Group).where(Group.id.in_(shared_group_ids)).order_by(Group.name)
+            ).unique().all()
+
+    # _group.html lists the viewer's groups with their members; load them up front instead of per group
+    member_groups = db.session.scalars(
+        db.select(Group).join(GroupMember).where(GroupMember.user_id == current_user.id)
+        .options(Group.members_loader()).order_by(Group.name)
+    ).unique().all()
+
+    return render_template('user.html', user=user_obj, posts=posts_page.items, total_posts=posts_page.total, # Use user_obj
+                           next_url=url_for('main.user', username=user_obj.username, after=posts_page.next_cursor) if posts_page.has_next else None,
+                           prev_url=url_for('main.user', username=user_obj.username, before=posts_page.prev_cursor) if posts_page.has_prev else None,
+                           form=form, groups=shared_groups, # groups here refers to shared_groups
+                           member_groups=member_groups)
@@ -0,0 +1,54 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, abort, current_app
+from app import db
+from app.forms import MessageForm
+from flask_login import current_user, login_required
+from app.models import User, Message
+from app.pagination import keyset_paginate
+from app.notifications import notify
+from app.writer import run_write
+from app.routes.common import keyset_args, thread_query
+
+bp = Blueprint('messages', __name__)
+
+
+@bp.route('/send_message/<recipient_username>', methods=['GET', 'POST']) # Changed param name
+@login_required
+def send_message(recipient_username): # Changed param name
+    user_recipient = db.session.scalar(db.select(User).filter_by(username=recipient_username)) # Use new param name
+    if not user_recipient:
+        abort(404)
+    form = MessageForm()
+    if form.validate_on_submit():
+        message_id = run_write(save_message, current_user.id, user_recipient.id, form.message.data)
+        notify([user_recipient.id], 'message.new', message_id=message_id, sender_id=current_user.id)
+        flash('Your message has been sent.')
+        return redirect(url_for('main.user', username=recipient_username)) # Use new param name
+
+    thread_page = keyset_paginate(thread_query(current_user.id, user_recipient.id), Message.timestamp, Message.id,
+                                  current_app.config['POSTS_PER_PAGE'], **keyset_args())
+    return render_template('send_message.html', title='Send Message', form=form, recipient=recipient_username, # Use new param name
+                           thread=list(reversed(thread_page.items)), # oldest first, like a chat
+                           older_url=url_for('messages.send_message', recipient_username=recipient_username, after=thread_page.next_cursor) if thread_page.has_next else None,
+                           newer_url=url_for('messages.send_message', recipient_username=recipient_username, before=thread_page.prev_cursor) if thread_page.has_prev else None)
+
+def save_message(sender_id, recipient_id, body):
+    """Write for run_write(): stores a message and returns its id."""
+    msg = Message(sender_id=sender_id, recipient_id=recipient_id, body=body)
+    db.session.add(msg)
+    db.session.flush()
+    return msg.id
+
+@bp.route('/messages')
+@login_required
+def messages():
+    if current_user.mark_messages_read():
+        db.session.commit()
+
+    messages_query = db.select(Message)\
+        .where(Message.recipient_id == current_user.id)\
+        .options(Message.sender_loader())
+    messages_page = keyset_paginate(messages_query, Message.timestamp, Message.id, current_app.config['POSTS_PER_PAGE'], **keyset_args())
+    
+    return render_template('messages.html', messages=messages_page.items, total_messages=messages_page.total,
+                           next_url=url_for('messages.messages', after=messages_page.next_cursor) if messages_page.has_next else None,
+                           prev_url=url_for('messages.messages', before=messages_page.prev_cursor) if messages_page.has_prev else None)
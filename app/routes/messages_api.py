@@ -0,0 +1,74 @@
+from flask import Blueprint, jsonify, Response, stream_with_context, current_app
+from app import db
+from flask_login import current_user, login_required
+from app.models import User, Message
+from app.pagination import keyset_paginate
+from app.notifications import event_stream
+from app.routes.common import keyset_args, thread_query, conversations_query, with_partners
+
+bp = Blueprint('messages_api', __name__)
+
+
+@bp.route('/api/me/conversations', methods=['GET'])
+@login_required
+def get_my_conversations():
+    query, ranked = conversations_query(current_user)
+    threads_page = keyset_paginate(query, ranked.c.timestamp, ranked.c.id, current_app.config['CONVERSATIONS_PER_PAGE'],
+                                   scalars=False, **keyset_args())
+    conversations_data = [{
+        "partner": {"id": partner.id, "username": partner.username, "avatar_url": partner.avatar(36)},
+        "last_message": {
+            "id": row.id,
+            "body": row.body,
+            "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+            "sender_id": row.sender_id,
+            "is_from_me": row.sender_id == current_user.id
+        },
+        "unread_count": row.unread_count or 0
+    } for row, partner in with_partners(threads_page.items)]
+    return jsonify({
+        "conversations": conversations_data,
+        "next_cursor": threads_page.next_cursor,
+        "prev_cursor": threads_page.prev_cursor,
+        "total": threads_page.total
+    })
+
+@bp.route('/api/me/conversations/<int:partner_id>', methods=['GET'])
+@login_required
+def get_conversation_thread(partner_id):
+    partner = db.session.get(User, partner_id)
+    if not partner:
+        return jsonify({"error": "User not found"}), 404
+    thread_page = keyset_paginate(thread_query(current_user.id, partner_id), Message.timestamp, Message.id,
+                                  current_app.config['POSTS_PER_PAGE'], **keyset_args())
+    messages_data = [{
+        "id": msg.id,
+        "body": msg.body,
+        "timestamp": msg.timestamp.isoformat() if msg.timestamp else None,
+        "sender_id": msg.sender_id,
+        "is_from_me": msg.sender_id == current_user.id
+    } for msg in thread_page.items]
+    return jsonify({
+        "partner": {"id": partner.id, "username": partner.username, "avatar_url": partner.avatar(36)},
+        "messages": messages_data,
+        "next_cursor": thread_page.next_cursor,
+        "prev_cursor": thread_page.prev_cursor,
+        "total": thread_page.total
+    })
+
+@bp.route("/api/me/stream", methods=["GET"])
+@login_required
+def get_my_stream():
+    user_id = current_user.id
+    db.session.close()  # don't hold a pooled connection for the lifetime of the stream
+    return Response(
+        stream_with_context(event_stream(user_id, current_app.config['NOTIFICATION_HEARTBEAT_SECONDS'])),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route("/api/me/unread", methods=["GET"])
+@login_required
+def get_my_unread():
+    # Served from the counter column already loaded with current_user: no extra query, no write
+    return jsonify({"unread_messages": current_user.new_messages()})
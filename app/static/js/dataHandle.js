@@ -2,6 +2,7 @@
 
 // dataHandler.js
 import { renderGroupEvents } from './eventRenderer.js'; // Import needed for click handler
+import { onLiveUpdate, isLiveUpdatesSupported, getCurrentUserId } from './liveUpdates.js';
 
 export let groupsData = [];
 export let allEventsData = [];
@@ -45,6 +46,34 @@ export function updateHash(view, groupId = null) {
 }
 
 
+// Rebuild the nested [{...node, events: [...]}] shape from the compact columnar
+// /api/groups/<id>/nodes?include=events&format=compact payload
+export function expandColumnarNodes(payload) {
+    if (Array.isArray(payload)) return payload; // already the nested format
+    const { group, nodes: nodeColumns, events: eventColumns } = payload;
+    const nodes = nodeColumns.id.map((id, i) => ({
+        id,
+        label: nodeColumns.label[i],
+        x: nodeColumns.x[i],
+        y: nodeColumns.y[i],
+        group_id: group.id,
+        events: []
+    }));
+    const eventKeys = Object.keys(eventColumns).filter(key => key !== 'node_index');
+    eventColumns.node_index.forEach((nodeIndex, i) => {
+        const event = {
+            node_id: nodes[nodeIndex].id,
+            group_id: group.id,
+            group_name: group.name,
+            is_current_user_group_owner: group.is_current_user_group_owner
+        };
+        eventKeys.forEach(key => { event[key] = eventColumns[key][i]; });
+        nodes[nodeIndex].events.push(event);
+    });
+    return nodes;
+}
+
+
 // --- Data Loading & Processing ---
 
 // Load groups from API and populate the list
@@ -152,4 +181,63 @@ export async function loadAllUserEventsAndProcess() {
 }
 
 
+// --- Live Updates ---
+
+function dispatchEventDataUpdated(eventId, updatedEvent) {
+    document.dispatchEvent(new CustomEvent('eventDataUpdated', {
+        detail: { eventId: parseInt(eventId, 10), updatedEvent },
+        bubbles: true,
+        composed: true
+    }));
+}
+
+function findLoadedEvent(eventId) {
+    return allEventsData.find(e => String(e.id) === String(eventId));
+}
+
+function isAlreadyApplied(event, changes) {
+    return Object.entries(changes).every(([field, value]) => field === 'date'
+        ? (event.date ? event.date.getTime() : null) === (value ? new Date(value).getTime() : null)
+        : event[field] === value);
+}
+
+/**
+ * Applies event and RSVP notifications from the live stream to allEventsData, dispatching
+ * 'eventDataUpdated' for each change (main.js re-renders the affected views) instead of
+ * reloading /api/me/all_events. Only a newly created event is fetched, on its own.
+ */
+export function subscribeToEventUpdates() {
+    if (!isLiveUpdatesSupported()) return;
+
+    onLiveUpdate('event.updated', ({ event_id, changes }) => {
+        const event = findLoadedEvent(event_id);
+        if (!event || !changes || isAlreadyApplied(event, changes)) return; // e.g. our own edit
+        dispatchEventDataUpdated(event_id, { ...event, ...changes });
+    });
+
+    onLiveUpdate('rsvp.changed', ({ event_id, user_id, status }) => {
+        if (String(user_id) !== getCurrentUserId()) return; // others' RSVPs only change the attendee list
+        const event = findLoadedEvent(event_id);
+        if (!event || event.current_user_rsvp_status === status) return;
+        dispatchEventDataUpdated(event_id, { ...event, current_user_rsvp_status: status });
+    });
+
+    onLiveUpdate('event.deleted', ({ event_id, group_id }) => {
+        if (!findLoadedEvent(event_id)) return;
+        dispatchEventDataUpdated(event_id, { id: event_id, group_id, _deleted: true });
+    });
+
+    onLiveUpdate('event.created', async ({ event_id }) => {
+        if (findLoadedEvent(event_id)) return;
+        try {
+            const response = await fetch(`/api/events/${event_id}`);
+            if (!response.ok) throw new Error(`Failed to fetch event ${event_id}: ${response.status}`);
+            dispatchEventDataUpdated(event_id, await response.json());
+        } catch (error) {
+            console.warn("Could not load newly created event:", error);
+        }
+    });
+}
+
+
 // --- END OF FILE dataHandle.js ---
\ No newline at end of file
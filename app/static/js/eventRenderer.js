@@ -2,11 +2,12 @@
 // REVISED: Export layoutInstances
 
 // eventRenderer.js
-import { groupsData, allEventsData, eventsByDate } from './dataHandle.js';
+import { groupsData, allEventsData, eventsByDate, expandColumnarNodes } from './dataHandle.js';
 import { OrbitLayoutManager } from './orbitLayoutDOM.js';
 import { getTransformState } from './viewportManager.js';
 // NEW: Import for event creation modal
 import { openEventCreationModal } from './eventCreationModalManager.js';
+import { queueNodePosition } from './nodePositionSync.js';
 
 
 const eventPanelsContainer = document.getElementById('event-panels-container');
@@ -419,25 +420,7 @@ function makeDraggableNode(element) {
         if (nodeId) {
             const x = parseFloat(element.style.left) || 0;
             const y = parseFloat(element.style.top) || 0;
-
-            const csrfTokenMeta = document.querySelector('meta[name="csrf-token"]');
-            const headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            };
-            if (csrfTokenMeta) {
-                headers['X-CSRFToken'] = csrfTokenMeta.getAttribute('content');
-            } else {
-                console.warn("CSRF token meta tag not found. Node update PATCH request may fail.");
-            }
-
-            fetch(`/api/nodes/${nodeId}`, {
-                method: 'PATCH',
-                headers: headers,
-                body: JSON.stringify({ x, y })
-            })
-            .then(res => { if (!res.ok) console.error(`Failed to update node ${nodeId} pos.`); })
-            .catch(err => console.error(`Error updating node ${nodeId}:`, err));
+            queueNodePosition(element.dataset.groupId || getActiveGroupId(), nodeId, x, y);
         }
     }
     element.addEventListener('pointerdown', onPointerDown);
@@ -464,6 +447,7 @@ export function createNodeElement(node) {
     el.className = 'event-node';
     el.id = `node-${node.id}`;
     el.dataset.nodeId = node.id;
+    if (node.group_id) el.dataset.groupId = node.group_id;
     el.style.left = `${Number(node.x || 0)}px`;
     el.style.top = `${Number(node.y || 0)}px`;
     el.style.position = 'absolute';
@@ -657,9 +641,9 @@ export async function renderGroupEvents(groupId) {
     eventPanelsContainer.innerHTML = '<div class="loading-indicator">Loading events...</div>';
 
     try {
-        const res = await fetch(`/api/groups/${groupId}/nodes?include=events`);
+        const res = await fetch(`/api/groups/${groupId}/nodes?include=events&format=compact`);
         if (!res.ok) throw new Error(`Failed to fetch group nodes/events: ${res.status} ${res.statusText}`);
-        const groupNodesData = await res.json(); 
+        const groupNodesData = expandColumnarNodes(await res.json());
 
         layoutInstances.forEach((instance, nodeEl) => {
             try { instance.destroy(); }
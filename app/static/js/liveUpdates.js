@@ -0,0 +1,55 @@
+// --- START OF FILE static/js/liveUpdates.js ---
+
+// Single shared EventSource on /api/me/stream. Modules register handlers for
+// notification types ('message.new', 'rsvp.changed', 'event.updated',
+// 'event.created', 'event.deleted', 'membership.changed', 'group.updated')
+// and apply the compact payloads to the data they already hold, instead of
+// polling or refetching whole resources:
+//   rsvp.changed       {event_id, user_id, username, avatar_url, status}  (an attendee entry)
+//   event.updated      {event_id, fields, changes: {field: new value}}
+//   event.created      {event_id}   event.deleted {event_id}
+//   membership.changed {group_id, added_user_ids}   group.updated {group_id}
+
+let eventSource = null;
+const handlersByType = new Map();
+
+function ensureConnected() {
+    if (eventSource || typeof EventSource === 'undefined') return;
+    eventSource = new EventSource('/api/me/stream');
+    eventSource.onerror = () => {
+        // The browser reconnects on its own (server sends retry: 5000); nothing to do here
+        console.debug("Live updates stream interrupted, waiting for reconnect.");
+    };
+    handlersByType.forEach((_, type) => attachType(type));
+}
+
+function attachType(type) {
+    eventSource.addEventListener(type, (e) => {
+        let payload;
+        try {
+            payload = JSON.parse(e.data);
+        } catch (err) {
+            console.warn("Ignoring malformed live update:", e.data);
+            return;
+        }
+        (handlersByType.get(type) || []).forEach(handler => handler(payload));
+    });
+}
+
+export function isLiveUpdatesSupported() {
+    return typeof EventSource !== 'undefined';
+}
+
+export function onLiveUpdate(type, handler) {
+    if (!handlersByType.has(type)) {
+        handlersByType.set(type, []);
+        if (eventSource) attachType(type);
+    }
+    handlersByType.get(type).push(handler);
+    ensureConnected();
+}
+
+// Id of the logged-in user, from <meta name="current-user-id"> in base.html, as a string
+export function getCurrentUserId() {
+    return document.querySelector('meta[name="current-user-id"]')?.getAttribute('content') || null;
+}
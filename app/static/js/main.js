@@ -1,7 +1,8 @@
 // --- START OF FILE static/js/main.js ---
 
 // --- Imports ---
-import { loadGroups, groupsData, parseHash, updateHash, loadAllUserEventsAndProcess, allEventsData, eventsByDate } from './dataHandle.js';
+import { loadGroups, groupsData, parseHash, updateHash, loadAllUserEventsAndProcess, allEventsData, eventsByDate, subscribeToEventUpdates } from './dataHandle.js';
+import { onLiveUpdate, isLiveUpdatesSupported, getCurrentUserId } from './liveUpdates.js';
 import { renderGroupEvents, showContextMenu, openDayEventsModal, renderAllEventsList, renderCalendar, hideContextMenu, adjustEventTileSizesIfNeeded } from './eventRenderer.js'; // Added hideContextMenu and adjustEventTileSizesIfNeeded
 import { setupViewSwitching, switchView, hookCalendarNavigation, goBackToGroupList, getCalendarDate } from './viewManager.js';
 import { hookEventFilterBar } from './eventActions.js';
@@ -13,7 +14,7 @@ import { setupGroupSettingsModal, openGroupSettingsModal } from './groupSettings
 import { setupViewportInteractions, getTransformState, setTransformState, debounce } from './viewportManager.js';
 import { setupSearchWidget } from './search.js';
 import { initInsightsManager } from './insightsManager.js';
-import { setupMobileNav } from './navManager.js'; // NEW: Import navManager
+import { setupMobileNav, setupUnreadBadge } from './navManager.js'; // NEW: Import navManager
 
 // --- Global Variables ---
 window.draggingAllowed = true;
@@ -29,6 +30,7 @@ let mainJSInitialized = false; // Flag to prevent re-initialization
 function setupGlobalUI() {
     setupSearchWidget();
     setupMobileNav(); // NEW: Initialize mobile navigation
+    setupUnreadBadge();
 
     const collageViewportElement = document.getElementById('collage-viewport');
     if (collageViewportElement) {
@@ -103,6 +105,8 @@ async function setupPlannerView() {
         await loadGroups();
     }
     await loadAllUserEventsAndProcess();
+    subscribeToEventUpdates();
+    subscribeToMembershipUpdates();
 
     // Handle initial view based on hash
     const { view: initialView, groupId: initialGroupId } = parseHash();
@@ -239,6 +243,11 @@ async function setupPlannerView() {
             }
         }
 
+        // Drop the event's calendar entry before re-adding it, in case its date or title changed
+        Object.keys(eventsByDate).forEach(dateKey => {
+            eventsByDate[dateKey] = eventsByDate[dateKey].filter(e => String(e.id) !== String(eventId));
+            if (eventsByDate[dateKey].length === 0) delete eventsByDate[dateKey];
+        });
         if (!updatedEvent._deleted && updatedEvent.date) {
             const eventDateObj = new Date(updatedEvent.date);
             if (!isNaN(eventDateObj.getTime())) {
@@ -256,14 +265,7 @@ async function setupPlannerView() {
             }
         }
 
-        if (plannerPane?.classList.contains('events-view-active')) {
-            let currentFilter = eventListFilterBar?.querySelector('.filter-pill.active')?.dataset.filter || 'upcoming';
-            renderAllEventsList(currentFilter); // This will also call adjustEventTileSizesIfNeeded
-        }
-        if (plannerPane?.classList.contains('calendar-view-active')) {
-            const calDate = getCalendarDate();
-            renderCalendar(calDate.getFullYear(), calDate.getMonth());
-        }
+        refreshEventViews();
 
         const activeGroupLi = groupListUL?.querySelector('.group-item.active');
         if (activeGroupLi && plannerPane?.offsetParent !== null && 
@@ -305,6 +307,40 @@ async function setupPlannerView() {
     console.log("Main.js: Planner setup complete.");
 }
 
+// Re-renders the events list or calendar, whichever is showing, from allEventsData / eventsByDate
+function refreshEventViews() {
+    if (plannerPane?.classList.contains('events-view-active')) {
+        let currentFilter = eventListFilterBar?.querySelector('.filter-pill.active')?.dataset.filter || 'upcoming';
+        renderAllEventsList(currentFilter); // This will also call adjustEventTileSizesIfNeeded
+    }
+    if (plannerPane?.classList.contains('calendar-view-active')) {
+        const calDate = getCalendarDate();
+        renderCalendar(calDate.getFullYear(), calDate.getMonth());
+    }
+}
+
+// --- Live Group Updates ---
+// Event and RSVP notifications are applied in dataHandle.js. Group changes are rare and only
+// the small group list is reloaded; being added to a group brings in all of its events at once.
+async function reloadGroupList() {
+    const activeGroupId = groupListUL?.querySelector('.group-item.active')?.dataset.groupId;
+    await loadGroups();
+    if (activeGroupId) {
+        groupListUL.querySelector(`.group-item[data-group-id="${activeGroupId}"]`)?.classList.add('active');
+    }
+}
+
+function subscribeToMembershipUpdates() {
+    if (!isLiveUpdatesSupported() || !groupListUL) return;
+    onLiveUpdate('group.updated', reloadGroupList);
+    onLiveUpdate('membership.changed', async ({ added_user_ids }) => {
+        if (!(added_user_ids || []).map(String).includes(getCurrentUserId())) return; // others joining changes nothing shown here
+        await reloadGroupList();
+        await loadAllUserEventsAndProcess();
+        refreshEventViews();
+    });
+}
+
 // --- Group Activation ---
 async function activateGroup(groupListItem, groupId) {
     if (!groupListItem || !groupId) return false;
@@ -1,5 +1,7 @@
 // --- START OF FILE static/js/modalManager.js ---
 
+import { onLiveUpdate, isLiveUpdatesSupported, getCurrentUserId } from './liveUpdates.js';
+
 // --- Date Formatting Helper ---
 function formatEventDateForDisplay(date) {
     if (!date || !(date instanceof Date)) return 'Date not specified';
@@ -367,6 +369,105 @@ async function _fetchEventDetails(eventId) {
     }
 }
 
+// --- Event fields: rendered on open and again when a live update changes the event ---
+function _isEditing(element) {
+    return element.dataset.isEditing === 'true';
+}
+
+function _renderEventFields(eventData) {
+    const canManageEventPermissions = eventData.is_current_user_creator || eventData.is_current_user_group_owner;
+
+    if (eventPermissionsSection) {
+        eventPermissionsSection.style.display = canManageEventPermissions ? 'block' : 'none';
+    }
+    if (eventAllowOthersEditTitleCheckbox) {
+        eventAllowOthersEditTitleCheckbox.checked = eventData.allow_others_edit_title || false;
+        eventAllowOthersEditTitleCheckbox.disabled = !canManageEventPermissions;
+    }
+    if (eventAllowOthersEditDetailsCheckbox) {
+        eventAllowOthersEditDetailsCheckbox.checked = eventData.allow_others_edit_details || false;
+        eventAllowOthersEditDetailsCheckbox.disabled = !canManageEventPermissions;
+    }
+
+
+    if (modalEventImage) modalEventImage.src = eventData.image_url;
+    if (modalGroupName) modalGroupName.textContent = eventData.group_name || 'Group';
+
+    const isMember = eventData.group_id ? true : false; 
+    const canEditTitle = eventData.is_current_user_creator || eventData.is_current_user_group_owner || (eventData.allow_others_edit_title && isMember); 
+    const canEditDetails = eventData.is_current_user_creator || eventData.is_current_user_group_owner || (eventData.allow_others_edit_details && isMember);
+
+    if (modalEventTitle && !_isEditing(modalEventTitle)) {
+        modalEventTitle.textContent = eventData.title || 'Untitled Event';
+        _makeFieldEditable(modalEventTitle, 'title', eventData.title, {}, canEditTitle);
+    }
+    if (modalEventDate && !_isEditing(modalEventDate)) {
+        const d = eventData.date ? new Date(eventData.date) : null; 
+        modalEventDate.textContent = formatEventDateForDisplay(d);
+        _makeFieldEditable(modalEventDate, 'date', d ? d.toISOString() : null, { inputType: 'datetime-local' }, canEditDetails);
+    }
+    if (modalEventLocation && !_isEditing(modalEventLocation)) {
+        const initialLocationData = {
+            text: eventData.location || 'Not specified',
+            coordinates: eventData.location_coordinates || null,
+            predefinedKey: null 
+        };
+        modalEventLocation.textContent = initialLocationData.text;
+        _makeFieldEditable(modalEventLocation, 'location', initialLocationData, { inputType: 'custom-location-map' }, canEditDetails);
+    }
+    
+    if (modalEventCost && !_isEditing(modalEventCost)) {
+        _updateDisplayedCost(eventData); 
+
+        _makeFieldEditable(modalEventCost, 'cost', {
+            raw_input_for_field: eventData.original_input_text || eventData.cost_display || '',
+            standardized_display: eventData.cost_display, 
+            value: eventData.cost_value,
+            is_split_cost: eventData.is_cost_split 
+        }, canEditDetails);
+    }
+
+    if (modalDescriptionWrapper && modalEventDescription && !_isEditing(modalDescriptionWrapper)) {
+        const descContent = eventData.description || 'No description provided.';
+        modalEventDescription.innerHTML = descContent;
+        _makeFieldEditable(modalDescriptionWrapper, 'description', descContent, { inputType: 'textarea', isHTML: true, contentDisplayElementId: 'modal-event-description' }, canEditDetails);
+    }
+}
+
+// Applies the changed fields of an 'event.updated' notification to the open modal
+function _applyEventChanges(changes) {
+    if (!currentEventDataForModal || !changes) return;
+    Object.assign(currentEventDataForModal, changes);
+    _renderEventFields(currentEventDataForModal);
+}
+
+// Inserts, replaces or (status null) removes one attendee, as in /api/events/<id>/attendees
+function _applyAttendeeChange(attendee) {
+    if (!currentEventDataForModal || !attendee) return;
+    const others = (currentEventDataForModal.attendees || []).filter(a => String(a.user_id) !== String(attendee.user_id));
+    currentEventDataForModal.attendees = attendee.status ? [attendee, ...others] : others; // newest RSVP first
+    if (String(attendee.user_id) === getCurrentUserId()) {
+        currentEventDataForModal.current_user_rsvp_status = attendee.status;
+        _updateRSVPButtonState(attendee.status);
+    }
+    _populateAttendeeList(currentEventDataForModal.attendees);
+    if (modalEventCost && !_isEditing(modalEventCost)) _updateDisplayedCost(currentEventDataForModal); // per-person split
+}
+
+function _subscribeToLiveUpdates() {
+    if (!isLiveUpdatesSupported()) return;
+    const isOpen = (eventId) => currentEventId !== null && String(eventId) === String(currentEventId);
+    onLiveUpdate('rsvp.changed', ({ type, event_id, group_id, ...attendee }) => {
+        if (isOpen(event_id)) _applyAttendeeChange(attendee);
+    });
+    onLiveUpdate('event.updated', ({ event_id, changes }) => {
+        if (isOpen(event_id)) _applyEventChanges(changes);
+    });
+    onLiveUpdate('event.deleted', ({ event_id }) => {
+        if (isOpen(event_id)) _closeEventModal();
+    });
+}
+
 // --- EDITABLE FIELD LOGIC ---
 function _makeFieldEditable(targetElement, apiFieldNameOrMode, initialData, config = {}, canEditField = true) {
     if (!targetElement) return;
@@ -902,24 +1003,21 @@ function _setupInternalModalEventListeners() {
 
                 if (!response.ok) { const errorData = await response.json().catch(()=>({ detail: `RSVP Update failed (${response.status})` })); throw new Error(errorData.detail || errorData.error);}
                 const rsvpResult = await response.json();
+                if (String(currentEventId) !== String(eventId)) return; // modal moved on to another event
 
-                const eventResponse = await fetch(`/api/events/${eventId}`); 
-                if (!eventResponse.ok) throw new Error(`Failed to fetch updated event data after RSVP: ${eventResponse.status}`);
-                const fullUpdatedEventFromServer = await eventResponse.json();
-                currentEventDataForModal = fullUpdatedEventFromServer; 
-
+                // The response carries our attendee entry; other members get it as 'rsvp.changed'
+                _applyAttendeeChange(rsvpResult.attendee);
                 _updateRSVPButtonState(rsvpResult.status);
                 if (rsvpConfirmationMessage) { const friendlyStatus = rsvpResult.status ? rsvpResult.status.charAt(0).toUpperCase() + rsvpResult.status.slice(1) : 'cleared'; rsvpConfirmationMessage.textContent = rsvpResult.status ? `Your RSVP is set to ${friendlyStatus}!` : "Your RSVP has been cleared."; setTimeout(() => { if(rsvpConfirmationMessage) rsvpConfirmationMessage.style.display = 'none'; }, 3000);}
 
                 document.dispatchEvent(new CustomEvent('eventDataUpdated', {
                     detail: {
                         eventId: parseInt(eventId, 10),
-                        updatedEvent: fullUpdatedEventFromServer 
+                        updatedEvent: { ...currentEventDataForModal, current_user_rsvp_status: rsvpResult.status }
                     },
                     bubbles: true,
                     composed: true
                 }));
-                await _fetchEventDetails(eventId); 
 
             } catch (error) {
                 console.error("Error updating RSVP:", error);
@@ -974,6 +1072,7 @@ export function setupModal() {
     }
     if (_initializeModalElements()) { 
         _setupInternalModalEventListeners();
+        _subscribeToLiveUpdates();
         console.log("Modal setup complete.");
     }
     else {
@@ -997,64 +1096,7 @@ export async function openEventModal(eventData) {
     currentEventId = eventData.id;
     currentEventDataForModal = eventData; 
 
-    const canManageEventPermissions = eventData.is_current_user_creator || eventData.is_current_user_group_owner;
-
-    if (eventPermissionsSection) {
-        eventPermissionsSection.style.display = canManageEventPermissions ? 'block' : 'none';
-    }
-    if (eventAllowOthersEditTitleCheckbox) {
-        eventAllowOthersEditTitleCheckbox.checked = eventData.allow_others_edit_title || false;
-        eventAllowOthersEditTitleCheckbox.disabled = !canManageEventPermissions;
-    }
-    if (eventAllowOthersEditDetailsCheckbox) {
-        eventAllowOthersEditDetailsCheckbox.checked = eventData.allow_others_edit_details || false;
-        eventAllowOthersEditDetailsCheckbox.disabled = !canManageEventPermissions;
-    }
-
-
-    if (modalEventImage) modalEventImage.src = eventData.image_url;
-    if (modalGroupName) modalGroupName.textContent = eventData.group_name || 'Group';
-
-    const isMember = eventData.group_id ? true : false; 
-    const canEditTitle = eventData.is_current_user_creator || eventData.is_current_user_group_owner || (eventData.allow_others_edit_title && isMember); 
-    const canEditDetails = eventData.is_current_user_creator || eventData.is_current_user_group_owner || (eventData.allow_others_edit_details && isMember);
-
-    if (modalEventTitle) {
-        modalEventTitle.textContent = eventData.title || 'Untitled Event';
-        _makeFieldEditable(modalEventTitle, 'title', eventData.title, {}, canEditTitle);
-    }
-    if (modalEventDate) {
-        const d = eventData.date ? new Date(eventData.date) : null; 
-        modalEventDate.textContent = formatEventDateForDisplay(d);
-        _makeFieldEditable(modalEventDate, 'date', d ? d.toISOString() : null, { inputType: 'datetime-local' }, canEditDetails);
-    }
-    if (modalEventLocation) {
-        const initialLocationData = {
-            text: eventData.location || 'Not specified',
-            coordinates: eventData.location_coordinates || null,
-            predefinedKey: null 
-        };
-        modalEventLocation.textContent = initialLocationData.text;
-        _makeFieldEditable(modalEventLocation, 'location', initialLocationData, { inputType: 'custom-location-map' }, canEditDetails);
-    }
-    
-    if (modalEventCost) {
-        _updateDisplayedCost(eventData); 
-
-        _makeFieldEditable(modalEventCost, 'cost', {
-            raw_input_for_field: eventData.original_input_text || eventData.cost_display || '',
-            standardized_display: eventData.cost_display, 
-            value: eventData.cost_value,
-            is_split_cost: eventData.is_cost_split 
-        }, canEditDetails);
-    }
-
-    if (modalDescriptionWrapper && modalEventDescription) {
-        const descContent = eventData.description || 'No description provided.';
-        modalEventDescription.innerHTML = descContent;
-        _makeFieldEditable(modalDescriptionWrapper, 'description', descContent, { inputType: 'textarea', isHTML: true, contentDisplayElementId: 'modal-event-description' }, canEditDetails);
-    }
-
+    _renderEventFields(eventData);
 
     if (modalRsvpControls) {
         modalRsvpControls.dataset.eventId = eventData.id;
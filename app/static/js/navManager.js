@@ -1,5 +1,7 @@
 // --- START OF FILE static/js/navManager.js ---
 
+import { onLiveUpdate, isLiveUpdatesSupported } from './liveUpdates.js';
+
 let navElement = null; // The main .top-nav bar
 let navToggleBtn = null; // The hamburger button
 let mobileNavPanel = null; // The new mobile panel: #mobile-navigation-panel
@@ -86,4 +88,41 @@ export function setupMobileNav() {
     console.log("Mobile navigation manager initialized (with off-canvas panel).");
 }
 
-// --- END OF FILE static/js/navManager.js ---
\ No newline at end of file
+// --- Unread message badge ---
+const UNREAD_POLL_INTERVAL_MS = 30000;
+let isUnreadBadgeInitialized = false;
+
+async function refreshUnreadBadge() {
+    const badges = document.querySelectorAll('.nav-unread-badge');
+    if (badges.length === 0) return;
+    try {
+        const response = await fetch('/api/me/unread', { headers: { 'Accept': 'application/json' } });
+        if (!response.ok) return;
+        const { unread_messages } = await response.json();
+        badges.forEach(badge => {
+            badge.textContent = unread_messages;
+            badge.hidden = !unread_messages;
+        });
+    } catch (error) {
+        console.warn("Could not refresh unread message count:", error);
+    }
+}
+
+export function setupUnreadBadge() {
+    if (isUnreadBadgeInitialized || document.querySelectorAll('.nav-unread-badge').length === 0) return;
+    isUnreadBadgeInitialized = true;
+    if (isLiveUpdatesSupported()) {
+        // New messages are pushed over the live stream; no polling needed
+        onLiveUpdate('message.new', refreshUnreadBadge);
+        return;
+    }
+    // Only poll while the tab is visible; catch up immediately when it becomes visible again
+    setInterval(() => {
+        if (document.visibilityState === 'visible') refreshUnreadBadge();
+    }, UNREAD_POLL_INTERVAL_MS);
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') refreshUnreadBadge();
+    });
+}
+
+// --- END OF FILE static/js/navManager.js ---
@@ -0,0 +1,56 @@
+// --- START OF FILE static/js/nodePositionSync.js ---
+
+// Coalesces node moves into one PATCH /api/groups/<id>/nodes/positions per group.
+// Callers queue positions as nodes are dropped; the queue is flushed after a short
+// quiet period, so a drag or re-layout that moves many nodes produces one request.
+
+const FLUSH_DELAY_MS = 250;
+
+const pendingByGroup = new Map(); // groupId -> Map(nodeId -> {id, x, y})
+let flushTimer = null;
+
+function buildHeaders() {
+    const headers = { 'Content-Type': 'application/json', 'Accept': 'application/json' };
+    const csrfTokenMeta = document.querySelector('meta[name="csrf-token"]');
+    if (csrfTokenMeta) {
+        headers['X-CSRFToken'] = csrfTokenMeta.getAttribute('content');
+    } else {
+        console.warn("CSRF token meta tag not found. Node positions PATCH request may fail.");
+    }
+    return headers;
+}
+
+export function queueNodePosition(groupId, nodeId, x, y) {
+    if (!groupId || !nodeId) return;
+    if (!pendingByGroup.has(groupId)) pendingByGroup.set(groupId, new Map());
+    pendingByGroup.get(groupId).set(String(nodeId), { id: Number(nodeId), x, y }); // last move wins
+    clearTimeout(flushTimer);
+    flushTimer = setTimeout(() => flushNodePositions(), FLUSH_DELAY_MS);
+}
+
+export function flushNodePositions({ keepalive = false } = {}) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    const requests = [];
+    pendingByGroup.forEach((positionsById, groupId) => {
+        const positions = Array.from(positionsById.values());
+        requests.push(
+            fetch(`/api/groups/${groupId}/nodes/positions`, {
+                method: 'PATCH',
+                headers: buildHeaders(),
+                body: JSON.stringify({ positions }),
+                keepalive
+            })
+            .then(res => { if (!res.ok) console.error(`Failed to save ${positions.length} node position(s) for group ${groupId}.`); })
+            .catch(err => console.error(`Error saving node positions for group ${groupId}:`, err))
+        );
+    });
+    pendingByGroup.clear();
+    return Promise.all(requests);
+}
+
+// Don't lose a pending batch when the user navigates away mid-debounce
+window.addEventListener('pagehide', () => {
+    if (pendingByGroup.size) flushNodePositions({ keepalive: true });
+});
+// --- END OF FILE static/js/nodePositionSync.js ---
@@ -1,7 +1,7 @@
 // --- START OF FILE static/js/sharePanelModalManager.js ---
 let modal, form, closeButtonX, cancelButton, submitButton,
     panelNameDisplay, originalPanelIdInput,
-    friendSearchInput, friendsListContainer, errorMessageElement;
+    friendSearchInput, friendsListContainer, errorMessageElement, groupSelect;
 
 let allFriendsCacheForSharing = [];
 let currentPanelElementForSharing = null; // This will be the DOM element of the panel being shared
@@ -22,6 +22,19 @@ async function fetchFriendsForSharing() {
     }
 }
 
+async function populateGroupsForSharing() {
+    if (!groupSelect) return;
+    groupSelect.length = 1; // keep the "No group" option
+    try {
+        const response = await fetch('/api/groups');
+        if (!response.ok) throw new Error('Failed to fetch groups.');
+        const groups = await response.json();
+        groups.forEach(group => groupSelect.add(new Option(group.name, group.id)));
+    } catch (error) {
+        console.error("Error fetching groups for sharing:", error);
+    }
+}
+
 function populateFriendsListForSharing(friendsToDisplay) {
     if (!friendsListContainer) return;
     friendsListContainer.innerHTML = '';
@@ -77,6 +90,7 @@ function _resetShareModalForm() {
     if (panelNameDisplay) panelNameDisplay.textContent = '';
     if (originalPanelIdInput) originalPanelIdInput.value = '';
     if (friendSearchInput) friendSearchInput.value = '';
+    if (groupSelect) groupSelect.value = '';
     if (errorMessageElement) {
         errorMessageElement.textContent = '';
         errorMessageElement.style.display = 'none';
@@ -111,9 +125,11 @@ async function handleShareSubmit(event) {
     const selectedFriendCheckboxes = friendsListContainer.querySelectorAll('input[name="share_recipient_ids"]:checked');
     const recipient_user_ids = Array.from(selectedFriendCheckboxes).map(cb => parseInt(cb.value, 10));
 
-    if (recipient_user_ids.length === 0) {
+    const share_with_group_id = groupSelect.value ? parseInt(groupSelect.value, 10) : null;
+
+    if (recipient_user_ids.length === 0 && share_with_group_id === null) {
         console.log("[ShareModal] No recipients selected.");
-        errorMessageElement.textContent = 'Please select at least one friend to share with.';
+        errorMessageElement.textContent = 'Please select at least one friend or a group to share with.';
         errorMessageElement.style.display = 'block';
         return;
     }
@@ -140,6 +156,7 @@ async function handleShareSubmit(event) {
 
     const payload = {
         recipient_user_ids,
+        share_with_group_id,
         access_mode,
         current_config_for_fixed_share
     };
@@ -215,6 +232,7 @@ export function openSharePanelModal(panelElement) { // panelElement is the DOM e
     fetchFriendsForSharing().then(friends => {
         populateFriendsListForSharing(friends);
     });
+    populateGroupsForSharing();
 
     modal.style.display = 'flex';
     requestAnimationFrame(() => {
@@ -254,8 +272,9 @@ export function setupSharePanelModal() {
     friendSearchInput = modal.querySelector('#share-panel-friend-search');
     friendsListContainer = modal.querySelector('#share-panel-friends-list-container');
     errorMessageElement = modal.querySelector('#share-panel-error-message');
+    groupSelect = modal.querySelector('#share-panel-group-select');
 
-    if (!form || !panelNameDisplay || !originalPanelIdInput || !closeButtonX || !cancelButton || !submitButton || !friendSearchInput || !friendsListContainer || !errorMessageElement) {
+    if (!form || !panelNameDisplay || !originalPanelIdInput || !closeButtonX || !cancelButton || !submitButton || !friendSearchInput || !friendsListContainer || !errorMessageElement || !groupSelect) {
         console.error("[ShareModal] One or more essential elements for Share Panel Modal are missing. Form:", form, "SubmitBtn:", submitButton);
         modal = null; 
         return;
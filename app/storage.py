@@ -0,0 +1,52 @@
+from functools import partial
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app import db
+
+# SQLite storage profiles (STORAGE_PROFILE / STORAGE_PROFILES in config.py). The 'wal'
+# profile runs the database in write-ahead-log mode, so readers never block the writer and
+# the writer never blocks readers; with synchronous=NORMAL a commit no longer waits for an
+# fsync. busy_timeout makes a second writer wait for the lock instead of failing straight
+# away with "database is locked". Pragmas are per connection, so they are set on every new
+# connection the pool opens.
+
+
+def profile(app):
+    return app.config['STORAGE_PROFILES'][app.config['STORAGE_PROFILE']]
+
+
+def is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def configure(app):
+    """Adds the profile's pool settings to SQLALCHEMY_ENGINE_OPTIONS; must run before db.init_app().
+
+    Only file databases get them: in-memory SQLite uses a single static connection.
+    """
+    options = profile(app)['engine_options']
+    if options and is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+
+
+def init_app(app):
+    with app.app_context():
+        for engine in db.engines.values():
+            init_engine(app, engine)
+
+
+def init_engine(app, engine):
+    """Sets the profile's pragmas on every new connection of a SQLite engine."""
+    pragmas = profile(app)['pragmas']
+    if pragmas and engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', partial(apply_pragmas, pragmas))
+
+
+def apply_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
@@ -0,0 +1,152 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from flask import current_app, jsonify
+from sqlalchemy.engine import make_url
+from app import db
+
+# Optional single-writer queue (WRITE_QUEUE_ENABLED). SQLite allows one writer at a time, so
+# instead of every request thread competing for the lock, short write transactions are
+# handed to one writer thread per worker. The writer runs whatever arrives within
+# WRITE_QUEUE_GROUP_MS in a single transaction with one commit, then hands each result back
+# to the request waiting for it.
+#
+# A write is a function that runs on the writer thread with the writer's own db.session.
+# It must only use its arguments (ids and plain values, not the request's ORM objects) and
+# return plain values too, since its session is closed after the commit. When the queue is
+# disabled run_write() calls the function inline and commits the request session.
+
+
+class WriteQueueBusy(Exception):
+    """The queue is full, or a write did not finish within WRITE_QUEUE_TIMEOUT."""
+
+
+class WriteQueue:
+    def __init__(self, app, maxsize=1000, group_seconds=0.003, max_batch=100):
+        self.app = app
+        self.group_seconds = group_seconds
+        self.max_batch = max_batch
+        self._jobs = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs) and returns a Future for its result."""
+        self._ensure_started()
+        future = Future()
+        try:
+            self._jobs.put_nowait((fn, args, kwargs, future))
+        except queue.Full:
+            raise WriteQueueBusy("Too many pending writes") from None
+        return future
+
+    def _ensure_started(self):
+        # Started on first use rather than at import, so pre-forking servers start one per worker
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                    self._thread.start()
+                    atexit.register(self.stop)
+
+    def stop(self, timeout=5):
+        """Commits what is already queued, then ends the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._jobs.put(None, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            batch = [job]
+            deadline = time.monotonic() + self.group_seconds
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._jobs.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._jobs.put(None)  # stop once this batch is committed
+                    break
+                batch.append(job)
+            # A fresh app context per batch: its teardown removes the session, and nothing
+            # cached on g (such as membership sets) outlives the batch
+            with self.app.app_context():
+                self._commit([job for job in batch if job[3].set_running_or_notify_cancel()])
+
+    def _commit(self, batch):
+        if not batch:
+            return
+        try:
+            results = [fn(*args, **kwargs) for fn, args, kwargs, _ in batch]
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0][3].set_exception(exc)
+                return
+            # One bad write must not fail the others: the rollback undid them all, so retry each alone
+            for job in batch:
+                self._commit([job])
+            return
+        for (_, _, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def init_app(app):
+    # In-memory SQLite is one connection shared by every thread, so the writer thread would
+    # run inside the requests' transactions; it only applies to databases with real connections
+    in_memory = make_url(app.config['SQLALCHEMY_DATABASE_URI']).database in (None, '', ':memory:')
+    if app.config['WRITE_QUEUE_ENABLED'] and not in_memory:
+        app.extensions['write_queue'] = WriteQueue(
+            app, maxsize=app.config['WRITE_QUEUE_SIZE'], group_seconds=app.config['WRITE_QUEUE_GROUP_MS'] / 1000,
+            max_batch=app.config['WRITE_QUEUE_MAX_BATCH'])
+    app.register_error_handler(WriteQueueBusy, write_queue_busy)
+
+
+def write_queue_busy(error):
+    response = jsonify({"error": "The server is busy saving other changes, please retry."})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def get_write_queue():
+    return current_app.extensions.get('write_queue')
+
+
+def run_write(fn, *args, **kwargs):
+    """Runs a short write transaction and returns fn's result once it is committed."""
+    write_queue = get_write_queue()
+    if write_queue is None:
+        result = fn(*args, **kwargs)
+        db.session.commit()
+        return result
+    try:
+        return write_queue.submit(fn, *args, **kwargs).result(timeout=current_app.config['WRITE_QUEUE_TIMEOUT'])
+    except FutureTimeoutError:
+        raise WriteQueueBusy("Timed out waiting for the write to commit") from None
+
+
+def submit_write(fn, *args, **kwargs):
+    """Like run_write() but does not wait, for best-effort writes such as activity timestamps.
+
+    Returns False when the write was dropped because the queue is full.
+    """
+    write_queue = get_write_queue()
+    if write_queue is None:
+        fn(*args, **kwargs)
+        db.session.commit()
+        return True
+    try:
+        write_queue.submit(fn, *args, **kwargs)
+    except WriteQueueBusy:
+        return False
+    return True
@@ -6,4 +6,90 @@ class Config(object):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db') 
     SQLALCHEMY_TRACK_MODIFICATIONS = False 
+    # SQLite storage profiles, see app/storage.py: per-connection pragmas, plus pool settings
+    # for file databases. 'wal' suits multi-threaded workers; 'default' leaves SQLite as it is.
+    STORAGE_PROFILE = os.environ.get('STORAGE_PROFILE') or 'wal'
+    STORAGE_PROFILES = {
+        'default': {'pragmas': {}, 'engine_options': {}},
+        'wal': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': 5000, # ms a writer waits for the lock before "database is locked"
+                'mmap_size': 268435456, # 256 MiB of the file read through the page cache
+                'cache_size': -16384, # KiB (16 MiB) per connection
+                'temp_store': 'MEMORY',
+            },
+            'engine_options': {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 10},
+        },
+    }
+    # Single-writer queue, see app/writer.py: short write transactions from all request threads
+    # run on one writer thread per worker and commit in groups. Meant for the 'wal' profile.
+    WRITE_QUEUE_ENABLED = (os.environ.get('WRITE_QUEUE_ENABLED') or '').lower() in ('1', 'true')
+    WRITE_QUEUE_SIZE = 1000 # pending writes before requests get a 503
+    WRITE_QUEUE_GROUP_MS = 3 # how long the writer collects writes to commit together
+    WRITE_QUEUE_MAX_BATCH = 100
+    WRITE_QUEUE_TIMEOUT = 10 # seconds a request waits for its write to commit
+    # Separate database for high-churn tables: with ACTIVITY_DATABASE_URL set, Message lives on
+    # the 'activity' bind (see app/models.py) and is migrated with `flask db upgrade -d migrations/activity`
+    ACTIVITY_DATABASE_URL = os.environ.get('ACTIVITY_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'activity': ACTIVITY_DATABASE_URL} if ACTIVITY_DATABASE_URL else {}
+    # Read replica, see app/replica.py: GET requests read from REPLICA_DATABASE_URL, while writes
+    # and the same client's requests for REPLICA_STICKY_SECONDS after one use the primary.
+    # REPLICA_SNAPSHOT stands in for a replica locally: a copy of the SQLite file (app.replica.db)
+    # refreshed with SQLite's backup API every REPLICA_REFRESH_SECONDS.
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_SNAPSHOT = (os.environ.get('REPLICA_SNAPSHOT') or '').lower() in ('1', 'true')
+    REPLICA_REFRESH_SECONDS = 5
+    REPLICA_STICKY_SECONDS = 10 # longer than the replica is expected to lag
+    # Password hashing, see app/passwords.py: a Werkzeug method with its cost; stored hashes made
+    # with another method are replaced at the user's next login. Hashes run on a bounded pool.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or min(4, os.cpu_count() or 1)) # 0 hashes on the request thread
+    PASSWORD_HASH_QUEUE_SIZE = 32 # hashes waiting or running before logins get a 503
+    PASSWORD_HASH_TIMEOUT = 10 # seconds a request waits for its hash
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') # enables /metrics/password-hashing for requests bearing it
+    # Loading strategy of Group.members; 'joined' restores the old eager behaviour. It is part of
+    # the mapping, which is built when app.models is imported, so only the environment variable
+    # takes effect: setting it on a config class passed to create_app() does nothing.
+    GROUP_MEMBERS_LAZY = os.environ.get('GROUP_MEMBERS_LAZY') or 'select'
+    # Group-id sets behind the home feed and membership checks (app/membership.py) are cached per
+    # request. 'process' also keeps them per worker for GROUP_IDS_CACHE_TTL seconds; only the worker
+    # that handled a membership change sees it at once, so opt in only where that lag is acceptable
+    MEMBERSHIP_CACHE_SCOPE = os.environ.get('MEMBERSHIP_CACHE_SCOPE') or 'request'
+    GROUP_IDS_CACHE_TTL = 60 # seconds; with 'process', other workers may allow a removed member for this long
+    IDENTITY_CACHE_TTL = 10 # seconds the logged-in user's columns are cached per worker (app/identity.py); 0 disables
+    CONVERSATIONS_PER_PAGE = 20
+    # Live notifications (SSE); swap the broker class for a shared one when running several workers
+    NOTIFICATION_BROKER = os.environ.get('NOTIFICATION_BROKER') or 'app.notifications.InProcessBroker'
+    NOTIFICATION_QUEUE_SIZE = 100
+    NOTIFICATION_HEARTBEAT_SECONDS = 15
+    # Server-side node layout (/api/groups/<id>/layout); NumPy is used when installed
+    LAYOUT_NODE_RADIUS = 40 # px, radius of a node with no events
+    LAYOUT_PADDING = 16 # px between packed nodes
+    LAYOUT_ITERATIONS = 300
+    LAYOUT_CACHE_SIZE = 128 # groups kept per process
+    # Response compression and static assets (run `flask compress-static` to precompress)
+    COMPRESS_MIMETYPES = {'application/json', 'text/html'}
+    COMPRESS_MIN_SIZE = 500 # bytes; smaller bodies are sent as-is
+    COMPRESS_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 5
+    STATIC_VERSIONED_URLS = True # /static/_v/<hash>/... URLs for scripts and stylesheets
+    STATIC_VERSIONED_EXTENSIONS = ('.js', '.css')
+    STATIC_IMMUTABLE_MAX_AGE = 31536000 # one year, for versioned URLs and avatars
+    # Identicon avatars served from /avatar/<hash>/<size> (app/avatars.py) instead of gravatar.com
+    AVATAR_CACHE_DIR = os.environ.get('AVATAR_CACHE_DIR') # generated PNGs; defaults to <instance folder>/avatars
+    AVATAR_MIN_SIZE = 16 # px; requested sizes are clamped to this range
+    AVATAR_MAX_SIZE = 512
+    # Worker profiles: which route blueprints (app/routes/) and optional extensions a process
+    # loads, so server-rendered pages and the JSON API (/api/*) can run as separate pools
+    # behind a proxy that routes on the path. 'full' serves everything and runs the flask CLI.
+    WORKER_PROFILE = os.environ.get('WORKER_PROFILE') or 'full'
+    PAGE_BLUEPRINTS = ('main', 'auth', 'friends', 'groups', 'messages')
+    API_BLUEPRINTS = ('friends_api', 'groups_api', 'messages_api', 'events', 'insights')
+    WORKER_PROFILES = {
+        'full': {'blueprints': PAGE_BLUEPRINTS + API_BLUEPRINTS, 'extensions': ('migrate',)},
+        'pages': {'blueprints': PAGE_BLUEPRINTS, 'extensions': ()},
+        'api': {'blueprints': API_BLUEPRINTS, 'extensions': ()},
+    }
     POSTS_PER_PAGE = 5 #Modify this to show more pages once out of testing
\ No newline at end of file
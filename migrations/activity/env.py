@@ -0,0 +1,76 @@
+import logging
+from logging.config import fileConfig
+
+from flask import current_app
+
+from alembic import context
+
+# Environment for the tables on the 'activity' bind (ACTIVITY_DATABASE_URL), which keeps its
+# own alembic_version table in that database. Run with `flask db <command> -d migrations/activity`;
+# the main database is migrated from migrations/ as before.
+BIND_KEY = 'activity'
+
+config = context.config
+
+fileConfig(config.config_file_name)
+logger = logging.getLogger('alembic.env')
+
+target_db = current_app.extensions['migrate'].db
+if BIND_KEY not in target_db.engines:
+    raise RuntimeError(f"The '{BIND_KEY}' bind is not configured; set ACTIVITY_DATABASE_URL first.")
+
+
+def get_engine():
+    return target_db.engines[BIND_KEY]
+
+
+config.set_main_option(
+    'sqlalchemy.url', get_engine().url.render_as_string(hide_password=False).replace('%', '%%'))
+
+
+def get_metadata():
+    return target_db.metadatas[BIND_KEY]
+
+
+def run_migrations_offline():
+    """Run migrations in 'offline' mode, emitting SQL for the bind's database."""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url, target_metadata=get_metadata(), literal_binds=True
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run migrations in 'online' mode against the bind's engine."""
+
+    # this callback is used to prevent an auto-migration from being generated
+    # when there are no changes to the schema
+    def process_revision_directives(context, revision, directives):
+        if getattr(config.cmd_opts, 'autogenerate', False):
+            script = directives[0]
+            if script.upgrade_ops.is_empty():
+                directives[:] = []
+                logger.info('No changes in schema detected.')
+
+    conf_args = dict(current_app.extensions['migrate'].configure_args)
+    if conf_args.get("process_revision_directives") is None:
+        conf_args["process_revision_directives"] = process_revision_directives
+
+    with get_engine().connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=get_metadata(),
+            **conf_args
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
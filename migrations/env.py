@@ -51,6 +51,15 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # Tables moved to another bind (SQLALCHEMY_BINDS) are migrated from their own directory,
+    # e.g. migrations/activity; a copy left in this database must not be autogenerated away
+    if type_ == 'table' and hasattr(target_db, 'metadatas'):
+        return not any(name in metadata.tables
+                       for key, metadata in target_db.metadatas.items() if key is not None)
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -93,6 +102,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
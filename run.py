@@ -10,12 +10,13 @@ if os.path.exists(dotenv_path):
 else:
     print(f"Warning: .flaskenv file not found at {dotenv_path}. Environment variables (like SECRET_KEY) might not be set.")
 
-# --- Step 2: Now import your app and other components ---
-# This assumes your app/__init__.py is correctly setting app.config['SECRET_KEY']
-# using os.environ.get('SECRET_KEY')
-from app import app, db
+# --- Step 2: Now build the app with the factory ---
+# Config reads os.environ (e.g. SECRET_KEY) when it is imported, so this comes after Step 1
+from app import create_app, db
 from app.models import User # Assuming User model is in app/models.py
 
+app = create_app()
+
 # --- Step 3: Shell context processor (this part was fine) ---
 @app.shell_context_processor
 def make_shell_context():
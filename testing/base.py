@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from config import Config
+from app import create_app, db
+
+# Shared setup for the test modules, imported as testing.base: run the tests from the
+# repository root, e.g. python -m unittest testing.test_feed. Every test gets its own app
+# from create_app(), so nothing touches the developer's app.db.
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SECRET_KEY = 'testing'
+    WTF_CSRF_ENABLED = False
+
+
+class AppTestCase(unittest.TestCase):
+    """Builds an app from config_class with empty tables and keeps its app context pushed."""
+    config_class = TestConfig
+
+    def setUp(self):
+        self.app = create_app(self.make_config())
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        for engine in db.engines.values():
+            engine.dispose()
+        self.app_context.pop()
+
+    def make_config(self):
+        return self.config_class
+
+
+class FileDatabaseTestCase(AppTestCase):
+    """AppTestCase on an SQLite file in a temporary directory.
+
+    For tests that need separate connections: with sqlite:// every session and thread shares
+    the one in-memory connection, so one's commit ends another's transaction.
+    """
+
+    def make_config(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        class FileConfig(self.config_class):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(self.directory, 'app.db')
+
+        return FileConfig
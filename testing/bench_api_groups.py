@@ -0,0 +1,74 @@
+import os
+import time
+from sqlalchemy import event
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')  # must be set before the app is imported
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from app import app, db
+from app.models import User, Group, GroupMember
+
+# Run in terminal with command:
+'''
+python -m testing.bench_api_groups
+'''
+
+# Times GET /api/groups for a user who belongs to several large groups and
+# counts the SQL statements issued. Set GROUP_MEMBERS_LAZY=joined in the environment to compare
+# against the old eager-loading behaviour.
+GROUPS = 10
+MEMBERS_PER_GROUP = 500
+ROUNDS = 50
+
+
+def seed():
+    users = [User(username=f"bench_{i}", email=f"bench_{i}@example.com", password_hash="x")
+             for i in range(MEMBERS_PER_GROUP)]
+    db.session.add_all(users)
+    db.session.flush()
+    for g in range(GROUPS):
+        group = Group(name=f"Bench Group {g}", owner_id=users[0].id)
+        db.session.add(group)
+        db.session.flush()
+        db.session.bulk_insert_mappings(GroupMember, [
+            {"user_id": u.id, "group_id": group.id, "is_owner": u is users[0]} for u in users
+        ])
+    db.session.commit()
+    return users[0].id
+
+
+def main():
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        db.create_all()
+        user_id = seed()
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+
+        client.get('/api/groups')  # warm-up
+        statements.clear()
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            response = client.get('/api/groups')
+            assert response.status_code == 200
+        elapsed = time.perf_counter() - start
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+        print(f"GROUP_MEMBERS_LAZY={Group.members.property.lazy} "
+              f"groups={GROUPS} members/group={MEMBERS_PER_GROUP}")
+        print(f"/api/groups: {elapsed / ROUNDS * 1000:.2f} ms/request, "
+              f"{len(statements) / ROUNDS:.1f} statements/request, "
+              f"{len(response.get_data())} bytes")
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Run in terminal with command:
+'''
+python -m testing.bench_import_time
+'''
+
+# Tracks cold-start time: each stage runs in a fresh interpreter so nothing is cached
+# in-process, and the slowest imports of a full start-up are listed from -X importtime.
+ROUNDS = int(os.environ.get('BENCH_ROUNDS', 5))
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV = {**os.environ, 'DATABASE_URL': 'sqlite://', 'SECRET_KEY': 'bench'}
+
+TIMER = "import time; start = time.perf_counter()\n{body}\nprint((time.perf_counter() - start) * 1000)"
+STAGES = (
+    ("import app", "import app"),
+    ("create_app()", "from app import create_app\napp = create_app()"),
+    ("first request", "from app import create_app\napp = create_app()\napp.test_client().get('/login')"),
+)
+
+
+def run(code, *args):
+    return subprocess.run([sys.executable, *args, '-c', code], cwd=ROOT, env=ENV,
+                          capture_output=True, text=True, check=True)
+
+
+def time_stage(body):
+    return statistics.median(float(run(TIMER.format(body=body)).stdout.split()[-1]) for _ in range(ROUNDS))
+
+
+def slowest_imports(body, limit=10):
+    """Self import time in microseconds summed per top-level package, from -X importtime."""
+    totals = {}
+    for line in run(body, '-X', 'importtime').stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+\d+ \| +(\S+)', line)
+        if match:
+            package = match.group(2).split('.')[0]
+            totals[package] = totals.get(package, 0) + int(match.group(1))
+    return sorted(totals.items(), key=lambda item: -item[1])[:limit]
+
+
+def main():
+    print(f"median of {ROUNDS} fresh interpreters")
+    for name, body in STAGES:
+        print(f"{name:>14}: {time_stage(body):8.1f} ms")
+    print("slowest packages to import, up to the first request:")
+    for module, micros in slowest_imports(STAGES[-1][1]):
+        print(f"  {module:<30} {micros / 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from werkzeug.security import generate_password_hash
+from config import Config
+from app import create_app, db
+from app.models import User
+
+# Run in terminal with command:
+'''
+python -m testing.bench_login
+'''
+
+# A login storm against one worker: LOGIN_THREADS request threads post the login form as
+# fast as they can while PROBE_THREADS other threads keep requesting a cheap logged-in
+# endpoint. Runs once hashing on the request threads (PASSWORD_HASH_WORKERS=0) and once on
+# the bounded hashing pool, and reports login throughput, latencies and the pool's metrics.
+LOGIN_THREADS = int(os.environ.get('BENCH_LOGIN_THREADS', 16))
+PROBE_THREADS = int(os.environ.get('BENCH_PROBE_THREADS', 2))
+SECONDS = float(os.environ.get('BENCH_SECONDS', 3))
+METHOD = os.environ.get('BENCH_HASH_METHOD') or 'pbkdf2:sha256:100000'
+POOL_WORKERS = int(os.environ.get('BENCH_POOL_WORKERS') or os.cpu_count() or 1)
+
+
+def percentile(samples, fraction):
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))] * 1000 if samples else 0.0
+
+
+def run(workers, directory):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, f'login-{workers}.db')
+        WTF_CSRF_ENABLED = False
+        PASSWORD_HASH_METHOD = METHOD
+        PASSWORD_HASH_WORKERS = workers
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        users = [User(username=f'user{i}', email=f'user{i}@example.com', password_hash=generate_password_hash('secret', METHOD))
+                 for i in range(LOGIN_THREADS + PROBE_THREADS)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+
+    deadline = time.perf_counter() + SECONDS
+    results, lock = {"login": [], "probe": [], "busy": 0}, threading.Lock()
+
+    def login_worker(index):
+        client = app.test_client()
+        latencies, busy = [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = client.post('/login', data={'username': f'user{index}', 'password': 'secret'})
+            client.get('/logout')
+            if response.status_code == 503:
+                busy += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+        with lock:
+            results["login"] += latencies
+            results["busy"] += busy
+
+    def probe_worker(user_id):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+        latencies = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            client.get('/api/me/unread')
+            latencies.append(time.perf_counter() - started)
+        with lock:
+            results["probe"] += latencies
+
+    threads = [threading.Thread(target=login_worker, args=(i,)) for i in range(LOGIN_THREADS)]
+    threads += [threading.Thread(target=probe_worker, args=(user_ids[LOGIN_THREADS + i],)) for i in range(PROBE_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    pool = app.extensions.get('hashing_pool')
+    with app.app_context():
+        db.engine.dispose()
+    return results, pool.metrics() if pool else None
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"method={METHOD} login threads={LOGIN_THREADS} probe threads={PROBE_THREADS} seconds={SECONDS}")
+        for workers in (0, POOL_WORKERS):
+            results, metrics = run(workers, directory)
+            label = f"pool of {workers}" if workers else "inline"
+            logins, probes = results["login"], results["probe"]
+            print(f"{label:>10}: {len(logins) / SECONDS:7.1f} logins/s "
+                  f"(p50 {percentile(logins, 0.5):6.1f} ms, p99 {percentile(logins, 0.99):6.1f} ms, {results['busy']} busy), "
+                  f"other requests p50 {percentile(probes, 0.5):6.1f} ms, p99 {percentile(probes, 0.99):6.1f} ms, "
+                  f"{len(probes) / SECONDS:6.0f}/s")
+            if metrics:
+                print(f"{'':>10}  pool: {metrics}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
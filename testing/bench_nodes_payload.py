@@ -0,0 +1,89 @@
+import os
+import json
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')  # must be set before the app is imported
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from app import app, db
+from app.models import User, Group, GroupMember, Node, Event, EventRSVP
+
+# Run in terminal with command:
+'''
+python -m testing.bench_nodes_payload
+'''
+
+# Compares the nested and the compact columnar format of
+# GET /api/groups/<id>/nodes?include=events: JSON encode time of the payload,
+# full request time and response bytes.
+NODES = 60
+EVENTS_PER_NODE = 25
+ATTENDEES_PER_EVENT = 5
+ROUNDS = 20
+
+
+def seed():
+    users = [User(username=f"bench_{i}", email=f"bench_{i}@example.com", password_hash="x")
+             for i in range(ATTENDEES_PER_EVENT)]
+    group = Group(name="Bench Board", owner=users[0])
+    db.session.add_all([*users, group])
+    db.session.flush()
+    db.session.add_all([GroupMember(user_id=u.id, group_id=group.id, is_owner=u is users[0]) for u in users])
+    base = datetime(2025, 1, 1)
+    for n in range(NODES):
+        node = Node(label=f"Node {n}", x=float(n * 50), y=float(n * 30), group_id=group.id)
+        db.session.add(node)
+        db.session.flush()
+        db.session.bulk_insert_mappings(Event, [
+            {"title": f"Event {n}.{e}", "date": base + timedelta(days=e), "location": "Perth",
+             "description": "Bring snacks", "node_id": node.id, "creator_id": users[0].id}
+            for e in range(EVENTS_PER_NODE)
+        ])
+    db.session.flush()
+    event_ids = db.session.scalars(db.select(Event.id)).all()
+    db.session.bulk_insert_mappings(EventRSVP, [
+        {"user_id": u.id, "event_id": event_id, "status": "attending"} for event_id in event_ids for u in users
+    ])
+    db.session.commit()
+    return users[0].id, group.id
+
+
+def time_request(client, url):
+    client.get(url)  # warm-up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        response = client.get(url)
+        assert response.status_code == 200
+    return (time.perf_counter() - start) / ROUNDS * 1000, response.get_data()
+
+
+def time_encode(payload):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        json.dumps(payload, separators=(',', ':'))
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+        user_id, group_id = seed()
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+
+        print(f"nodes={NODES} events/node={EVENTS_PER_NODE} attendees/event={ATTENDEES_PER_EVENT}")
+        base_url = f'/api/groups/{group_id}/nodes?include=events'
+        for name, url in (("nested", base_url), ("compact", base_url + '&format=compact')):
+            request_ms, body = time_request(client, url)
+            encode_ms = time_encode(json.loads(body))
+            print(f"{name:>8}: {len(body):>9} bytes, encode {encode_ms:6.2f} ms, request {request_ms:7.2f} ms")
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from sqlalchemy.exc import OperationalError
+
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from config import Config
+from app import create_app, db
+from app.models import User, Group, GroupMember, Post
+
+# Run in terminal with command:
+'''
+python -m testing.bench_sqlite_storage
+'''
+
+# Mixed read/write throughput of a file-backed SQLite database under concurrent worker
+# threads, once with SQLite's defaults (rollback journal, synchronous=FULL) and once with
+# the 'wal' storage profile. Each operation runs in its own app context like a request:
+# reads page through a group's posts, writes insert a post and commit.
+THREADS = int(os.environ.get('BENCH_THREADS', 8))
+SECONDS = float(os.environ.get('BENCH_SECONDS', 3))
+WRITE_SHARE = float(os.environ.get('BENCH_WRITE_SHARE', 0.2))
+SEED_POSTS = 2000
+
+
+def seed():
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    group = Group(name='Bench', owner=user)
+    db.session.add_all([user, group, GroupMember(user=user, group=group, is_owner=True)])
+    db.session.flush()
+    db.session.bulk_insert_mappings(Post, [{"body": f"Post {i}", "user_id": user.id, "group_id": group.id}
+                                           for i in range(SEED_POSTS)])
+    db.session.commit()
+    return user.id, group.id
+
+
+def read(group_id):
+    db.session.scalars(db.select(Post).where(Post.group_id == group_id)
+                       .order_by(Post.timestamp.desc(), Post.id.desc()).limit(20)).all()
+
+
+def write(user_id, group_id):
+    db.session.add(Post(body="Concurrent post", user_id=user_id, group_id=group_id))
+    db.session.commit()
+
+
+def worker(app, user_id, group_id, deadline, counts, lock):
+    rng = random.Random()
+    reads = writes = errors = 0
+    while time.perf_counter() < deadline:
+        with app.app_context():
+            try:
+                if rng.random() < WRITE_SHARE:
+                    write(user_id, group_id)
+                    writes += 1
+                else:
+                    read(group_id)
+                    reads += 1
+            except OperationalError:  # "database is locked"
+                db.session.rollback()
+                errors += 1
+    with lock:
+        counts["reads"] += reads
+        counts["writes"] += writes
+        counts["errors"] += errors
+
+
+def run(storage_profile, directory):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, f'{storage_profile}.db')
+        STORAGE_PROFILE = storage_profile
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        user_id, group_id = seed()
+
+    counts, lock = {"reads": 0, "writes": 0, "errors": 0}, threading.Lock()
+    deadline = time.perf_counter() + SECONDS
+    threads = [threading.Thread(target=worker, args=(app, user_id, group_id, deadline, counts, lock))
+               for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        db.engine.dispose()
+    return counts
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"threads={THREADS} seconds={SECONDS} write share={WRITE_SHARE:.0%}")
+        for storage_profile in ('default', 'wal'):
+            counts = run(storage_profile, directory)
+            total = counts["reads"] + counts["writes"]
+            print(f"{storage_profile:>8}: {total / SECONDS:8.0f} ops/s "
+                  f"({counts['reads'] / SECONDS:7.0f} reads/s, {counts['writes'] / SECONDS:6.0f} writes/s), "
+                  f"{counts['errors']} locked errors")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
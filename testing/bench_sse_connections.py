@@ -0,0 +1,98 @@
+import os
+import socket
+import threading
+import time
+import http.client
+from urllib.parse import urlencode
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')  # must be set before the app is imported
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from werkzeug.serving import make_server
+from app import app, db
+from app.models import User
+from app.notifications import get_broker, notify
+
+# Run in terminal with command:
+'''
+python -m testing.bench_sse_connections
+'''
+
+# Opens many idle /api/me/stream connections against one threaded worker and
+# reports the memory and thread cost per connection, then times how long one
+# notification takes to reach every open stream.
+CONNECTIONS = int(os.environ.get('BENCH_CONNECTIONS', 200))
+
+
+def rss_kib():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def login_cookie(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.request('POST', '/login', body=urlencode({'username': 'bench', 'password': 'bench'}),
+                 headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    cookie = response.getheader('Set-Cookie').split(';', 1)[0]
+    conn.close()
+    return cookie
+
+
+def open_stream(port, cookie):
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(f"GET /api/me/stream HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\n"
+                 f"Accept: text/event-stream\r\n\r\n".encode())
+    received = b''
+    while b'retry:' not in received:  # wait until the stream is subscribed
+        received += sock.recv(4096)
+    return sock
+
+
+def main():
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['NOTIFICATION_HEARTBEAT_SECONDS'] = 60
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cookie = login_cookie(port)
+
+    rss_before, threads_before = rss_kib(), threading.active_count()
+    start = time.perf_counter()
+    streams = [open_stream(port, cookie) for _ in range(CONNECTIONS)]
+    connect_time = time.perf_counter() - start
+    rss_after, threads_after = rss_kib(), threading.active_count()
+
+    print(f"{CONNECTIONS} idle streams opened in {connect_time:.2f}s; "
+          f"broker subscribers={get_broker().connection_count()}")
+    print(f"RSS +{rss_after - rss_before} KiB ({(rss_after - rss_before) / CONNECTIONS:.1f} KiB/connection), "
+          f"threads +{threads_after - threads_before}")
+
+    start = time.perf_counter()
+    with app.app_context():
+        notify([user_id], 'message.new', message_id=1, sender_id=user_id)
+    for sock in streams:
+        received = b''
+        while b'message.new' not in received:
+            received += sock.recv(4096)
+    print(f"fan-out to {CONNECTIONS} streams: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for sock in streams:
+        sock.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
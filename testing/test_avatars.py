@@ -0,0 +1,98 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+from config import Config
+from app import create_app, db
+from app.models import User, Group
+from app.avatars import identicon_url, render_identicon
+from testing.base import TestConfig
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_avatars
+'''
+
+DIGEST = 'd4c74594d841139328695756648b6bd6'  # md5('john@example.com')
+
+
+def decode_png(data):
+    """Width, height and rows of palette indices of an 8-bit palette PNG made by render_identicon."""
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    chunks, position = {}, 8
+    while position < len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        assert struct.unpack('>I', data[position + 8 + length:position + 12 + length])[0] == zlib.crc32(kind + body)
+        chunks[kind] = body
+        position += 12 + length
+    width, height = struct.unpack('>II', chunks[b'IHDR'][:8])
+    raw = zlib.decompress(chunks[b'IDAT'])
+    rows = [raw[y * (width + 1) + 1:(y + 1) * (width + 1)] for y in range(height)]
+    return width, height, rows
+
+
+class AvatarCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+        class AvatarConfig(TestConfig):
+            AVATAR_CACHE_DIR = self.cache_dir
+
+        self.app = create_app(AvatarConfig)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_urls_point_at_the_local_endpoint(self):
+        with self.app.app_context():
+            db.create_all()
+            user = User(username='john', email='John@Example.com', password_hash='x')
+            group = Group(name='Trip')
+            db.session.add_all([user, group])
+            db.session.commit()
+            self.assertEqual(user.avatar(36), f'/avatar/{DIGEST}/36')
+            self.assertEqual(user.avatar(4096), f'/avatar/{DIGEST}/512')  # clamped to AVATAR_MAX_SIZE
+            self.assertEqual(group.avatar, identicon_url(str(group.id), 128))
+            group.avatar_url = 'https://example.com/trip.png'
+            self.assertEqual(group.avatar, 'https://example.com/trip.png')
+            db.drop_all()
+
+    def test_identicon_is_deterministic_and_symmetric(self):
+        png = render_identicon(DIGEST, 40)
+        self.assertEqual(png, render_identicon(DIGEST, 40))
+        self.assertNotEqual(png, render_identicon('0' * 32, 40))
+        width, height, rows = decode_png(png)
+        self.assertEqual((width, height, len(rows)), (40, 40, 40))
+        for row in rows:
+            self.assertEqual(row, row[::-1])
+        self.assertIn(1, b''.join(rows))  # some cells are filled
+
+    def test_endpoint_serves_and_caches_the_png(self):
+        response = self.client.get(f'/avatar/{DIGEST}/36')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/png')
+        self.assertTrue(response.cache_control.immutable)
+        self.assertEqual(response.cache_control.max_age, Config.STATIC_IMMUTABLE_MAX_AGE)
+        self.assertEqual(response.data, render_identicon(DIGEST, 36))
+        response.close()
+
+        cached = os.path.join(self.cache_dir, DIGEST[:2], f'{DIGEST}-36.png')
+        self.assertTrue(os.path.isfile(cached))
+        with open(cached, 'wb') as file:
+            file.write(b'cached')  # a second request is served from disk
+        response = self.client.get(f'/avatar/{DIGEST}/36')
+        self.assertEqual(response.data, b'cached')
+        response.close()
+
+    def test_rejects_bad_hashes_and_sizes(self):
+        self.assertEqual(self.client.get('/avatar/not-a-hash/36').status_code, 404)
+        self.assertEqual(self.client.get(f'/avatar/{DIGEST}/4096').status_code, 404)
+        self.assertEqual(self.client.get(f'/avatar/{DIGEST}/1').status_code, 404)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_binds
+'''
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The bind is chosen when the models are defined, so the app runs in its own interpreter
+BIND_SCRIPT = '''
+import json
+from app import create_app, db
+from app.models import User, Message
+app = create_app()
+app.config['WTF_CSRF_ENABLED'] = False
+with app.app_context():
+    db.create_all()
+    john = User(username='john', email='john@example.com', password_hash='x')
+    susan = User(username='susan', email='susan@example.com', password_hash='x')
+    db.session.add_all([john, susan])
+    db.session.commit()
+    john_id, susan_id = john.id, susan.id
+
+client = app.test_client()
+with client.session_transaction() as sess:
+    sess['_user_id'] = str(john_id)
+sent = client.post('/send_message/susan', data={'message': 'Hi Susan'})
+thread = client.get('/send_message/susan')
+
+with client.session_transaction() as sess:
+    sess['_user_id'] = str(susan_id)
+with app.app_context():
+    unread = db.session.scalar(db.select(User.unread_message_count).filter_by(id=susan_id))
+inbox = client.get('/messages')
+conversations = client.get('/api/me/conversations').get_json()["conversations"]
+
+with app.app_context():
+    sender = db.session.scalars(db.select(Message)).one().sender.username
+    unread_after_reading = db.session.scalar(db.select(User.unread_message_count).filter_by(id=susan_id))
+print(json.dumps({"statuses": [sent.status_code, thread.status_code, inbox.status_code],
+                  "thread_shows_sender": b'john' in thread.data, "inbox_shows_body": b'Hi Susan' in inbox.data,
+                  "unread": unread, "unread_after_reading": unread_after_reading, "sender": sender,
+                  "listed_unread": sum(c["unread_count"] for c in conversations),
+                  "partners": [c["partner"]["username"] for c in conversations]}))
+'''
+
+
+class ActivityBindCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.main_db = os.path.join(self.directory, 'app.db')
+        self.activity_db = os.path.join(self.directory, 'activity.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def tables(self, path):
+        with sqlite3.connect(path) as connection:
+            return {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    def test_messages_live_in_their_own_database(self):
+        result = subprocess.run([sys.executable, '-c', BIND_SCRIPT], cwd=ROOT, capture_output=True, text=True,
+                                env={**os.environ, 'SECRET_KEY': 'testing',
+                                     'DATABASE_URL': 'sqlite:///' + self.main_db,
+                                     'ACTIVITY_DATABASE_URL': 'sqlite:///' + self.activity_db})
+        self.assertEqual(result.returncode, 0, result.stderr)
+        data = json.loads(result.stdout.splitlines()[-1])
+
+        self.assertEqual(data["statuses"], [302, 200, 200])
+        self.assertTrue(data["thread_shows_sender"])
+        self.assertTrue(data["inbox_shows_body"])
+        self.assertEqual(data["unread"], 1)  # counted on the user table in the main database
+        self.assertEqual((data["unread_after_reading"], data["listed_unread"]), (0, 0))  # /messages marked it read
+        self.assertEqual(data["sender"], 'john')
+        self.assertEqual(data["partners"], ['john'])
+
+        self.assertEqual(self.tables(self.activity_db), {'message'})
+        self.assertNotIn('message', self.tables(self.main_db))
+        self.assertIn('user', self.tables(self.main_db))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
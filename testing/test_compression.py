@@ -0,0 +1,94 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from flask import url_for
+from app import create_app, db, compression
+from app.models import User
+from testing.base import TestConfig, AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_compression
+'''
+
+class ResponseCompressionCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User(username='john', email='john@example.com', password_hash='x',
+                         about_me='A fairly long biography. ' * 40)
+        db.session.add(self.user)
+        db.session.commit()
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.user.id)
+
+    def test_html_is_gzipped_when_accepted(self):
+        response = self.client.get('/user/john', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertIn(b'A fairly long biography.', gzip.decompress(response.get_data()))
+
+        plain = self.client.get('/user/john')
+        self.assertNotIn('Content-Encoding', plain.headers)
+
+    def test_small_bodies_are_not_compressed(self):
+        response = self.client.get('/api/me/unread', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_json(), {"unread_messages": 0})
+
+    def test_streamed_chunks_are_flushed_individually(self):
+        chunks = [b'{"part": 1}', b'{"part": 2}', b'{"part": 3}']
+        compressed = list(compression._compress_stream(iter(chunks), 'gzip'))
+        decompressor = zlib.decompressobj(31)
+        # every chunk is decodable on arrival, before the stream ends
+        self.assertEqual([decompressor.decompress(part) for part in compressed[:3]], chunks)
+        self.assertEqual(gzip.decompress(b''.join(compressed)), b''.join(chunks))
+
+
+class StaticAssetsCase(unittest.TestCase):
+    def setUp(self):
+        self.static_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.static_dir, 'js'))
+        with open(os.path.join(self.static_dir, 'js', 'app.js'), 'w') as f:
+            f.write("export const greeting = 'hello';\n" * 100)
+        with open(os.path.join(self.static_dir, 'js', 'tiny.js'), 'w') as f:
+            f.write("export {};\n")
+        self.app = create_app(TestConfig)
+        self.app.static_folder = self.static_dir
+        compression._static_version = None
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        compression._static_version = None
+        shutil.rmtree(self.static_dir)
+
+    def test_build_step_writes_gzip_siblings(self):
+        written = compression.compress_static_files(self.static_dir, self.app.config['COMPRESS_MIN_SIZE'])
+        self.assertEqual(written, 1 if compression.brotli is None else 2)
+        self.assertTrue(os.path.isfile(os.path.join(self.static_dir, 'js', 'app.js.gz')))
+        self.assertFalse(os.path.isfile(os.path.join(self.static_dir, 'js', 'tiny.js.gz')))
+        self.assertEqual(compression.compress_static_files(self.static_dir, self.app.config['COMPRESS_MIN_SIZE']), 0)
+
+    def test_versioned_url_serves_precompressed_file_as_immutable(self):
+        compression.compress_static_files(self.static_dir, self.app.config['COMPRESS_MIN_SIZE'])
+        with self.app.test_request_context():
+            url = url_for('static', filename='js/app.js')
+        self.assertTrue(url.startswith(f'/static/_v/{compression.static_version()}/'))
+
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype, 'text/javascript')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn(b"greeting = 'hello'", gzip.decompress(response.get_data()))
+        response.close()
+
+        stale = self.client.get('/static/_v/0000/js/app.js')
+        self.assertNotIn('immutable', stale.headers.get('Cache-Control', ''))
+        self.assertNotIn('Content-Encoding', stale.headers)
+        stale.close()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
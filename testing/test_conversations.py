@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+import unittest
+from sqlalchemy import event
+from app import db
+from app.models import User, Message
+from testing.base import AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_conversations
+'''
+
+class ConversationsCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.me = User(username='john', email='john@example.com', password_hash='x',
+                       last_message_read_time=datetime(2025, 1, 1, 0, 30))
+        self.partners = [User(username=f'friend{i}', email=f'friend{i}@example.com', password_hash='x') for i in range(3)]
+        db.session.add_all([self.me, *self.partners])
+        db.session.commit()
+
+        base = datetime(2025, 1, 1)
+        def message(sender, recipient, minutes, body):
+            db.session.add(Message(sender_id=sender.id, recipient_id=recipient.id, body=body,
+                                   timestamp=base + timedelta(minutes=minutes)))
+        # friend0: two unread replies, latest is theirs
+        message(self.me, self.partners[0], 10, 'hi 0')
+        message(self.partners[0], self.me, 40, 'reply 0a')
+        message(self.partners[0], self.me, 50, 'reply 0b')
+        # friend1: read reply, then my message is the latest
+        message(self.partners[1], self.me, 20, 'reply 1')
+        message(self.me, self.partners[1], 60, 'hi 1')
+        # friend2: only an old, read message from them
+        message(self.partners[2], self.me, 5, 'reply 2')
+        db.session.commit()
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.me.id)
+
+    def test_latest_message_and_unread_per_partner(self):
+        data = self.client.get('/api/me/conversations').get_json()
+        summary = [(c['partner']['username'], c['last_message']['body'], c['last_message']['is_from_me'], c['unread_count'])
+                   for c in data['conversations']]
+        self.assertEqual(summary, [
+            ('friend1', 'hi 1', True, 0),
+            ('friend0', 'reply 0b', False, 2),
+            ('friend2', 'reply 2', False, 0),
+        ])
+
+    def unread_numbers(self):
+        """The nav badge's count and the sum of the conversation list's unread counts."""
+        with self.app.app_context():  # a fresh g, so current_user is loaded again
+            badge = self.client.get('/api/me/unread').get_json()['unread_messages']
+            conversations = self.client.get('/api/me/conversations').get_json()['conversations']
+        return badge, sum(conversation['unread_count'] for conversation in conversations)
+
+    def test_badge_matches_conversation_unread_counts(self):
+        self.assertEqual(self.unread_numbers(), (2, 2))  # the reply at 0:20 predates the read time
+        # Timestamped after the read time the reset below sets (sent while it runs)
+        later = datetime.now(timezone.utc) + timedelta(minutes=5)
+        db.session.add(Message(sender_id=self.partners[1].id, recipient_id=self.me.id, body='in flight', timestamp=later))
+        db.session.commit()
+        self.assertEqual(self.unread_numbers(), (3, 3))
+
+        with self.app.app_context():
+            self.client.get('/messages')  # marks messages read
+        self.assertEqual(self.unread_numbers(), (1, 1))
+
+    def test_threads_are_keyset_paginated(self):
+        self.app.config['CONVERSATIONS_PER_PAGE'] = 2
+        first = self.client.get('/api/me/conversations').get_json()
+        self.assertEqual([c['partner']['username'] for c in first['conversations']], ['friend1', 'friend0'])
+        second = self.client.get(f"/api/me/conversations?after={first['next_cursor']}").get_json()
+        self.assertEqual([c['partner']['username'] for c in second['conversations']], ['friend2'])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_conversations_use_a_single_query(self):
+        self.client.get('/api/me/conversations')  # warm-up: login bookkeeping
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            self.client.get('/api/me/conversations')
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        message_queries = [sql for sql in statements if 'FROM message' in sql]
+        self.assertEqual(len(message_queries), 1)
+        self.assertIn('row_number() OVER', message_queries[0])
+
+    def test_thread_between_two_users(self):
+        data = self.client.get(f'/api/me/conversations/{self.partners[0].id}').get_json()
+        self.assertEqual([m['body'] for m in data['messages']], ['reply 0b', 'reply 0a', 'hi 0'])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from config import Config
+from app import create_app, db
+from testing.base import TestConfig
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_factory
+'''
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class AuthOnlyConfig(TestConfig):
+    WORKER_PROFILE = 'auth-only'
+    WORKER_PROFILES = {**Config.WORKER_PROFILES, 'auth-only': {'blueprints': ('main', 'auth'), 'extensions': ()}}
+
+
+class AppFactoryCase(unittest.TestCase):
+    def test_each_call_builds_an_independent_app(self):
+        first, second = create_app(TestConfig), create_app(AuthOnlyConfig)
+        self.assertIsNot(first, second)
+        self.assertEqual(set(first.blueprints), set(Config.PAGE_BLUEPRINTS + Config.API_BLUEPRINTS))
+        self.assertEqual(set(second.blueprints), {'main', 'auth'})
+        self.assertIn('groups_api.get_groups', first.view_functions)
+        self.assertNotIn('groups_api.get_groups', second.view_functions)
+
+    def test_app_serves_requests_with_its_own_database(self):
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+            self.assertEqual(app.test_client().get('/login').status_code, 200)
+            self.assertEqual(app.test_client().get('/api/groups').status_code, 302)
+            db.drop_all()
+
+    def test_importing_the_package_does_not_load_routes(self):
+        script = ("import sys, json, app; "
+                  "print(json.dumps(sorted(m for m in sys.modules if m.startswith('app.'))))")
+        result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True,
+                                env={**os.environ, 'DATABASE_URL': 'sqlite://', 'SECRET_KEY': 'testing'})
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout.splitlines()[-1]), ['app.replica'])  # db's session class
+
+
+# Builds an app for one worker profile in a fresh interpreter, serves a page and an API
+# call, and reports the Python memory still allocated plus which optional modules loaded.
+PROFILE_SCRIPT = '''
+import json, sys, tracemalloc
+tracemalloc.start()
+from app import create_app, db
+app = create_app()
+with app.app_context():
+    db.create_all()
+    client = app.test_client()
+    statuses = [client.get('/login').status_code, client.get('/api/groups').status_code]
+print(json.dumps({"allocated": tracemalloc.get_traced_memory()[0], "statuses": statuses,
+                  "modules": [m for m in ("alembic", "app.forms", "app.routes.insights", "app.layout") if m in sys.modules]}))
+'''
+
+
+class WorkerProfileCase(unittest.TestCase):
+    def footprint(self, profile):
+        result = subprocess.run([sys.executable, '-c', PROFILE_SCRIPT], cwd=ROOT, capture_output=True, text=True,
+                                env={**os.environ, 'DATABASE_URL': 'sqlite://', 'SECRET_KEY': 'testing',
+                                     'WORKER_PROFILE': profile})
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout.splitlines()[-1])
+
+    def test_split_profiles_load_less_than_the_full_app(self):
+        full, pages, api = self.footprint('full'), self.footprint('pages'), self.footprint('api')
+
+        self.assertEqual(full["statuses"], [200, 302])
+        self.assertEqual(full["modules"], ["alembic", "app.forms", "app.routes.insights", "app.layout"])
+        self.assertEqual(pages["statuses"], [200, 404])
+        self.assertEqual(pages["modules"], ["app.forms"])
+        self.assertEqual(api["statuses"], [404, 401])  # no login page to redirect to
+        self.assertEqual(api["modules"], ["app.routes.insights", "app.layout"])
+
+        self.assertLess(pages["allocated"], full["allocated"])
+        self.assertLess(api["allocated"], full["allocated"])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+import unittest
+from app import db
+from app.models import User, Post, Group, GroupMember
+from app.membership import user_group_ids, invalidate_user_groups
+from testing.base import AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_feed
+'''
+
+class HomeFeedCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.user = User(username='john', email='john@example.com', password_hash='x')
+        self.groups = [Group(name=f'Group {i}') for i in range(3)]
+        db.session.add_all([self.user, *self.groups])
+        db.session.commit()
+        for group in self.groups[:2]:
+            db.session.add(GroupMember(user_id=self.user.id, group_id=group.id))
+
+        # Interleave timestamps across groups so the feed has to merge them
+        base = datetime(2025, 1, 1)
+        for i in range(6):
+            group = self.groups[i % 3]
+            db.session.add(Post(body=f'post {i} in {group.name}', user_id=self.user.id, group_id=group.id,
+                                timestamp=base + timedelta(minutes=i)))
+        db.session.commit()
+        invalidate_user_groups(self.user.id)
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.user.id)
+
+    def test_feed_merges_member_groups_only(self):
+        data = self.client.get('/api/me/feed').get_json()
+        self.assertEqual([p['body'] for p in data['posts']],
+                         ['post 4 in Group 1', 'post 3 in Group 0', 'post 1 in Group 1', 'post 0 in Group 0'])
+        self.assertIsNone(data['next_cursor'])
+        self.assertIsNone(data['total'])
+
+    def test_group_ids_cache_invalidated_on_join(self):
+        self.assertEqual(user_group_ids(self.user.id), {self.groups[0].id, self.groups[1].id})
+        db.session.add(GroupMember(user_id=self.user.id, group_id=self.groups[2].id))
+        db.session.commit()
+        self.assertEqual(user_group_ids(self.user.id), {g.id for g in self.groups})
+
+        data = self.client.get('/api/me/feed').get_json()
+        self.assertEqual(data['posts'][0]['body'], 'post 5 in Group 2')
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
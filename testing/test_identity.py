@@ -0,0 +1,133 @@
+import unittest
+from sqlalchemy import event
+from app import db
+from app.models import User, Message
+from app.identity import Identity, load_identity, _identity_cache
+from testing.base import AppTestCase, FileDatabaseTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_identity
+'''
+
+class IdentityCacheCase(AppTestCase):
+    # Requests run outside self.app_context: a pushed app context would be shared by every
+    # request, and Flask-Login keeps the loaded user on it (g._login_user)
+    def setUp(self):
+        super().setUp()
+        self.john = User(username='john', email='john@example.com', about_me='Hi')
+        self.john.set_password('cat')
+        self.susan = User(username='susan', email='susan@example.com', password_hash='x')
+        db.session.add_all([self.john, self.susan])
+        db.session.commit()
+        self.john_id, self.susan_id = self.john.id, self.susan.id
+        self.app_context.pop()
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.john_id)
+
+    def tearDown(self):
+        self.app_context.push()  # popped at the end of setUp
+        super().tearDown()
+
+    def user_queries(self, path):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.get(path)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        return response, [sql for sql in statements if 'FROM user' in sql]
+
+    def test_repeat_requests_load_the_user_from_the_cache(self):
+        self.client.get('/api/me/unread')  # fills the cache
+        response, queries = self.user_queries('/api/me/unread')
+        self.assertEqual(response.get_json(), {"unread_messages": 0})
+        self.assertEqual(queries, [])
+
+    def test_new_message_invalidates_the_unread_count(self):
+        self.client.get('/api/me/unread')
+        with self.app.app_context():
+            db.session.add(Message(sender_id=self.susan_id, recipient_id=self.john_id, body='hello'))
+            db.session.commit()
+        self.assertEqual(self.client.get('/api/me/unread').get_json(), {"unread_messages": 1})
+
+    def test_profile_edit_and_password_change_invalidate(self):
+        self.client.get('/api/me/unread')
+        self.assertIn(self.john_id, _identity_cache)
+        response = self.client.post('/edit_profile', data={'username': 'johnny', 'about_me': 'Updated'})
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(self.john_id, _identity_cache)
+
+        with self.app.app_context():
+            self.assertEqual(load_identity(self.john_id).username, 'johnny')
+            db.session.get(User, self.john_id).set_password('dog')
+            db.session.commit()
+        self.assertNotIn(self.john_id, _identity_cache)
+
+    def test_identity_upgrades_to_the_orm_user_on_demand(self):
+        with self.app.app_context():
+            identity = load_identity(self.john_id)
+            self.assertIsInstance(identity, Identity)
+            self.assertEqual(identity.avatar(36), '/avatar/d4c74594d841139328695756648b6bd6/36')
+            self.assertIsNone(identity._user)  # columns and avatar() came from the cache
+
+            john, susan = db.session.get(User, self.john_id), db.session.get(User, self.susan_id)
+            self.assertFalse(identity.is_friend(susan))  # a User method: loads the ORM User
+            self.assertIs(identity._user, john)
+            self.assertEqual(identity, john)
+            self.assertTrue(identity.check_password('cat'))
+
+    def test_missing_user_is_not_logged_in(self):
+        with self.app.app_context():
+            self.assertIsNone(load_identity(12345))
+
+
+class CommitWindowCase(FileDatabaseTestCase):
+    # A file database, so a request can read the committed row while another session holds
+    # an uncommitted change. Requests run outside self.app_context, as in IdentityCacheCase.
+    def setUp(self):
+        super().setUp()
+        john = User(username='john', email='john@example.com', password_hash='x')
+        susan = User(username='susan', email='susan@example.com', password_hash='x')
+        db.session.add_all([john, susan])
+        db.session.commit()
+        self.john_id, self.susan_id = john.id, susan.id
+        self.app_context.pop()
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.john_id)
+
+    def tearDown(self):
+        self.app_context.push()  # popped at the end of setUp
+        super().tearDown()
+
+    def unread(self):
+        with self.app.app_context():  # its own session and connection
+            return self.client.get('/api/me/unread').get_json()['unread_messages']
+
+    def test_load_between_flush_and_commit_is_not_kept(self):
+        self.assertEqual(self.unread(), 0)
+        with self.app.app_context():
+            db.session.add(Message(sender_id=self.susan_id, recipient_id=self.john_id, body='hello'))
+            db.session.flush()  # counted, not yet committed
+            self.assertEqual(self.unread(), 0)  # another request caches the committed count meanwhile
+            db.session.commit()
+        self.assertEqual(self.unread(), 1)
+
+    def test_rolled_back_change_leaves_the_cache(self):
+        self.assertEqual(self.unread(), 0)
+        with self.app.app_context():
+            db.session.add(Message(sender_id=self.susan_id, recipient_id=self.john_id, body='hello'))
+            db.session.flush()
+            db.session.rollback()
+        self.assertIn(self.john_id, _identity_cache)
+        self.assertEqual(self.unread(), 0)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+from datetime import datetime
+import itertools
+import math
+import unittest
+from app import db
+from app.models import User, Group, GroupMember, Node, Event
+from app import layout
+from testing.base import AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_layout
+'''
+
+class GroupLayoutCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.user = User(username='john', email='john@example.com', password_hash='x')
+        self.group = Group(name='Canvas')
+        self.nodes = [Node(label=f'Node {i}', x=0.0, y=0.0, group=self.group) for i in range(30)]
+        db.session.add_all([self.user, self.group, *self.nodes, GroupMember(user=self.user, group=self.group)])
+        db.session.flush()
+        for i, node in enumerate(self.nodes[:5]):
+            db.session.add_all([Event(title=f'Event {i}.{j}', date=datetime(2025, 1, 1), location='Perth', node_id=node.id) for j in range(i * 3)])
+        db.session.commit()
+        self.group_id = self.group.id
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.user.id)
+
+    def test_packed_nodes_do_not_overlap(self):
+        placed = layout.group_layout(self.group_id)["nodes"]
+        self.assertEqual(len(placed), 30)
+        for a, b in itertools.combinations(placed, 2):
+            self.assertGreaterEqual(math.hypot(a["x"] - b["x"], a["y"] - b["y"]) + 1, a["radius"] + b["radius"])
+        self.assertTrue(all(node["x"] - node["radius"] >= 0 and node["y"] - node["radius"] >= 0 for node in placed))
+        busiest = max(placed, key=lambda node: node["radius"])
+        self.assertEqual(busiest["id"], self.nodes[4].id)
+
+    def test_layout_is_cached_until_node_version_changes(self):
+        first = layout.group_layout(self.group_id)
+        self.assertIs(layout.group_layout(self.group_id), first)
+
+        db.session.add(Event(title='One more', date=datetime(2025, 1, 2), location='Perth', node_id=self.nodes[10].id))
+        db.session.commit()
+        self.assertNotEqual(layout.group_layout(self.group_id)["version"], first["version"])
+
+    @unittest.skipIf(layout.np is None, "NumPy not installed")
+    def test_numpy_and_python_solvers_agree(self):
+        weights = layout.node_weights(self.group_id)
+        vectorized = layout.compute_layout(weights)
+        numpy_module, layout.np = layout.np, None
+        try:
+            fallback = layout.compute_layout(weights)
+        finally:
+            layout.np = numpy_module
+        for a, b in zip(vectorized, fallback):
+            self.assertAlmostEqual(a["x"], b["x"], delta=0.5)
+            self.assertAlmostEqual(a["y"], b["y"], delta=0.5)
+
+    def test_coincident_start_points_are_pushed_apart(self):
+        start = [(0.0, 0.0)] * 4 + [(100.0, 0.0)] * 2
+        radii = [40.0] * 6
+        solvers = [layout._relax_python] + ([layout._relax_numpy] if layout.np is not None else [])
+        results = [relax(start, radii, 16, 300) for relax in solvers]
+        for positions in results:
+            self.assertTrue(all(math.isfinite(value) for point in positions for value in point))
+            for (ax, ay), (bx, by) in itertools.combinations(positions, 2):
+                self.assertGreaterEqual(math.hypot(ax - bx, ay - by) + 1, 80 + 16)
+        for a, b in zip(results[0], results[-1]):  # the solvers pick the same directions
+            self.assertAlmostEqual(a[0], b[0], delta=0.5)
+            self.assertAlmostEqual(a[1], b[1], delta=0.5)
+
+    def test_layout_endpoint_supports_conditional_get(self):
+        response = self.client.get(f'/api/groups/{self.group_id}/layout')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()["nodes"]), 30)
+        cached = self.client.get(f'/api/groups/{self.group_id}/layout',
+                                 headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,172 @@
+import unittest
+from contextlib import contextmanager
+from sqlalchemy import delete, event
+from app import db
+from app.models import User, Group, GroupMember
+from app.notifications import get_broker
+from app.membership import add_group_members, user_group_ids, invalidate_user_groups
+from app.routes.common import is_group_member
+from testing.base import TestConfig, AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_membership
+'''
+
+class ProcessCacheConfig(TestConfig):
+    MEMBERSHIP_CACHE_SCOPE = 'process'
+
+
+class BulkMembershipCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.owner = User(username='john', email='john@example.com', password_hash='x')
+        self.users = [User(username=f'user{i}', email=f'user{i}@example.com', password_hash='x') for i in range(30)]
+        self.group = Group(name='Big Group', owner=self.owner)
+        db.session.add_all([self.owner, *self.users, self.group])
+        db.session.commit()
+        db.session.add_all([GroupMember(user_id=self.owner.id, group_id=self.group.id, is_owner=True),
+                            GroupMember(user_id=self.users[0].id, group_id=self.group.id)])
+        db.session.commit()
+
+    def member_ids(self):
+        return set(db.session.scalars(db.select(GroupMember.user_id).filter_by(group_id=self.group.id)).all())
+
+    def test_skips_unknown_existing_and_excluded_users(self):
+        requested = [user.id for user in self.users] + [9999]
+        added = add_group_members(self.group.id, requested, exclude={self.users[1].id})
+        db.session.commit()
+        self.assertEqual(added, sorted(user.id for user in self.users[2:]))
+        self.assertEqual(self.member_ids(), {self.owner.id, *(user.id for user in self.users if user is not self.users[1])})
+
+    def test_round_trips_do_not_grow_with_member_count(self):
+        user_ids, group_id = [user.id for user in self.users], self.group.id
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            add_group_members(group_id, user_ids)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertEqual(len(statements), 3)  # validate, diff, executemany insert
+
+    def test_bulk_insert_invalidates_group_cache(self):
+        self.assertEqual(user_group_ids(self.users[5].id), frozenset())
+        add_group_members(self.group.id, [self.users[5].id])
+        db.session.commit()
+        self.assertEqual(user_group_ids(self.users[5].id), frozenset({self.group.id}))
+
+    def test_update_group_api_adds_members_in_bulk(self):
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(self.owner.id)
+        added_id = self.users[3].id
+        subscription = get_broker().subscribe(added_id)
+        try:
+            response = client.patch(f'/api/groups/{self.group.id}',
+                                    json={"add_member_ids": [self.users[0].id, added_id, 9999]})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.member_ids(), {self.owner.id, self.users[0].id, added_id})
+            self.assertEqual(subscription.get_nowait(), {"type": "membership.changed", "group_id": self.group.id,
+                                                         "added_user_ids": [added_id]})
+        finally:
+            get_broker().unsubscribe(added_id, subscription)
+
+
+class MembershipCacheCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.owner = User(username='john', email='john@example.com', password_hash='x')
+        self.friends = [User(username=f'friend{i}', email=f'friend{i}@example.com', password_hash='x') for i in range(10)]
+        self.group = Group(name='Board', owner=self.owner)
+        db.session.add_all([self.owner, *self.friends, self.group])
+        db.session.commit()
+        for friend in self.friends:
+            self.owner.add_friend(friend)
+        db.session.add_all([GroupMember(user_id=self.owner.id, group_id=self.group.id, is_owner=True),
+                            GroupMember(user_id=self.friends[0].id, group_id=self.group.id)])
+        db.session.commit()
+        self.owner_id, self.group_id = self.owner.id, self.group.id
+
+    @contextmanager
+    def request(self):
+        # With its own app context: a request pushed inside self.app_context would share its `g`
+        with self.app.app_context(), self.app.test_request_context():
+            yield
+
+    def membership_queries(self, action):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            result = action()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        return result, [sql for sql in statements if 'FROM group_member' in sql]
+
+    def test_repeated_checks_in_a_request_query_once(self):
+        invalidate_user_groups(self.owner_id)
+        with self.app.test_request_context():
+            checks, queries = self.membership_queries(lambda: [
+                is_group_member(self.owner_id, self.group_id), is_group_member(self.owner_id, 12345),
+                self.owner.is_member(self.group_id)])
+        self.assertEqual(checks, [True, False, True])
+        self.assertEqual(len(queries), 1)
+
+    def test_removal_elsewhere_is_seen_by_the_next_request(self):
+        friend_id = self.friends[0].id
+        with self.request():
+            self.assertTrue(is_group_member(friend_id, self.group_id))
+        # A Core DELETE skips the mapper events, as a removal handled by another worker would
+        db.session.execute(delete(GroupMember).where(GroupMember.user_id == friend_id))
+        db.session.commit()
+        with self.request():
+            self.assertFalse(is_group_member(friend_id, self.group_id))
+
+    def test_add_members_page_checks_all_friends_with_one_query(self):
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(self.owner_id)
+        for friend in self.friends:
+            invalidate_user_groups(friend.id)
+        response, queries = self.membership_queries(lambda: client.get(f'/group/{self.group_id}/add_members'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(b'friend0<', response.data)  # already a member
+        self.assertIn(b'friend9', response.data)
+        self.assertLessEqual(len(queries), 3)  # require_group_member, the group's members, the friends' groups
+
+
+class ProcessMembershipCacheCase(MembershipCacheCase):
+    config_class = ProcessCacheConfig
+
+    def test_removal_elsewhere_is_seen_by_the_next_request(self):
+        # The lag MEMBERSHIP_CACHE_SCOPE = 'process' opts into: until GROUP_IDS_CACHE_TTL runs
+        # out, a removal this worker did not handle still lets the member through
+        friend_id = self.friends[0].id
+        with self.request():
+            self.assertTrue(is_group_member(friend_id, self.group_id))
+        db.session.execute(delete(GroupMember).where(GroupMember.user_id == friend_id))
+        db.session.commit()
+        with self.request():
+            self.assertTrue(is_group_member(friend_id, self.group_id))
+        invalidate_user_groups(friend_id)
+        with self.request():
+            self.assertFalse(is_group_member(friend_id, self.group_id))
+
+    def test_process_cache_is_versioned_by_membership_writes(self):
+        with self.request():
+            self.assertEqual(user_group_ids(self.friends[1].id), frozenset())
+        with self.request():
+            _, queries = self.membership_queries(lambda: user_group_ids(self.friends[1].id))
+            self.assertEqual(queries, [])  # served by the worker cache
+
+            db.session.add(GroupMember(user_id=self.friends[1].id, group_id=self.group_id))
+            db.session.commit()
+            self.assertTrue(self.friends[1].is_member(self.group_id))  # this request sees its own write
+        with self.request():
+            self.assertEqual(user_group_ids(self.friends[1].id), frozenset({self.group_id}))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
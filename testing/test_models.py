@@ -1,25 +1,15 @@
 from datetime import datetime, timedelta, timezone
 import unittest
-from app import app, db
+from app import db
 from app.models import User, Post, Group, GroupMember, FriendRequest
+from testing.base import AppTestCase
 
 # Run in terminal with command: 
 '''
 python -m unittest testing.test_models
 '''
 
-class UserModelCase(unittest.TestCase):
-    def setUp(self):
-        self.app_context = app.app_context()
-        self.app_context.push()
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-        db.create_all()
-
-    def tearDown(self):
-        db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
-
+class UserModelCase(AppTestCase):
     def test_password_hashing(self):
         u = User(username='susan')
         u.set_password('cat')  # Ensure the password is hashed before being stored
@@ -29,9 +19,7 @@ class UserModelCase(unittest.TestCase):
     def test_avatar(self):
         u = User(username='john', email='john@example.com')
         u.set_password('password')  # Ensure password is set
-        self.assertEqual(u.avatar(128), ('https://www.gravatar.com/avatar/'
-                                         'd4c74594d841139328695756648b6bd6'
-                                         '?d=identicon&s=128'))
+        self.assertEqual(u.avatar(128), '/avatar/d4c74594d841139328695756648b6bd6/128')
 
     def test_add_friend(self):
         # Create two users
@@ -98,18 +86,7 @@ class UserModelCase(unittest.TestCase):
         self.assertTrue(u1.is_friend(u2))
         self.assertTrue(u2.is_friend(u1))
 
-class GroupModelCase(unittest.TestCase):
-    def setUp(self):
-        self.app_context = app.app_context()
-        self.app_context.push()
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
-        db.create_all()
-
-    def tearDown(self):
-        db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
-
+class GroupModelCase(AppTestCase):
     def test_create_group(self):
         # Create a test user
         u1 = User(username="johndoe", email="johndoe@example.com")
@@ -0,0 +1,58 @@
+from datetime import datetime
+import unittest
+from app import db
+from app.models import User, Group, GroupMember, Node, Event, EventRSVP
+from testing.base import AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_nodes_payload
+'''
+
+class CompactNodesPayloadCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.user = User(username='john', email='john@example.com', password_hash='x')
+        group = Group(name='Board', owner=self.user)
+        nodes = [Node(label=f'Node {i}', x=float(i), y=float(i * 2), group=group) for i in range(3)]
+        db.session.add_all([self.user, group, *nodes, GroupMember(user=self.user, group=group, is_owner=True)])
+        db.session.flush()
+        for i, node in enumerate(nodes[:2]):
+            for j in range(2):
+                event = Event(title=f'Event {i}.{j}', date=datetime(2025, 1, 1 + j), location='Perth',
+                              node_id=node.id, creator_id=self.user.id)
+                db.session.add(event)
+                db.session.flush()
+                if j == 0:
+                    db.session.add(EventRSVP(user_id=self.user.id, event_id=event.id, status='attending'))
+        db.session.commit()
+        self.group_id = group.id
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.user.id)
+
+    def expand(self, payload):
+        """Python twin of expandColumnarNodes() in dataHandle.js."""
+        group, node_columns, event_columns = payload["group"], payload["nodes"], payload["events"]
+        nodes = [{"id": node_id, "label": node_columns["label"][i], "x": node_columns["x"][i], "y": node_columns["y"][i],
+                  "group_id": group["id"], "events": []} for i, node_id in enumerate(node_columns["id"])]
+        for i, node_index in enumerate(event_columns["node_index"]):
+            event = {key: values[i] for key, values in event_columns.items() if key != "node_index"}
+            event.update(node_id=nodes[node_index]["id"], group_id=group["id"], group_name=group["name"],
+                         is_current_user_group_owner=group["is_current_user_group_owner"])
+            nodes[node_index]["events"].append(event)
+        return nodes
+
+    def test_compact_format_round_trips_to_nested_format(self):
+        nested = self.client.get(f'/api/groups/{self.group_id}/nodes?include=events').get_json()
+        compact = self.client.get(f'/api/groups/{self.group_id}/nodes?include=events&format=compact').get_json()
+        self.assertEqual(compact["format"], "columnar")
+        self.assertEqual(compact["events"]["node_index"], [0, 0, 1, 1])
+        self.assertEqual(self.expand(compact), nested)
+        self.assertEqual([e["current_user_rsvp_status"] for node in nested for e in node["events"]],
+                         ['attending', None, 'attending', None])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
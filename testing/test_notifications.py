@@ -0,0 +1,116 @@
+import json
+import unittest
+from app import db
+from datetime import datetime
+from app.models import User, Group, GroupMember, Node, Event
+from app.notifications import InProcessBroker, get_broker, notify_group
+from testing.base import AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_notifications
+'''
+
+class BrokerCase(unittest.TestCase):
+    def test_publish_reaches_only_subscribed_users(self):
+        broker = InProcessBroker(queue_size=2)
+        first_tab, second_tab = broker.subscribe(1), broker.subscribe(1)
+        other_user = broker.subscribe(2)
+        broker.publish([1], {"type": "message.new"})
+        self.assertEqual(first_tab.get_nowait(), {"type": "message.new"})
+        self.assertEqual(second_tab.get_nowait(), {"type": "message.new"})
+        self.assertTrue(other_user.empty())
+
+        broker.unsubscribe(1, first_tab)
+        broker.unsubscribe(1, second_tab)
+        self.assertEqual(broker.connection_count(), 1)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        broker = InProcessBroker(queue_size=1)
+        slow_client = broker.subscribe(1)
+        broker.publish([1], {"type": "a"})
+        broker.publish([1], {"type": "b"})
+        self.assertEqual(slow_client.get_nowait(), {"type": "a"})
+        self.assertTrue(slow_client.empty())
+
+
+class StreamCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User(username='john', email='john@example.com', password_hash='x')
+        self.group = Group(name='Live Group')
+        db.session.add_all([self.user, self.group])
+        db.session.commit()
+        db.session.add(GroupMember(user_id=self.user.id, group_id=self.group.id))
+        db.session.commit()
+        self.user_id, self.group_id = self.user.id, self.group.id  # the stream closes the session
+
+    def test_stream_delivers_group_notifications(self):
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(self.user_id)
+        response = client.get('/api/me/stream', buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        frames = iter(response.response)
+        self.assertTrue(next(frames).decode().startswith('retry:'))
+
+        connections_before = get_broker().connection_count()
+        self.assertGreaterEqual(connections_before, 1)
+        notify_group(self.group_id, 'event.updated', event_id=7)
+        frame = next(frames).decode()
+        self.assertTrue(frame.startswith('event: event.updated\n'))
+        payload = json.loads(frame.split('data: ', 1)[1])
+        self.assertEqual(payload, {"type": "event.updated", "group_id": self.group_id, "event_id": 7})
+
+        response.close()
+        self.assertEqual(get_broker().connection_count(), connections_before - 1)
+
+
+class EventPayloadCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User(username='john', email='john@example.com', password_hash='x')
+        self.group = Group(name='Live Group')
+        db.session.add_all([self.user, self.group])
+        db.session.commit()
+        self.group.owner_id = self.user.id
+        node = Node(label='Park', x=0.0, y=0.0, group_id=self.group.id)
+        db.session.add_all([GroupMember(user_id=self.user.id, group_id=self.group.id), node])
+        db.session.commit()
+        event = Event(title='Picnic', date=datetime(2030, 6, 1, 12), location='Park', node_id=node.id, creator_id=self.user.id)
+        db.session.add(event)
+        db.session.commit()
+        self.user_id, self.group_id, self.event_id = self.user.id, self.group.id, event.id
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.user_id)
+        self.subscription = get_broker().subscribe(self.user_id)
+
+    def tearDown(self):
+        get_broker().unsubscribe(self.user_id, self.subscription)
+        super().tearDown()
+
+    def test_rsvp_carries_the_attendee_entry(self):
+        response = self.client.post(f'/api/events/{self.event_id}/rsvp', json={'status': 'attending'})
+        self.assertEqual(response.status_code, 201)
+        attendee = {'user_id': self.user_id, 'username': 'john',
+                    'avatar_url': db.session.get(User, self.user_id).avatar(40), 'status': 'attending'}
+        self.assertEqual(response.get_json()['attendee'], attendee)
+        self.assertEqual(self.subscription.get_nowait(),
+                         {'type': 'rsvp.changed', 'group_id': self.group_id, 'event_id': self.event_id, **attendee})
+
+        response = self.client.post(f'/api/events/{self.event_id}/rsvp', json={'status': None})
+        self.assertIsNone(response.get_json()['attendee']['status'])
+        self.assertIsNone(self.subscription.get_nowait()['status'])
+
+    def test_update_carries_the_changed_values(self):
+        response = self.client.patch(f'/api/events/{self.event_id}', json={'title': 'Barbecue', 'cost_display': '$5'})
+        self.assertEqual(response.status_code, 200)
+        payload = self.subscription.get_nowait()
+        self.assertEqual(payload['type'], 'event.updated')
+        self.assertEqual(payload['event_id'], self.event_id)
+        self.assertEqual(payload['changes'], {'title': 'Barbecue', 'cost_display': '$5'})
+        self.assertTrue(self.subscription.empty())
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
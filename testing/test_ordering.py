@@ -0,0 +1,91 @@
+import unittest
+from sqlalchemy import event
+from app import db
+from app.models import User, Group, GroupMember, Node, InsightPanel
+from app.ordering import bulk_update
+from testing.base import AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_ordering
+'''
+
+class BulkReorderCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.me = User(username='john', email='john@example.com', password_hash='x')
+        self.other = User(username='susan', email='susan@example.com', password_hash='x')
+        self.panels = [InsightPanel(user=self.me, analysis_type='spending-by-category', title=f'Panel {i}', display_order=i)
+                       for i in range(4)]
+        self.foreign_panel = InsightPanel(user=self.other, analysis_type='spending-by-category', title='Theirs', display_order=0)
+        db.session.add_all([self.me, self.other, *self.panels, self.foreign_panel])
+        db.session.commit()
+        self.panel_ids = [panel.id for panel in self.panels]
+        self.foreign_panel_id = self.foreign_panel.id
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.me.id)
+
+    def test_reorder_is_one_statement_and_returns_new_order(self):
+        new_order = [self.panel_ids[2], self.panel_ids[0], self.foreign_panel_id, self.panel_ids[3], self.panel_ids[1]]
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.put('/api/insights/panels/order', json={"panel_ids": new_order})
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([panel['id'] for panel in response.get_json()],
+                         [self.panel_ids[2], self.panel_ids[0], self.panel_ids[3], self.panel_ids[1]])
+        panel_statements = [sql for sql in statements if 'insight_panel' in sql]
+        self.assertEqual(len(panel_statements), 1)
+        self.assertIn('CASE', panel_statements[0])
+        self.assertEqual(db.session.get(InsightPanel, self.foreign_panel_id).display_order, 0)
+
+    def test_bulk_update_sets_several_columns_per_row(self):
+        group = Group(name='Canvas')
+        nodes = [Node(label=f'Node {i}', x=0.0, y=0.0, group=group) for i in range(3)]
+        db.session.add_all([group, *nodes])
+        db.session.commit()
+        matched = bulk_update(Node, {nodes[0].id: {"x": 10.0, "y": 20.0}, nodes[2].id: {"x": 5.0}},
+                              Node.group_id == group.id)
+        db.session.commit()
+        self.assertEqual(matched, 2)
+        self.assertEqual([(node.x, node.y) for node in db.session.scalars(db.select(Node).order_by(Node.id))],
+                         [(10.0, 20.0), (0.0, 0.0), (5.0, 0.0)])
+
+    def test_node_positions_endpoint_updates_group_nodes_in_one_statement(self):
+        group, other_group = Group(name='Canvas'), Group(name='Elsewhere')
+        nodes = [Node(label=f'Node {i}', x=0.0, y=0.0, group=group) for i in range(3)]
+        foreign_node = Node(label='Foreign', x=1.0, y=1.0, group=other_group)
+        db.session.add_all([group, other_group, *nodes, foreign_node, GroupMember(user=self.me, group=group)])
+        db.session.commit()
+        group_id, other_group_id, node_ids, foreign_node_id = group.id, other_group.id, [n.id for n in nodes], foreign_node.id
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.patch(f'/api/groups/{group_id}/nodes/positions', json={"positions": [
+                {"id": node_ids[0], "x": 10, "y": 20}, [node_ids[1], 30, 40], [foreign_node_id, 99, 99]]})
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+        self.assertEqual(response.get_json(), {"updated": 2})
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE nodes')]), 1)
+        positions = {node.id: (node.x, node.y) for node in db.session.scalars(db.select(Node))}
+        self.assertEqual(positions[node_ids[0]], (10.0, 20.0))
+        self.assertEqual(positions[node_ids[1]], (30.0, 40.0))
+        self.assertEqual(positions[foreign_node_id], (1.0, 1.0))
+
+        self.assertEqual(self.client.patch(f'/api/groups/{other_group_id}/nodes/positions',
+                                           json={"positions": [[foreign_node_id, 5, 5]]}).status_code, 403)
+        self.assertEqual(self.client.patch(f'/api/groups/{group_id}/nodes/positions',
+                                           json={"positions": [[node_ids[0], 'left', 5]]}).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+import unittest
+from sqlalchemy import event
+from app import db
+from app.models import User, Post, Group
+from app.pagination import keyset_paginate, encode_cursor, decode_cursor
+from testing.base import AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_pagination
+'''
+
+class KeysetPaginationCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        u = User(username='john', email='john@example.com')
+        u.set_password('cat')
+        group = Group(name='Feed Group')
+        db.session.add_all([u, group])
+        db.session.commit()
+
+        # Pairs of posts share a timestamp so the id tie-breaker is exercised
+        base = datetime(2025, 1, 1, 12, 0)
+        for i in range(11):
+            db.session.add(Post(body=f'post {i}', user_id=u.id, group_id=group.id,
+                                timestamp=base + timedelta(minutes=i // 2)))
+        db.session.commit()
+        self.query = db.select(Post).where(Post.group_id == group.id)
+
+    def paginate(self, **kwargs):
+        return keyset_paginate(self.query, Post.timestamp, Post.id, 4, **kwargs)
+
+    def test_cursor_round_trip(self):
+        ts = datetime(2025, 5, 1, 9, 30, 15, 123)
+        self.assertEqual(decode_cursor(encode_cursor(ts, 42)), (ts, 42))
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_walk_older_then_newer(self):
+        first = self.paginate()
+        self.assertEqual([p.body for p in first.items], ['post 10', 'post 9', 'post 8', 'post 7'])
+        self.assertFalse(first.has_prev)
+        self.assertTrue(first.has_next)
+
+        second = self.paginate(after=first.next_cursor)
+        self.assertEqual([p.body for p in second.items], ['post 6', 'post 5', 'post 4', 'post 3'])
+
+        last = self.paginate(after=second.next_cursor)
+        self.assertEqual([p.body for p in last.items], ['post 2', 'post 1', 'post 0'])
+        self.assertFalse(last.has_next)
+        self.assertTrue(last.has_prev)
+
+        back = self.paginate(before=last.prev_cursor)
+        self.assertEqual([p.body for p in back.items], [p.body for p in second.items])
+        back_to_first = self.paginate(before=back.prev_cursor)
+        self.assertEqual([p.body for p in back_to_first.items], [p.body for p in first.items])
+        self.assertFalse(back_to_first.has_prev)
+
+    def test_count_only_when_requested(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            page = self.paginate()
+            self.assertIsNone(page.total)
+            self.assertFalse(any('count(' in sql.lower() for sql in statements))
+
+            page = self.paginate(with_total=True)
+            self.assertEqual(page.total, 11)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
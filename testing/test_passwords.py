@@ -0,0 +1,140 @@
+import threading
+import time
+import unittest
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models import User
+from app.passwords import HashingPool, HashingPoolBusy, canonical_method, needs_rehash
+from testing.base import TestConfig, AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_passwords
+'''
+
+class PasswordConfig(TestConfig):
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:2000'  # cheap, for tests
+    PASSWORD_HASH_WORKERS = 1
+    PASSWORD_HASH_QUEUE_SIZE = 2
+    METRICS_TOKEN = 'metrics-secret'
+
+
+class PasswordPolicyCase(AppTestCase):
+    # Logins run outside self.app_context, which would keep the logged-in user across requests
+    config_class = PasswordConfig
+
+    def setUp(self):
+        super().setUp()
+        user = User(username='john', email='john@example.com',
+                    password_hash=generate_password_hash('cat', 'pbkdf2:sha256:1000'))  # an older policy
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+        self.app_context.pop()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.app_context.push()  # popped at the end of setUp
+        super().tearDown()
+
+    def stored_hash(self):
+        with self.app.app_context():
+            return db.session.get(User, self.user_id).password_hash
+
+    def login(self, password):
+        return self.client.post('/login', data={'username': 'john', 'password': password})
+
+    def test_canonical_method_fills_in_defaults(self):
+        self.assertEqual(canonical_method('pbkdf2:sha256:2000'), 'pbkdf2:sha256:2000')
+        self.assertTrue(canonical_method('pbkdf2:sha256').startswith('pbkdf2:sha256:'))
+        self.assertEqual(canonical_method('scrypt'), 'scrypt:32768:8:1')
+        with self.app.app_context():
+            self.assertTrue(needs_rehash(generate_password_hash('x', 'pbkdf2:sha256:1000')))
+            self.assertFalse(needs_rehash(generate_password_hash('x', 'pbkdf2:sha256:2000')))
+
+    def test_successful_login_rehashes_under_the_new_policy(self):
+        self.assertEqual(self.login('dog').headers['Location'], '/login')
+        self.assertTrue(self.stored_hash().startswith('pbkdf2:sha256:1000$'))  # a failed login changes nothing
+
+        response = self.login('cat')
+        self.assertEqual(response.headers['Location'], '/index')
+        self.assertTrue(self.stored_hash().startswith('pbkdf2:sha256:2000$'))
+
+        self.client.get('/logout')
+        self.assertEqual(self.login('cat').headers['Location'], '/index')  # the new hash verifies
+        with self.app.app_context():
+            self.assertEqual(self.app.extensions['hashing_pool'].metrics()['rejected'], 0)
+
+    def test_full_pool_turns_logins_away(self):
+        pool = self.app.extensions['hashing_pool']
+        blocker = threading.Event()
+
+        def occupy():
+            blocker.wait(5)
+
+        threads = [threading.Thread(target=pool.run, args=(occupy,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        try:
+            deadline = time.monotonic() + 5
+            while pool.metrics()['depth'] < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(pool.metrics()['depth'], 2)  # one running, one queued: the pool is full
+            with self.assertRaises(HashingPoolBusy):
+                pool.run(occupy)
+            response = self.login('cat')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+        finally:
+            blocker.set()
+            for thread in threads:
+                thread.join()
+
+        metrics = pool.metrics()
+        self.assertEqual((metrics['depth'], metrics['max_depth'], metrics['rejected']), (0, 2, 2))
+        self.assertEqual(self.login('cat').status_code, 302)
+
+    def test_metrics_endpoint_reports_the_pool(self):
+        self.assertEqual(self.client.get('/metrics/password-hashing').status_code, 403)
+        for password in ('dog', 'cat', 'cat'):  # a wrong password, a login that rehashes, a plain login
+            self.login(password)
+            self.client.get('/logout')
+        response = self.client.get('/metrics/password-hashing', headers={'Authorization': 'Bearer metrics-secret'})
+        self.assertEqual(response.status_code, 200)
+        metrics = response.get_json()
+        self.assertEqual((metrics['workers'], metrics['depth'], metrics['max_pending']), (1, 0, 2))
+        self.assertEqual(metrics['completed'], 4)  # three verifications and one rehash
+        self.assertEqual(metrics['rejected'], 0)
+        self.assertGreaterEqual(metrics['avg_wait_ms'], 0)
+
+    def test_metrics_endpoint_is_off_without_a_token(self):
+        class NoTokenConfig(PasswordConfig):
+            METRICS_TOKEN = None
+
+        client = create_app(NoTokenConfig).test_client()
+        self.assertEqual(client.get('/metrics/password-hashing').status_code, 404)
+
+
+class HashingPoolCase(unittest.TestCase):
+    def test_runs_at_most_workers_hashes_at_once(self):
+        pool = HashingPool(workers=2, max_pending=8)
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def hash_job():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            generate_password_hash('cat', 'pbkdf2:sha256:20000')
+            with lock:
+                running[0] -= 1
+
+        threads = [threading.Thread(target=pool.run, args=(hash_job,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(pool.metrics()['completed'], 6)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+import unittest
+from sqlalchemy import event
+from app import db
+from app.models import User, Post, Group, GroupMember, Message
+from testing.base import AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_query_budget
+'''
+
+# Feed pages must render in a fixed number of SQL statements: the author/sender
+# of every row is loaded with the page query, never one query per row.
+class FeedQueryBudgetCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        authors = [User(username=f'author{i}', email=f'author{i}@example.com', password_hash='x') for i in range(12)]
+        db.session.add_all(authors)
+        group = Group(name='Budget Group')
+        db.session.add(group)
+        db.session.flush()
+        db.session.add(GroupMember(user_id=authors[0].id, group_id=group.id))
+
+        # Every post and message comes from a different user so per-row lazy loads would show up.
+        # Only the viewer is still a member, so loading the member list doesn't warm up the authors.
+        base = datetime(2025, 1, 1)
+        for i, author in enumerate(authors):
+            db.session.add(Post(body=f'post {i}', user_id=author.id, group_id=group.id, timestamp=base + timedelta(minutes=i)))
+            db.session.add(Post(body=f'own post {i}', user_id=authors[0].id, timestamp=base + timedelta(minutes=i)))
+            db.session.add(Message(body=f'message {i}', sender_id=author.id, recipient_id=authors[0].id, timestamp=base + timedelta(minutes=i)))
+        db.session.commit()
+
+        self.viewer_id = authors[0].id
+        self.group_id = group.id
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.viewer_id)
+
+    def count_statements(self, url, per_page):
+        self.app.config['POSTS_PER_PAGE'] = per_page
+        db.session.expunge_all()  # start each request with a cold identity map
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertEqual(response.status_code, 200)
+        return len(statements)
+
+    def assertFixedBudget(self, url):
+        self.client.get(url)  # warm-up: login bookkeeping (last_active write) only happens once
+        small = self.count_statements(url, 2)
+        large = self.count_statements(url, 10)
+        self.assertEqual(small, large, f"{url} issued {small} statements for 2 rows but {large} for 10")
+
+    def test_group_feed(self):
+        self.assertFixedBudget(f'/groups/{self.group_id}')
+
+    def test_user_feed(self):
+        self.assertFixedBudget('/user/author0')
+
+    def test_messages(self):
+        self.assertFixedBudget('/messages')
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,84 @@
+import unittest
+from app import create_app, db
+from app.models import User, Group, GroupMember
+from app.replica import route_request
+from testing.base import TestConfig, FileDatabaseTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_replica
+'''
+
+class ReplicaConfig(TestConfig):
+    REPLICA_SNAPSHOT = True
+    REPLICA_REFRESH_SECONDS = 3600  # refreshed by hand below
+
+
+class ReplicaRoutingCase(FileDatabaseTestCase):
+    # Requests run outside self.app_context, so each one is routed afresh
+    config_class = ReplicaConfig
+
+    def setUp(self):
+        super().setUp()
+        self.snapshot = self.app.extensions['replica_snapshot']
+        user = User(username='john', email='john@example.com', password_hash='x')
+        self.add_group('First', user)
+        db.session.commit()
+        self.user_id = user.id
+        self.app_context.pop()
+        self.snapshot.refresh()
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.user_id)
+
+    def tearDown(self):
+        self.app_context.push()  # popped at the end of setUp
+        super().tearDown()
+        self.app.extensions['replica_engine'].dispose()
+
+    def add_group(self, name, user):
+        group = Group(name=name, owner=user)
+        db.session.add_all([group, GroupMember(user=user, group=group, is_owner=True)])
+
+    def add_group_on_primary(self, name):
+        with self.app.app_context():
+            self.add_group(name, db.session.get(User, self.user_id))
+            db.session.commit()
+
+    def group_names(self):
+        return sorted(group["name"] for group in self.client.get('/api/groups').get_json())
+
+    def test_get_requests_read_the_replica(self):
+        self.add_group_on_primary('Second')
+        self.assertEqual(self.group_names(), ['First'])  # not copied to the replica yet
+
+        self.snapshot.refresh()
+        self.assertEqual(self.group_names(), ['First', 'Second'])
+
+    def test_client_sticks_to_primary_after_a_write(self):
+        self.add_group_on_primary('Second')
+        response = self.client.post('/api/groups', json={"name": "Third"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.group_names(), ['First', 'Second', 'Third'])
+
+    def test_write_in_a_get_request_moves_its_later_reads_to_the_primary(self):
+        with self.app.test_request_context('/api/groups'):
+            route_request()
+            select_groups = db.select(Group)
+            self.assertIs(db.session.get_bind(clause=select_groups), self.app.extensions['replica_engine'])
+
+            self.add_group('Second', db.session.get(User, self.user_id))
+            db.session.flush()
+            self.assertIs(db.session.get_bind(clause=select_groups), db.engine)
+            self.assertEqual(len(db.session.scalars(select_groups).all()), 2)
+            db.session.rollback()
+
+    def test_primary_only_without_a_replica(self):
+        app = create_app(TestConfig)
+        with app.test_request_context('/api/groups'):
+            self.assertNotIn('replica_engine', app.extensions)
+            self.assertIs(db.session.get_bind(clause=db.select(Group)), db.engine)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,151 @@
+import unittest
+from sqlalchemy import event
+from app import db
+from app.models import User, Group, GroupMember, InsightPanel, SharedInsightPanel
+from testing.base import AppTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_sharing
+'''
+
+class BulkShareCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.owner = User(username='john', email='john@example.com', password_hash='x')
+        self.members = [User(username=f'member{i}', email=f'member{i}@example.com', password_hash='x') for i in range(200)]
+        self.group = Group(name='Big Group', owner=self.owner)
+        self.panel = InsightPanel(user=self.owner, analysis_type='spending-by-category', title='Spending')
+        db.session.add_all([self.owner, *self.members, self.group, self.panel])
+        db.session.commit()
+        db.session.add_all([GroupMember(user_id=user.id, group_id=self.group.id) for user in [self.owner, *self.members]])
+        db.session.commit()
+        self.owner_id, self.group_id, self.panel_id = self.owner.id, self.group.id, self.panel.id
+        self.member_ids = [user.id for user in self.members]
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.owner_id)
+
+    def share(self, **payload):
+        return self.client.post(f'/api/insights/panels/{self.panel_id}/share',
+                                json={"access_mode": "dynamic", "current_config_for_fixed_share": {}, **payload})
+
+    def count_share_statements(self, **payload):
+        self.client.get('/api/me/unread')  # warm-up: login bookkeeping
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = self.share(**payload)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertEqual(response.status_code, 200)
+        return len(statements)
+
+    def shares(self):
+        return db.session.scalars(db.select(SharedInsightPanel).filter_by(original_panel_id=self.panel_id)).all()
+
+    def test_share_with_group_uses_constant_round_trips(self):
+        statement_count = self.count_share_statements(share_with_group_id=self.group_id)
+        self.assertLessEqual(statement_count, 8)
+        self.assertEqual({share.recipient_id for share in self.shares()}, set(self.member_ids))
+
+        # Sharing again updates every existing row in place (the membership check is cached by now)
+        self.assertLessEqual(self.count_share_statements(share_with_group_id=self.group_id), statement_count)
+        self.assertEqual(len(self.shares()), 200)
+
+    def test_explicit_recipients_are_validated_in_bulk(self):
+        response = self.share(recipient_user_ids=self.member_ids[:3] + [self.owner_id, 99999, 'abc'])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.get_json()['errors']), 3)
+        self.assertEqual({share.recipient_id for share in self.shares()}, set(self.member_ids[:3]))
+
+    def test_reshare_switches_access_mode(self):
+        self.share(recipient_user_ids=self.member_ids[:2])
+        self.share(recipient_user_ids=self.member_ids[:2], access_mode='fixed',
+                   current_config_for_fixed_share={"group_id": "all", "startDate": "2025-01-01"})
+        db.session.expire_all()
+        self.assertEqual({share.access_mode for share in self.shares()}, {'fixed'})
+
+    def test_group_share_requires_membership(self):
+        other_group = Group(name='Other')
+        db.session.add(other_group)
+        db.session.commit()
+        self.assertEqual(self.share(share_with_group_id=other_group.id).status_code, 403)
+
+
+class PanelListingCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.me = User(username='john', email='john@example.com', password_hash='x')
+        sharers = [User(username=f'sharer{i}', email=f'sharer{i}@example.com', password_hash='x') for i in range(5)]
+        self.originals = [InsightPanel(user=sharer, analysis_type='spending-by-category', title=f'Panel {i}',
+                                       configuration={"time_period": "last_month"})
+                          for i, sharer in enumerate(sharers)]
+        own_panel = InsightPanel(user=self.me, analysis_type='spending-by-category', title='Mine')
+        db.session.add_all([self.me, *sharers, *self.originals, own_panel])
+        db.session.commit()
+        db.session.add_all([SharedInsightPanel(original_panel_id=panel.id, sharer_id=panel.user_id, recipient_id=self.me.id,
+                                               access_mode='dynamic', shared_config={"group_id": "all"})
+                            for panel in self.originals])
+        db.session.commit()
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.me.id)
+        self.client.get('/api/me/unread')  # warm-up: login bookkeeping
+
+    def get_panels(self, **headers):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.get('/api/insights/panels', headers=headers)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        return response, len([sql for sql in statements if 'insight_panel' in sql])
+
+    def test_listing_uses_fixed_queries(self):
+        response, statement_count = self.get_panels()
+        self.assertEqual(len(response.get_json()), 6)
+        self.assertEqual({panel['sharer_username'] for panel in response.get_json()[1:]},
+                         {f'sharer{i}' for i in range(5)})
+        self.assertEqual(statement_count, 3)  # ETag fingerprint, own panels, shared panels
+
+    def test_etag_revalidation(self):
+        response, _ = self.get_panels()
+        etag = response.headers['ETag']
+        cached, statement_count = self.get_panels(**{'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(statement_count, 1)  # ETag fingerprint only
+
+        self.originals[0].configuration = {"time_period": "last_year"}
+        db.session.commit()
+        changed, _ = self.get_panels(**{'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_etag_changes_when_a_new_panel_reuses_a_deleted_id(self):
+        deleted_id = self.client.post('/api/insights/panels', json={'analysis_type': 'spending-by-category'}).get_json()['id']
+        etag = self.get_panels()[0].headers['ETag']
+        self.client.delete(f'/api/insights/panels/{deleted_id}')
+        created = self.client.post('/api/insights/panels', json={'analysis_type': 'event-location-heatmap'}).get_json()
+        self.assertEqual(created['id'], deleted_id)  # SQLite hands out the freed rowid again
+
+        changed, _ = self.get_panels(**{'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertIn('event-location-heatmap', [panel['analysis_type'] for panel in changed.get_json()])
+
+    def test_etag_changes_when_a_sharer_is_renamed(self):
+        etag = self.get_panels()[0].headers['ETag']
+        self.originals[0].user.username = 'renamed'
+        db.session.commit()
+        changed, _ = self.get_panels(**{'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertIn('renamed', [panel.get('sharer_username') for panel in changed.get_json()])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import text
+from app import create_app, db
+from testing.base import TestConfig
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_storage
+'''
+
+class StorageProfileCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_app(self, storage_profile):
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(self.directory, f'{storage_profile}.db')
+            STORAGE_PROFILE = storage_profile
+        return create_app(FileConfig)
+
+    def pragma(self, name):
+        return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+    def test_wal_profile_sets_pragmas_and_pool_on_each_connection(self):
+        app = self.make_app('wal')
+        with app.app_context():
+            self.assertEqual(self.pragma('journal_mode'), 'wal')
+            self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+            self.assertEqual(self.pragma('busy_timeout'), 5000)
+            self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+            self.assertEqual(self.pragma('cache_size'), -16384)
+            self.assertEqual(db.engine.pool.size(), 10)
+            db.session.remove()
+
+            # a second pooled connection gets the same settings
+            with db.engine.connect(), db.engine.connect() as second:
+                self.assertEqual(second.execute(text("PRAGMA busy_timeout")).scalar(), 5000)
+            db.engine.dispose()
+
+    def test_default_profile_leaves_sqlite_unchanged(self):
+        app = self.make_app('default')
+        with app.app_context():
+            self.assertEqual(self.pragma('journal_mode'), 'delete')
+            self.assertEqual(self.pragma('synchronous'), 2)  # FULL
+            db.session.remove()
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
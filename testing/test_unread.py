@@ -0,0 +1,128 @@
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from app import db
+from app.models import User, Message
+from testing.base import AppTestCase, FileDatabaseTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_unread
+'''
+
+class UnreadCounterCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sender = User(username='john', email='john@example.com', password_hash='x')
+        self.recipient = User(username='susan', email='susan@example.com', password_hash='x')
+        db.session.add_all([self.sender, self.recipient])
+        db.session.commit()
+        self.sender_id, self.recipient_id = self.sender.id, self.recipient.id
+
+    def send(self, body):
+        db.session.add(Message(sender_id=self.sender_id, recipient_id=self.recipient_id, body=body))
+        db.session.commit()
+
+    def test_counter_increments_and_resets(self):
+        self.assertEqual(self.recipient.new_messages(), 0)
+        self.send('hi')
+        self.send('hello again')
+        db.session.refresh(self.recipient)
+        self.assertEqual(self.recipient.new_messages(), 2)
+        self.assertEqual(self.sender.new_messages(), 0)
+
+        self.assertTrue(self.recipient.mark_messages_read())
+        db.session.commit()
+        self.assertEqual(self.recipient.new_messages(), 0)
+        self.assertIsNotNone(self.recipient.last_message_read_time)
+        self.assertFalse(self.recipient.mark_messages_read())
+
+        self.send('later')  # a second reset matches on the stored last_message_read_time
+        db.session.refresh(self.recipient)
+        self.assertTrue(self.recipient.mark_messages_read())
+        db.session.commit()
+        self.assertEqual(self.recipient.new_messages(), 0)
+
+    def test_reset_reads_messages_up_to_the_read_time(self):
+        self.send('hi')
+        db.session.refresh(self.recipient)
+        self.assertEqual(self.recipient.unread_message_count, 1)  # what the page was rendered with
+
+        # Counted after the recipient was loaded: older than the new read time, so read too
+        self.send('hello again')
+        # Timestamped after the new read time (sent while the reset runs): stays unread
+        later = datetime.now(timezone.utc) + timedelta(minutes=5)
+        db.session.add(Message(sender_id=self.sender_id, recipient_id=self.recipient_id, body='late', timestamp=later))
+        db.session.commit()
+        self.assertTrue(self.recipient.mark_messages_read())
+        db.session.commit()
+        self.assertEqual(self.recipient.new_messages(), 1)
+
+    def test_messages_older_than_the_read_time_are_not_counted(self):
+        self.send('hi')
+        db.session.refresh(self.recipient)
+        self.assertTrue(self.recipient.mark_messages_read())
+        db.session.commit()
+        earlier = self.recipient.last_message_read_time - timedelta(minutes=5)
+        db.session.add(Message(sender_id=self.sender_id, recipient_id=self.recipient_id, body='delayed', timestamp=earlier))
+        db.session.commit()
+        db.session.refresh(self.recipient)
+        self.assertEqual(self.recipient.new_messages(), 0)
+
+    def test_concurrent_resets_subtract_once(self):
+        self.send('hi')
+        self.send('hello again')
+        recipient_id = self.recipient_id
+        db.session.remove()
+
+        first, second = db.session(), db.session.session_factory()
+        try:
+            reader_one, reader_two = first.get(User, recipient_id), second.get(User, recipient_id)
+            self.assertEqual((reader_one.unread_message_count, reader_two.unread_message_count), (2, 2))
+            self.assertTrue(reader_one.mark_messages_read())
+            first.commit()
+            self.send('late')
+            self.assertFalse(reader_two.mark_messages_read())  # already marked read by the first
+            second.commit()
+        finally:
+            second.close()
+        self.assertEqual(db.session.get(User, recipient_id).new_messages(), 1)
+
+    def test_unread_endpoint(self):
+        self.send('ping')
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(self.recipient.id)
+        self.assertEqual(client.get('/api/me/unread').get_json(), {"unread_messages": 1})
+
+
+class ConcurrentSendCase(FileDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        sender = User(username='john', email='john@example.com', password_hash='x')
+        self.recipient = User(username='susan', email='susan@example.com', password_hash='x')
+        db.session.add_all([sender, self.recipient])
+        db.session.commit()
+        self.sender_id, self.recipient_id = sender.id, self.recipient.id
+
+    def test_concurrent_sends_are_all_counted(self):
+        sender_id, recipient_id = self.sender_id, self.recipient_id
+
+        def send_many(worker):
+            with self.app.app_context():
+                for i in range(5):
+                    db.session.add(Message(sender_id=sender_id, recipient_id=recipient_id, body=f'{worker}-{i}'))
+                    db.session.commit()
+                db.session.remove()
+
+        threads = [threading.Thread(target=send_many, args=(w,)) for w in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        db.session.refresh(self.recipient)
+        self.assertEqual(self.recipient.new_messages(), 40)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
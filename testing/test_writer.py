@@ -0,0 +1,131 @@
+import threading
+import unittest
+from datetime import datetime
+from sqlalchemy import event
+from app import db
+from app.models import User, Group, GroupMember, Node, Event, EventRSVP, Post
+from app.writer import run_write, WriteQueueBusy
+from testing.base import TestConfig, FileDatabaseTestCase
+
+# Run in terminal with command:
+'''
+python -m unittest testing.test_writer
+'''
+
+WRITERS = 50
+WRITES_PER_WRITER = 20
+
+
+def add_post(user_id, group_id, body):
+    post = Post(body=body, user_id=user_id, group_id=group_id)
+    db.session.add(post)
+    db.session.flush()
+    return post.id
+
+
+def fail():
+    raise ValueError("bad write")
+
+
+class QueueConfig(TestConfig):
+    STORAGE_PROFILE = 'wal'
+    WRITE_QUEUE_ENABLED = True
+
+
+class WriteQueueCase(FileDatabaseTestCase):
+    config_class = QueueConfig
+
+    def setUp(self):
+        super().setUp()
+
+        self.user = User(username='john', email='john@example.com', password_hash='x')
+        group = Group(name='Board', owner=self.user)
+        node = Node(label='Food', x=0.0, y=0.0, group=group)
+        db.session.add_all([self.user, group, node, GroupMember(user=self.user, group=group, is_owner=True)])
+        db.session.flush()
+        self.event = Event(title='Picnic', date=datetime(2025, 1, 1), location='Perth', node_id=node.id)
+        db.session.add(self.event)
+        db.session.commit()
+        self.user_id, self.group_id, self.event_id = self.user.id, group.id, self.event.id
+        db.session.remove()
+
+        self.queue = self.app.extensions['write_queue']
+
+    def tearDown(self):
+        self.queue.stop()
+        super().tearDown()
+
+    def test_concurrent_writers_are_serialized_and_grouped(self):
+        commits = []
+        event.listen(db.engine, 'commit', lambda conn: commits.append(1))
+        errors, post_ids, lock = [], [], threading.Lock()
+
+        def writer(index):
+            with self.app.app_context():
+                for n in range(WRITES_PER_WRITER):
+                    try:
+                        post_id = run_write(add_post, self.user_id, self.group_id, f"writer {index} post {n}")
+                    except Exception as exc:  # "database is locked" would end up here
+                        with lock:
+                            errors.append(exc)
+                    else:
+                        with lock:
+                            post_ids.append(post_id)
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(post_ids)), WRITERS * WRITES_PER_WRITER)
+        self.assertEqual(db.session.scalar(db.select(db.func.count(Post.id))), WRITERS * WRITES_PER_WRITER)
+        self.assertLess(len(commits), WRITERS * WRITES_PER_WRITER / 2)  # writes were committed in groups
+
+    def test_failing_write_does_not_fail_its_batch(self):
+        futures = [self.queue.submit(add_post, self.user_id, self.group_id, "before"),
+                   self.queue.submit(fail),
+                   self.queue.submit(add_post, self.user_id, self.group_id, "after")]
+        self.assertIsInstance(futures[0].result(timeout=5), int)
+        with self.assertRaises(ValueError):
+            futures[1].result(timeout=5)
+        self.assertIsInstance(futures[2].result(timeout=5), int)
+        self.assertEqual(db.session.scalars(db.select(Post.body).order_by(Post.id)).all(), ["before", "after"])
+
+    def test_full_queue_answers_503(self):
+        self.queue._jobs.maxsize = 1
+        started, blocker = threading.Event(), threading.Event()
+
+        def occupy():
+            started.set()
+            blocker.wait(5)
+
+        self.queue.submit(occupy)
+        try:
+            self.assertTrue(started.wait(5))  # the writer thread is busy
+            self.queue.submit(add_post, self.user_id, self.group_id, "queued")  # fills the only slot
+            with self.assertRaises(WriteQueueBusy):
+                self.queue.submit(add_post, self.user_id, self.group_id, "rejected")
+
+            client = self.app.test_client()
+            with client.session_transaction() as sess:
+                sess['_user_id'] = str(self.user_id)
+            response = client.post(f'/api/events/{self.event_id}/rsvp', json={"status": "attending"})
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+        finally:
+            blocker.set()
+
+    def test_rsvp_route_goes_through_the_writer(self):
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(self.user_id)
+        response = client.post(f'/api/events/{self.event_id}/rsvp', json={"status": "attending"})
+        self.assertEqual(response.status_code, 201)
+        again = client.post(f'/api/events/{self.event_id}/rsvp', json={"status": "attending"})
+        self.assertEqual(again.get_json()["message"], "RSVP already set to 'attending'.")
+        self.assertEqual(db.session.scalar(db.select(EventRSVP.status).filter_by(event_id=self.event_id)), 'attending')
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)